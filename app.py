@@ -6,154 +6,656 @@ Routes
 GET  /           Display the OPORD input form.
 POST /generate   Accept form data, optionally call AI, render OPORD preview.
 POST /export     Export the current OPORD to Google Slides.
+GET  /download/<fmt>
+                 Download the current OPORD as txt, md, json (streamed) or pdf.
+POST /api/suggest
+                 Start speculative AI enrichment for the form's summary fields.
+POST /api/drafts Start an autosave draft of the form.
+GET  /api/drafts/<draft_id>
+                 Return a draft's revision and fields.
+PATCH /api/drafts/<draft_id>
+                 Merge the fields changed since a revision into a draft.
+GET  /api/drafts/<draft_id>/events
+                 Live field deltas and paragraph locks of a shared draft (SSE).
+POST /api/drafts/<draft_id>/locks/<paragraph>
+DELETE /api/drafts/<draft_id>/locks/<paragraph>
+                 Take / release an editor's lock on one OPORD paragraph.
+GET  /healthz    Readiness probe; warms templates, clients and caches.
+GET  /opords/<operation>/revisions
+                 List stored revisions of an operation's order.
+GET  /opords/<operation>/revisions/<version>
+                 Check out one revision as JSON.
+GET  /opords/<operation>/revisions/<version>/download/<fmt>
+                 Download one revision as txt, md, json or pdf.
+GET  /opords/<operation>/diff?from=<a>&to=<b>
+                 Field-level diff between two revisions.
+POST /opords/<operation>/sections/<key>/regenerate
+                 Rewrite one AI-fillable section; returns its HTML fragment.
+GET  /search?q=<text>
+                 Ranked full-text search over past orders.
+GET  /api/search?q=<text>&limit=<n>
+                 The same search as JSON.
 """
 
 import os
+import secrets
 from datetime import datetime, timezone
+from typing import Optional
 
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, session, redirect, url_for, flash
-
-from opord.generator import (
-    OPORDData,
-    OPORDGenerator,
-    Situation,
-    EnemyForces,
-    FriendlyForces,
-    Execution,
-    Sustainment,
-    CommandAndSignal,
+from flask import (
+    Flask,
+    Response,
+    abort,
+    flash,
+    get_template_attribute,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
 )
-from opord.ai_helper import generate_full_opord, get_client
-from opord.slides_helper import export_to_slides
 
+# Load .env before importing opord so its environment-driven settings
+# (e.g. field length limits) see the configured values.
 load_dotenv()
 
+from opord.generator import OPORDData, OPORDGenerator  # noqa: E402
+from opord.ai_helper import (  # noqa: E402
+    ai_mode,
+    enrichment_available,
+    generate_full_opord,
+    get_client,
+    get_rate_limiter,
+    regenerate_field,
+)
+from opord.http_cache import (  # noqa: E402
+    FAR_FUTURE_MAX_AGE,
+    BoundedCache,
+    compress_response,
+    content_etag,
+    static_version,
+)
+from opord.db import default_db_path  # noqa: E402
+from opord.collab import DraftHub, StreamSlots, event_stream  # noqa: E402
+from opord.drafts import DraftStore, ParagraphLocked  # noqa: E402
+from opord.downloads import (  # noqa: E402
+    FORMATS,
+    cached_download,
+    content_key,
+    download_filename,
+    stream_download,
+)
+from opord.prefetch import Prefetcher, SuggestionCache  # noqa: E402
+from opord.rate_limit import RateLimitTimeout  # noqa: E402
+from opord.revisions import RevisionStore  # noqa: E402
+from opord.search import SearchIndex, fts5_available  # noqa: E402
+from opord.similarity import SimilarityIndex, Suggestions  # noqa: E402
+from opord.schema import (  # noqa: E402
+    FIELD_LIMITS,
+    FIELDS,
+    FIELDS_BY_KEY,
+    PARAGRAPH_TITLES,
+    TASK_FIELDS,
+    build_opord_data,
+    form_from_dict,
+    parse_form,
+    validate_fields,
+    validate_form,
+)
+from opord.slides_helper import export_to_slides  # noqa: E402
+
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-change-me")
 
+# Upper bound on the size of any request body; larger requests get a 413
+# before they are parsed.  Per-field limits are enforced by opord.schema.
+MAX_REQUEST_BYTES = int(os.environ.get("OPORD_MAX_REQUEST_BYTES", 1024 * 1024))
+app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+app.config["MAX_FORM_MEMORY_SIZE"] = MAX_REQUEST_BYTES
+
+# Longest time /generate waits for a running prefetch of the same summary.
+# Sections it has not cached by then are generated directly (an identical
+# call still in flight in this worker is joined rather than repeated).
+PREFETCH_WAIT_SECONDS = float(os.environ.get("OPORD_PREFETCH_WAIT_SECONDS", 3))
+
+# Prefetched sections are shared by every worker process through the db.
+prefetcher = Prefetcher(SuggestionCache(default_db_path()))
+
+# Every generated order is kept as a revision of its operation.
+revisions = RevisionStore(default_db_path())
+
+# Autosaved, not yet generated forms, and the live streams of shared ones.
+drafts = DraftStore(default_db_path())
+draft_hub = DraftHub()
+live_streams = StreamSlots()
+
+# Seconds a browser polls the draft instead when every stream slot is taken.
+STREAM_BUSY_RETRY_SECONDS = 60
+
+# Longest editor name accepted for paragraph locks.
+MAX_EDITOR_CHARS = 40
+
+# Full-text index of each operation's latest order (None without FTS5).
+search_index = SearchIndex(default_db_path()) if fts5_available() else None
+
+# Recent orders, for filling blank sections from a close match instead of AI.
+similar_orders = SimilarityIndex()
+
+# Rendered index pages keyed on (default DTG, form options); the DTG only
+# changes once a minute, so the page is rendered at most once per minute.
+_index_cache = BoundedCache(maxsize=4)
+
+
+def _slides_enabled() -> bool:
+    """Return True when a Google credentials file is configured and present."""
+    credentials_file = os.environ.get("GOOGLE_CREDENTIALS_FILE", "")
+    return bool(credentials_file and os.path.exists(credentials_file))
+
+
+def warm_up() -> dict:
+    """
+    Compile every template and build the per-process AI client and rate
+    limiter so the first real request does not pay for them.
+
+    Cheap to call again once warm; returns a summary of what is enabled.
+    """
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    ai_enabled = get_client() is not None
+    if ai_enabled:
+        get_rate_limiter()
+    if search_index is not None and not len(search_index):
+        # Orders saved before the index existed.
+        search_index.reindex(revisions)
+    similar_orders.sync(revisions)
+    return {"ai_enabled": ai_enabled, "ai_mode": ai_mode(), "slides_enabled": _slides_enabled()}
+
 
 def _form_to_opord_data(form: dict) -> OPORDData:
-    """Map flat HTML form fields to an OPORDData object."""
-    tasks = {}
-    for unit in [
-        "1st Platoon (Rifle)",
-        "2nd Platoon (Rifle)",
-        "3rd Platoon (Rifle)",
-        "Weapons Platoon",
-        "Headquarters & Support Element",
-    ]:
-        key = f"task_{unit.split()[0].lower()}"
-        val = form.get(key, "").strip()
-        if val:
-            tasks[unit] = val
-
-    return OPORDData(
-        operation_name=form.get("operation_name", "").strip(),
-        classification=form.get("classification", "UNCLASSIFIED // TRAINING USE ONLY").strip(),
-        dtg=form.get("dtg", "").strip(),
-        reference_maps=form.get("reference_maps", "").strip(),
-        time_zone=form.get("time_zone", "ZULU").strip(),
-        insert_method=form.get("insert_method", "").strip(),
-        dz_lz=form.get("dz_lz", "").strip(),
-        situation=Situation(
-            enemy=EnemyForces(
-                composition=form.get("enemy_composition", "").strip(),
-                disposition=form.get("enemy_disposition", "").strip(),
-                strength=form.get("enemy_strength", "").strip(),
-                recent_activity=form.get("enemy_recent_activity", "").strip(),
-                capabilities=form.get("enemy_capabilities", "").strip(),
-                most_likely_coa=form.get("enemy_most_likely_coa", "").strip(),
-                most_dangerous_coa=form.get("enemy_most_dangerous_coa", "").strip(),
-            ),
-            friendly=FriendlyForces(
-                higher_hq_mission=form.get("friendly_higher_hq_mission", "").strip(),
-                adjacent_units=form.get("friendly_adjacent_units", "").strip(),
-                supporting_units=form.get("friendly_supporting_units", "").strip(),
-            ),
-            attachments_detachments=form.get("attachments_detachments", "").strip(),
-            civil_considerations=form.get("civil_considerations", "").strip(),
-        ),
-        mission=form.get("mission", "").strip(),
-        execution=Execution(
-            commanders_intent=form.get("commanders_intent", "").strip(),
-            concept_of_operations=form.get("concept_of_operations", "").strip(),
-            scheme_of_maneuver=form.get("scheme_of_maneuver", "").strip(),
-            scheme_of_fires=form.get("scheme_of_fires", "").strip(),
-            tasks_to_subordinates=tasks,
-            coordinating_instructions=form.get("coordinating_instructions", "").strip(),
-            rules_of_engagement=form.get("rules_of_engagement", "").strip(),
-        ),
-        sustainment=Sustainment(
-            logistics=form.get("sustainment_logistics", "").strip(),
-            personnel=form.get("sustainment_personnel", "").strip(),
-            medical=form.get("sustainment_medical", "").strip(),
-        ),
-        command_and_signal=CommandAndSignal(
-            command=form.get("command_cp", "").strip(),
-            succession_of_command=form.get("succession_of_command", "").strip(),
-            signal=form.get("signal", "").strip(),
-            frequencies=form.get("frequencies", "").strip(),
-            challenge_and_password=form.get("challenge_and_password", "").strip(),
-        ),
+    """Map flat HTML form fields to an OPORDData object (validation errors ignored)."""
+    data, _ = parse_form(form, partial=True)
+    return data
+
+
+def _operation_key(opord_dict: dict) -> str:
+    """Return the revision-store key for an order (its operation name)."""
+    return opord_dict.get("operation_name") or "TBD"
+
+
+def _session_opord() -> Optional[dict]:
+    """Return the order referenced by the session, or None."""
+    ref = session.get("opord_ref")
+    if not ref:
+        return None
+    return revisions.checkout(ref["operation"], ref["version"])
+
+
+def _save_revision(operation: str, opord_dict: dict) -> int:
+    """Store *opord_dict* as a new revision, index it and point the session at it."""
+    # Keep the revision server-side; the session only references it, so the
+    # cookie stays small however long the order is.
+    version = revisions.save(operation, opord_dict)
+    session["opord_ref"] = {"operation": operation, "version": version}
+    if search_index is not None:
+        search_index.add(operation, version, opord_dict)
+    similar_orders.add(operation, version, opord_dict)
+    return version
+
+
+def _similar_sections(flat: dict) -> Suggestions:
+    """Return what the closest past order offers for *flat*'s blank fields."""
+    similar_orders.sync(revisions)
+    return similar_orders.suggestions(flat)
+
+
+def _default_dtg() -> str:
+    """Return the current time as a DTG at minute resolution."""
+    return datetime.now(timezone.utc).strftime("%d%H%MZ %b %Y").upper()
+
+
+def _index_options() -> tuple:
+    """Return what the form offers: (blank-field enrichment, AI mode, AI prefetch)."""
+    mode = ai_mode()
+    return enrichment_available(), mode, mode != "local" and get_client() is not None
+
+
+def _render_index(default_dtg: str = "", options: tuple = None) -> str:
+    """Render the OPORD input form."""
+    ai_enabled, mode, prefetch_enabled = options or _index_options()
+    return render_template(
+        "index.html",
+        default_dtg=default_dtg or _default_dtg(),
+        ai_enabled=ai_enabled,
+        ai_mode=mode,
+        prefetch_enabled=prefetch_enabled,
+        limits=FIELD_LIMITS,
+        task_fields=TASK_FIELDS,
+        field_paragraphs={spec.key: spec.paragraph for spec in FIELDS},
+    )
+
+
+@app.errorhandler(413)
+def request_too_large(exc):
+    """Reject oversized requests with a clear message instead of parsing them."""
+    message = (
+        f"Request too large: the limit is {MAX_REQUEST_BYTES // 1024} KB. "
+        "Shorten the longest fields (e.g. move annex text to an attachment)."
     )
+    if request.path.startswith("/api/"):
+        return jsonify(status="too_large", error=message), 413
+    flash(message, "danger")
+    return _render_index(), 413
+
+
+@app.url_defaults
+def _version_static_urls(endpoint, values):
+    """Add a content hash to static URLs so they can be cached indefinitely."""
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        version = static_version(app.static_folder, values["filename"])
+        if version:
+            values["v"] = version
+
+
+@app.after_request
+def _cache_and_compress(response):
+    if request.endpoint == "static" and request.args.get("v"):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = FAR_FUTURE_MAX_AGE
+        response.cache_control.immutable = True
+    return compress_response(response, request.accept_encodings)
 
 
 @app.route("/", methods=["GET"])
 def index():
     """Render the OPORD input form."""
-    default_dtg = datetime.now(timezone.utc).strftime("%d%H%MZ %b %Y").upper()
-    ai_enabled = get_client() is not None
-    return render_template("index.html", default_dtg=default_dtg, ai_enabled=ai_enabled)
+    if session.get("_flashes"):
+        # Pending flash messages make the page unique to this visitor.
+        return _render_index()
+
+    key = (_default_dtg(), _index_options())
+    cached = _index_cache.get(key)
+    if cached is None:
+        body = _render_index(*key)
+        cached = (body, content_etag(body))
+        _index_cache.put(key, cached)
+    body, etag = cached
+
+    response = make_response(body)
+    response.set_etag(etag)
+    # Always revalidate: the page changes every minute.
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route("/generate", methods=["POST"])
 def generate():
     """Process form, optionally run AI enrichment, render OPORD preview."""
-    form_data = dict(request.form)
     use_ai = request.form.get("use_ai") == "on"
-    form_data.pop("use_ai", None)
-
-    # Flatten single-item lists from MultiDict
-    flat = {k: (v[0] if isinstance(v, list) else v) for k, v in form_data.items()}
+    form = request.form
+    draft_id = form.get("draft_id")
+    if draft_id:
+        draft = drafts.get(draft_id)
+        if draft is None:
+            flash("The autosaved draft has expired. Please fill in the form again.", "warning")
+            return _render_index(), 404
+        # Fields posted alongside the draft ID are newer than the draft's.
+        form = {**draft.fields, **{k: v for k, v in form.items() if k in FIELDS_BY_KEY}}
+    flat, errors = validate_form(form)
+    if errors:
+        for error in errors:
+            flash(error.message, "danger")
+        return _render_index(), 400
 
     if use_ai:
+        similar = _similar_sections(flat)
+        if similar.autofill:
+            flat.update(similar.autofill)
+            flash(
+                f"{len(similar.autofill)} section(s) filled from the similar order "
+                f"OPERATION {similar.match.operation}.",
+                "success",
+            )
         try:
-            flat = generate_full_opord(flat)
+            prefilled = prefetcher.lookup(flat, timeout=PREFETCH_WAIT_SECONDS)
+            flat = generate_full_opord(flat, prefilled=prefilled, examples=similar.examples)
+        except RateLimitTimeout:
+            flash(
+                "The AI service is busy with other requests. Proceeding without AI; "
+                "please try again in a minute.",
+                "warning",
+            )
         except Exception as exc:  # noqa: BLE001
             flash(f"AI enrichment failed: {exc}. Proceeding without AI.", "warning")
 
-    opord_data = _form_to_opord_data(flat)
+    opord_data = build_opord_data(flat)
     generator = OPORDGenerator(opord_data)
     opord_text = generator.generate_text()
     opord_dict = generator.generate_dict()
 
-    # Store for the export route
-    session["opord_dict"] = opord_dict
-
-    slides_enabled = bool(
-        os.environ.get("GOOGLE_CREDENTIALS_FILE")
-        and os.path.exists(os.environ.get("GOOGLE_CREDENTIALS_FILE", ""))
-    )
+    operation = _operation_key(opord_dict)
+    _save_revision(operation, opord_dict)
 
     return render_template(
         "result.html",
         opord_text=opord_text,
         opord=opord_dict,
-        slides_enabled=slides_enabled,
+        operation=operation,
+        regenerate_enabled=enrichment_available(),
+        task_keys=dict(TASK_FIELDS),
+        slides_enabled=_slides_enabled(),
     )
 
 
+@app.route("/api/suggest", methods=["POST"])
+def suggest():
+    """Prefetch AI suggestions for the summary fields of a partially filled form."""
+    # Local mode never calls the model, so there is nothing to prefetch.
+    if ai_mode() == "local" or get_client() is None:
+        return jsonify(status="disabled"), 503
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = request.form
+    fields, errors = validate_form(payload, partial=True)
+    if errors:
+        return jsonify(status="invalid", errors=[e.to_dict() for e in errors]), 400
+    # Sections a close past order can supply are not generated again.
+    similar = _similar_sections(fields)
+    fields.update(similar.autofill)
+    key, status = prefetcher.submit(fields, examples=similar.examples)
+    return jsonify(key=key, status=status), (200 if status == "ready" else 202)
+
+
+def _draft_payload() -> dict:
+    payload = request.get_json(silent=True)
+    return payload if isinstance(payload, dict) else {}
+
+
+def _draft_changes():
+    """Return ``(fields, revision, error response)`` from a draft request body."""
+    payload = _draft_payload()
+    changes = payload.get("fields") or {}
+    revision = payload.get("revision", 0)
+    if not isinstance(changes, dict) or not isinstance(revision, int):
+        return None, None, (jsonify(status="invalid", error="Expected fields and revision."), 400)
+    fields, errors = validate_fields(changes)
+    if errors:
+        return None, None, (
+            jsonify(status="invalid", errors=[e.to_dict() for e in errors]), 400
+        )
+    return fields, revision, None
+
+
+def _editor(value) -> Optional[str]:
+    """Return a usable editor name from *value*, or None."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value if 0 < len(value) <= MAX_EDITOR_CHARS else None
+
+
+def _locked_response(exc: ParagraphLocked):
+    return jsonify(status="locked", error=str(exc), locks=exc.holders), 409
+
+
+@app.route("/api/drafts", methods=["POST"])
+def create_draft():
+    """Start an autosave draft, optionally with the form's current fields."""
+    fields, _, error = _draft_changes()
+    if error:
+        return error
+    return jsonify(drafts.create(fields).to_dict()), 201
+
+
+@app.route("/api/drafts/<draft_id>", methods=["GET"])
+def get_draft(draft_id):
+    """Return a draft's revision and all its fields."""
+    draft = drafts.get(draft_id)
+    if draft is None:
+        return jsonify(error="No such draft."), 404
+    response = jsonify(draft.to_dict())
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route("/api/drafts/<draft_id>", methods=["PATCH"])
+def patch_draft(draft_id):
+    """
+    Merge the fields changed since ``revision`` into a draft.
+
+    The response carries the new revision, only the fields changed by
+    others since ``revision`` (e.g. in another tab) and the paragraph locks,
+    so a patch without fields polls a shared draft.
+    """
+    fields, revision, error = _draft_changes()
+    if error:
+        return error
+    try:
+        draft = drafts.patch(draft_id, revision, fields, editor=_editor(_draft_payload().get("editor")))
+    except ParagraphLocked as exc:
+        return _locked_response(exc)
+    if draft is None:
+        return jsonify(error="No such draft."), 404
+    if fields:
+        draft_hub.notify(draft_id)
+    return jsonify(dict(draft.to_dict(), locks=drafts.locks(draft_id)))
+
+
+@app.route("/api/drafts/<draft_id>/events", methods=["GET"])
+def draft_events(draft_id):
+    """
+    Stream a shared draft's field deltas and paragraph locks as
+    Server-Sent Events, starting after ``Last-Event-ID`` (or ``?revision=``).
+    """
+    if drafts.get(draft_id) is None:
+        return jsonify(error="No such draft."), 404
+    last_id = request.headers.get("Last-Event-ID", "")
+    revision = int(last_id) if last_id.isdigit() else request.args.get("revision", 0, type=int)
+    stream = live_streams.open(event_stream(drafts, draft_hub, draft_id, revision))
+    if stream is None:
+        # Every stream thread is busy: the page polls the draft instead.
+        response = jsonify(status="busy", error="Too many live editors on this server.")
+        response.headers["Retry-After"] = str(STREAM_BUSY_RETRY_SECONDS)
+        return response, 503
+    response = Response(stream, mimetype="text/event-stream")
+    response.cache_control.no_store = True
+    # Stop nginx-style proxies from buffering the stream.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/api/drafts/<draft_id>/locks/<int:paragraph>", methods=["POST", "DELETE"])
+def draft_lock(draft_id, paragraph):
+    """Take (POST) or release (DELETE) an editor's lock on one OPORD paragraph."""
+    editor = _editor(_draft_payload().get("editor") or request.args.get("editor"))
+    if editor is None:
+        return jsonify(status="invalid", error="An editor name is required."), 400
+    if paragraph not in PARAGRAPH_TITLES:
+        return jsonify(error=f"No paragraph {paragraph}."), 404
+    if request.method == "DELETE":
+        if drafts.unlock(draft_id, paragraph, editor):
+            draft_hub.notify(draft_id)
+        return jsonify(locks=drafts.locks(draft_id))
+    try:
+        locks = drafts.lock(draft_id, paragraph, editor)
+    except ParagraphLocked as exc:
+        return _locked_response(exc)
+    if locks is None:
+        return jsonify(error="No such draft."), 404
+    draft_hub.notify(draft_id)
+    return jsonify(locks=locks)
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Readiness probe: warm the process up, then report what is enabled."""
+    try:
+        status = warm_up()
+    except Exception as exc:  # noqa: BLE001
+        return jsonify(status="error", error=str(exc)), 503
+    return jsonify(status="ok", **status)
+
+
+@app.route("/opords/<path:operation>/revisions", methods=["GET"])
+def revision_history(operation):
+    """List the stored revisions of an operation's order."""
+    history = revisions.history(operation)
+    if not history:
+        return jsonify(error=f"No revisions for operation {operation!r}."), 404
+    return jsonify(operation=operation, revisions=[r.to_dict() for r in history])
+
+
+@app.route("/opords/<path:operation>/revisions/<int:version>", methods=["GET"])
+def revision_checkout(operation, version):
+    """Return one revision of an operation's order."""
+    document = revisions.checkout(operation, version)
+    if document is None:
+        return jsonify(error=f"No revision {version} of operation {operation!r}."), 404
+    return jsonify(operation=operation, version=version, opord=document)
+
+
+@app.route("/opords/<path:operation>/diff", methods=["GET"])
+def revision_diff(operation):
+    """Field-level diff between two revisions (``?from=<a>&to=<b>``)."""
+    latest = revisions.latest_version(operation)
+    to_version = request.args.get("to", latest, type=int)
+    from_version = request.args.get("from", to_version - 1, type=int)
+    changes = revisions.diff(operation, from_version, to_version)
+    if changes is None:
+        return jsonify(error="Unknown operation or version."), 404
+    return jsonify(
+        operation=operation,
+        from_version=from_version,
+        to_version=to_version,
+        changes=[c.to_dict() for c in changes],
+    )
+
+
+@app.route("/opords/<path:operation>/sections/<key>/regenerate", methods=["POST"])
+def regenerate_section(operation, key):
+    """
+    Rewrite one AI-fillable section of an operation's latest order.
+
+    Only that section's AI call is made.  The result is saved as a new
+    revision and returned as the section's HTML fragment (see
+    ``templates/_section.html``), with the new version in ``X-OPORD-Version``.
+    """
+    if not enrichment_available():
+        return jsonify(status="disabled"), 503
+    document = revisions.checkout(operation)
+    if document is None:
+        return jsonify(error=f"No revisions for operation {operation!r}."), 404
+    try:
+        text = regenerate_field(form_from_dict(document), key)
+    except KeyError:
+        return jsonify(error=f"{key!r} is not a section that can be regenerated."), 404
+    except RateLimitTimeout:
+        return jsonify(status="busy", error="The AI service is busy. Try again in a minute."), 503
+    except Exception as exc:  # noqa: BLE001
+        return jsonify(status="error", error=f"AI generation failed: {exc}"), 502
+    if not text:
+        return jsonify(status="error", error="The AI returned no text."), 502
+
+    # Apply the new text to the order as it is now, not as it was before the
+    # (slow) AI call, so a section regenerated meanwhile is not lost.
+    form = form_from_dict(revisions.checkout(operation) or document)
+    form[key] = text
+    version = _save_revision(operation, OPORDGenerator(build_opord_data(form)).generate_dict())
+
+    fragment = get_template_attribute("_section.html", "section")(key, text, operation)
+    response = make_response(fragment)
+    response.headers["X-OPORD-Version"] = str(version)
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route("/search", methods=["GET"])
+def search():
+    """Search past orders and list the ranked matches."""
+    query = request.args.get("q", "").strip()
+    results = search_index.search(query) if search_index is not None and query else []
+    return render_template(
+        "search.html",
+        query=query,
+        results=results,
+        search_enabled=search_index is not None,
+    )
+
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """JSON search over past orders (``?q=<text>&limit=<n>``)."""
+    if search_index is None:
+        return jsonify(status="disabled"), 503
+    query = request.args.get("q", "").strip()
+    limit = request.args.get("limit", 20, type=int)
+    results = search_index.search(query, limit=limit)
+    return jsonify(query=query, results=[r.to_dict() for r in results])
+
+
+def _download_response(operation: str, version: int, document: dict, fmt: str):
+    """Send *document* as a *fmt* attachment, from cache or streamed."""
+    key = content_key(document, fmt)
+    body = cached_download(key)
+    response = Response(
+        body if body is not None else stream_download(document, fmt, key),
+        mimetype=FORMATS[fmt].mimetype,
+    )
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{download_filename(operation, fmt, version)}"'
+    )
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.route("/download/<fmt>", methods=["GET"])
+def download(fmt):
+    """Download the order referenced by the session."""
+    if fmt not in FORMATS:
+        abort(404)
+    ref = session.get("opord_ref")
+    document = _session_opord()
+    if document is None:
+        flash("No OPORD found in session. Please generate one first.", "warning")
+        return redirect(url_for("index"))
+    return _download_response(ref["operation"], ref["version"], document, fmt)
+
+
+@app.route("/opords/<path:operation>/revisions/<int:version>/download/<fmt>", methods=["GET"])
+def revision_download(operation, version, fmt):
+    """Download one stored revision."""
+    if fmt not in FORMATS:
+        abort(404)
+    document = revisions.checkout(operation, version)
+    if document is None:
+        return jsonify(error=f"No revision {version} of operation {operation!r}."), 404
+    return _download_response(operation, version, document, fmt)
+
+
 @app.route("/export", methods=["POST"])
 def export():
     """Export the stored OPORD to Google Slides."""
-    opord_dict = session.get("opord_dict")
+    opord_dict = _session_opord()
     if not opord_dict:
         flash("No OPORD found in session. Please generate one first.", "warning")
         return redirect(url_for("index"))
 
+    # Google API calls are queued fairly between browser sessions.
+    user = session.setdefault("export_user", secrets.token_urlsafe(8))
     try:
-        url = export_to_slides(opord_dict)
+        url = export_to_slides(opord_dict, user=user)
+    except RateLimitTimeout:
+        flash(
+            "Google Slides is busy with other exports. Please try again in a minute.",
+            "warning",
+        )
+        return redirect(url_for("index"))
     except Exception as exc:  # noqa: BLE001
         flash(f"Export to Google Slides failed: {exc}", "danger")
         return redirect(url_for("index"))
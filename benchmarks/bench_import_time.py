@@ -0,0 +1,69 @@
+"""
+Cold-start import benchmark.
+
+Measures, in fresh interpreter processes, how long it takes to import the
+web app (worker boot) and the opord helpers (CLI use), alongside the same
+imports with the OpenAI and Google SDKs forced in — i.e. what start-up cost
+before those SDKs were imported lazily.
+
+Usage
+-----
+    python benchmarks/bench_import_time.py [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_SDKS = "import openai, googleapiclient.discovery, google_auth_oauthlib.flow"
+
+SCENARIOS = [
+    ("worker boot (import app)", "import app"),
+    ("worker boot, eager SDKs", f"import app; {HEAVY_SDKS}"),
+    ("CLI (import opord helpers)", "import opord.ai_helper, opord.slides_helper"),
+    ("CLI, eager SDKs", f"import opord.ai_helper, opord.slides_helper; {HEAVY_SDKS}"),
+]
+
+_PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(f"{elapsed * 1000:.1f} {rss}")
+"""
+
+
+def _measure(statement: str) -> tuple:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(out[0]), int(out[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="processes per scenario")
+    args = parser.parse_args()
+
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS.
+    rss_divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+    print(f"{'scenario':<30} {'median ms':>10} {'min ms':>8} {'max RSS MiB':>12}")
+    for label, statement in SCENARIOS:
+        samples = [_measure(statement) for _ in range(args.runs)]
+        times = [t for t, _ in samples]
+        rss = max(r for _, r in samples) / rss_divisor
+        print(f"{label:<30} {statistics.median(times):>10.1f} {min(times):>8.1f} {rss:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Large-input rendering benchmark.
+
+Fills every free-text field with values of increasing size and times each
+stage of a /generate request: schema validation, model building, plain-text
+and dict rendering, the HTML result page, and the AI summary.  Time per MB
+should stay roughly flat as the input grows (linear-time rendering), and the
+AI summary should stay the same size however large the input.
+
+Usage
+-----
+    python benchmarks/bench_large_input.py [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Lift the field limits so the rendering path itself is measured.
+os.environ.setdefault("OPORD_MAX_FIELD_CHARS", str(10 ** 9))
+os.environ.setdefault("OPORD_MAX_SHORT_FIELD_CHARS", str(10 ** 9))
+
+from app import app  # noqa: E402
+from opord.ai_helper import build_op_summary  # noqa: E402
+from opord.generator import OPORDGenerator  # noqa: E402
+from opord.schema import FIELDS, TASK_FIELDS, build_opord_data, validate_form  # noqa: E402
+
+
+def _form(size: int) -> dict:
+    chunk = "Grid 12ABC34567 OBJ EAGLE phase line BLUE; "
+    value = (chunk * (size // len(chunk) + 1))[:size]
+    return {spec.key: value for spec in FIELDS}
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="comma-separated characters per field")
+    args = parser.parse_args()
+
+    print(f"{'chars/field':>12} {'input MB':>9} {'validate':>9} {'build':>7} "
+          f"{'text':>7} {'dict':>7} {'html':>8} {'ms/MB':>7} {'summary':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        form = _form(size)
+        input_mb = size * len(form) / 1e6
+        cleaned, t_validate = _timed(lambda: validate_form(form)[0])
+        data, t_build = _timed(lambda: build_opord_data(cleaned))
+        generator = OPORDGenerator(data)
+        text, t_text = _timed(generator.generate_text)
+        opord, t_dict = _timed(generator.generate_dict)
+        with app.test_request_context():
+            _, t_html = _timed(lambda: app.jinja_env.get_template("result.html").render(
+                opord_text=text, opord=opord, operation=opord["operation_name"],
+                regenerate_enabled=True, task_keys=dict(TASK_FIELDS), slides_enabled=False,
+            ))
+        summary = build_op_summary(cleaned)
+        total = t_validate + t_build + t_text + t_dict + t_html
+        print(f"{size:>12} {input_mb:>9.1f} {t_validate:>9.1f} {t_build:>7.1f} "
+              f"{t_text:>7.1f} {t_dict:>7.1f} {t_html:>8.1f} {total / input_mb:>7.1f} "
+              f"{len(summary):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Prompt-prefix benchmark.
+
+Builds the section requests for one order and reports how much of each
+prompt is the prefix shared by all of them -- the part a provider-side
+prompt cache can serve after the first call.  OpenAI caches prefixes of
+1024 tokens or more, in 128-token steps; the measured share of cached
+prompt tokens is reported by ``python -m opord.telemetry``.
+
+Usage
+-----
+    python benchmarks/bench_prompt_prefix.py [--field-chars 400]
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from opord.ai_helper import (  # noqa: E402
+    AUTO_FILL_FIELDS,
+    build_op_summary,
+    build_section_request,
+    shared_prompt_prefix,
+)
+
+# Rough characters per token for English prose.
+CHARS_PER_TOKEN = 4
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--field-chars", type=int, default=400,
+                        help="length of the mission and enemy fields")
+    args = parser.parse_args()
+
+    filler = ("Seize OBJ EAGLE and block enemy withdrawal along ROUTE IRON. " * 100)
+    form = {
+        "operation_name": "IRON HAWK",
+        "mission": filler[:args.field_chars],
+        "insert_method": "HALO",
+        "dz_lz": "DZ FALCON",
+        "enemy_composition": filler[:args.field_chars],
+    }
+    requests = [
+        build_section_request(label, build_op_summary(form)) for _, label in AUTO_FILL_FIELDS
+    ]
+    shared = len(shared_prompt_prefix(requests))
+    total = sum(
+        len("\n".join(m["content"] for m in request["messages"])) for request in requests
+    )
+    print(f"{len(requests)} section requests, {total / len(requests):.0f} chars each on average")
+    print(f"shared prefix: {shared} chars (~{shared // CHARS_PER_TOKEN} tokens), "
+          f"{100.0 * shared * len(requests) / total:.0f}% of all prompt text")
+    cacheable = shared // CHARS_PER_TOKEN >= 1024
+    print(f"prefix {'is' if cacheable else 'is not'} long enough for OpenAI prompt caching "
+          f"(1024 tokens)")
+
+
+if __name__ == "__main__":
+    main()
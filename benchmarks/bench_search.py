@@ -0,0 +1,83 @@
+"""
+Full-text search benchmark.
+
+Indexes a synthetic archive of orders and times typical planner queries
+against it.  Query latency should stay in the low milliseconds at tens of
+thousands of orders.
+
+Usage
+-----
+    python benchmarks/bench_search.py [--orders 20000] [--db PATH]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from opord.generator import OPORDData, OPORDGenerator  # noqa: E402
+from opord.search import SearchIndex  # noqa: E402
+
+INSERTS = ["HALO", "HAHO", "Static Line", "Air Assault", "Ground"]
+OBJECTIVES = ["EAGLE", "FALCON", "CONDOR", "HAWK", "RAVEN", "OSPREY", "KESTREL", "VULTURE"]
+ENEMIES = ["mechanized infantry platoon", "dismounted squad", "motorized rifle company",
+           "insurgent cell", "armored section", "air defense team"]
+TASKS = ["Seize", "Clear", "Destroy", "Secure", "Raid", "Block", "Defend"]
+
+QUERIES = [
+    "HALO DZ EAGLE mechanized",
+    "air assault LZ falcon",
+    "raid condor insurgent",
+    "static line",
+    "kestr",
+]
+
+
+def _order(rng: random.Random, i: int) -> dict:
+    objective = rng.choice(OBJECTIVES)
+    insert = rng.choice(INSERTS)
+    data = OPORDData(
+        operation_name=f"OP {i:05d}",
+        mission=f"C Co {rng.choice(TASKS)}s OBJ {objective} NLT H+{rng.randint(1, 12)}.",
+        insert_method=insert,
+        dz_lz=f"{'LZ' if insert == 'Air Assault' else 'DZ'} {rng.choice(OBJECTIVES)}",
+    )
+    data.situation.enemy.composition = rng.choice(ENEMIES)
+    data.execution.concept_of_operations = (
+        f"Phase I insert by {insert}; Phase II assault OBJ {objective}; Phase III consolidate."
+    )
+    return OPORDGenerator(data).generate_dict()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--db", help="database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "opord.db")
+    index = SearchIndex(path)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for i in range(len(index), args.orders):
+        index.add(f"OP {i:05d}", 1, _order(rng, i))
+    print(f"indexed {args.orders} orders in {time.perf_counter() - start:.1f}s ({path})")
+
+    print(f"{'query':<28} {'hits':>5} {'ms (median of 20)':>18}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            results = index.search(query)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(f"{query:<28} {len(results):>5} {timings[len(timings) // 2]:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration for Charlie OPORD Wizard.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Requests spend most of their time waiting on OpenAI and Google APIs, so a
+few processes with many threads each (``gthread``) give far more
+concurrency than one synchronous worker per core.  Every setting can be
+overridden with the matching ``GUNICORN_*`` environment variable.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Load the app in the master before forking: workers start faster and share
+# the imported SDKs and compiled templates copy-on-write.
+preload_app = True
+
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", min(multiprocessing.cpu_count() + 1, 4)))
+# Live shared-draft streams (opord.collab) each hold a thread for minutes,
+# so they get threads of their own on top of those for ordinary requests.
+# The app reads the same variable to refuse streams beyond that.
+live_streams = int(os.environ.setdefault("OPORD_MAX_LIVE_STREAMS", "32"))
+threads = int(os.environ.get("GUNICORN_THREADS", 16)) + live_streams
+
+# AI enrichment and Slides export can legitimately take tens of seconds.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth; jitter avoids all
+# workers restarting at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """Build per-process clients before the worker accepts traffic."""
+    from app import warm_up
+
+    warm_up()
@@ -6,16 +6,28 @@ brief user-supplied prompts using a context-aware system prompt
 scoped to Charlie Company, 1-7 CAV (Airborne / Air Assault).
 """
 
+import hashlib
+import importlib.util
+import json
 import os
-from typing import Optional
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
-try:
+# The OpenAI SDK takes a large share of app start-up time and memory, so it
+# is only located here and imported on first use (see get_client()).
+_openai_available = importlib.util.find_spec("openai") is not None
+
+if TYPE_CHECKING:  # pragma: no cover
     from openai import OpenAI
-    _openai_available = True
-except ImportError:  # pragma: no cover
-    _openai_available = False
 
 from .generator import UNIT_NAME, UNIT_TYPE, HIGHER_HQ
+from .local_generator import draft_section, draft_sections, draft_tasks
+from .rate_limit import TokenBucketLimiter, limiter_from_env
+from .schema import FIELD_LIMITS, TASK_FIELDS, clip_to_limit, task_key
+from .singleflight import SingleFlight, request_fingerprint
+from .telemetry import AICall, record_call, usage_counts
 
 _SYSTEM_PROMPT = f"""You are a U.S. Army operations order (OPORD) writing assistant for
 {UNIT_NAME}, an {UNIT_TYPE} company modeled after a Parachute Infantry Regiment (PIR)
@@ -36,6 +48,83 @@ the requested content (do not repeat headings already provided by the caller).
 """
 
 
+# Form fields that feed the operational summary sent with every AI call.
+SUMMARY_FIELDS = [
+    "operation_name",
+    "mission",
+    "insert_method",
+    "dz_lz",
+    "enemy_composition",
+]
+
+# Longest text (characters) taken from any one field into the AI summary.
+MAX_SUMMARY_FIELD_CHARS = 1000
+
+# Longest example text (characters) from a similar past order put in a prompt.
+MAX_EXAMPLE_CHARS = 600
+
+# Opening of every section prompt, ahead of the order's operational notes.
+# It must not vary between sections: everything up to the end of the notes
+# is the prompt prefix the sections of one order share.
+_SECTION_PREAMBLE = (
+    f"You will be asked for one section of an OPORD for {UNIT_NAME}. "
+    "Write only the content of that section (no headings). "
+    "Keep it under 150 words.\n\n"
+    "Operational notes for this order:\n\n"
+)
+
+# Map of (form key, section label) for fields to auto-fill if blank.
+AUTO_FILL_FIELDS = [
+    ("enemy_capabilities", "Enemy Capabilities"),
+    ("enemy_most_likely_coa", "Enemy Most Likely Course of Action"),
+    ("enemy_most_dangerous_coa", "Enemy Most Dangerous Course of Action"),
+    ("commanders_intent", "Commander's Intent"),
+    ("concept_of_operations", "Concept of Operations"),
+    ("scheme_of_maneuver", "Scheme of Maneuver"),
+    ("scheme_of_fires", "Scheme of Fires"),
+    ("coordinating_instructions", "Coordinating Instructions"),
+    ("sustainment_logistics", "Logistics paragraph"),
+    ("sustainment_medical", "Medical paragraph"),
+    ("signal", "Command and Signal paragraph"),
+]
+
+# Section label for the subordinate unit tasks, which are all generated in
+# one structured (JSON) call rather than one call per unit.
+TASKS_SECTION = "Tasks to Subordinate Units"
+
+# Longest task (words) asked of the model for any one unit.
+MAX_TASK_WORDS = 40
+
+# How blank sections are filled (OPORD_AI_MODE):
+#   "ai"     -- by the model; nothing is filled without a configured client
+#   "local"  -- by opord.local_generator's rule-based drafts, with no network
+#   "hybrid" -- by the model refining a local draft, falling back to the
+#               draft when no client is configured or a call fails
+AI_MODES = ("ai", "local", "hybrid")
+
+# Identical requests issued concurrently (e.g. several users generating the
+# same shared scenario) share a single upstream call.
+_inflight = SingleFlight()
+
+# Retry policy for rate-limited or transiently failing API calls.  The
+# client's own retries are disabled so that every attempt goes through the
+# shared rate limiter.
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 60.0
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# Longest one call waits for rate-limit capacity before RateLimitTimeout is
+# raised, so a busy budget cannot hold a request past the server's timeout
+# (GUNICORN_TIMEOUT, 120 s).
+RATE_LIMIT_WAIT_SECONDS = 30.0
+
+_client: Optional["OpenAI"] = None
+_client_key: Optional[tuple] = None
+_limiter: Optional[TokenBucketLimiter] = None
+_limiter_config: Optional[tuple] = None
+
+
 def get_client() -> Optional["OpenAI"]:
     """Return an OpenAI client if credentials are available, else None."""
     if not _openai_available:
@@ -43,10 +132,239 @@ def get_client() -> Optional["OpenAI"]:
     api_key = os.environ.get("OPENAI_API_KEY", "")
     if not api_key or api_key.startswith("your_"):
         return None
-    return OpenAI(api_key=api_key)
+    # Reuse one client (and its connection pool) per process; the pid check
+    # keeps a client built before a pre-forking server forks out of workers.
+    # The SDK reads OPENAI_BASE_URL itself, e.g. for a local or proxy endpoint.
+    global _client, _client_key
+    key = (api_key, os.environ.get("OPENAI_BASE_URL"), os.getpid())
+    if _client is None or _client_key != key:
+        from openai import OpenAI
+
+        _client = OpenAI(api_key=api_key, max_retries=0)
+        _client_key = key
+    return _client
 
 
-def generate_section(section_name: str, user_notes: str, model: Optional[str] = None) -> str:
+def ai_mode() -> str:
+    """Return the configured ``OPORD_AI_MODE`` (one of ``AI_MODES``; default "ai")."""
+    mode = os.environ.get("OPORD_AI_MODE", "ai").strip().lower()
+    return mode if mode in AI_MODES else "ai"
+
+
+def enrichment_available() -> bool:
+    """Return True if blank sections can be filled (a client, or a local mode)."""
+    return ai_mode() != "ai" or get_client() is not None
+
+
+def get_rate_limiter() -> Optional[TokenBucketLimiter]:
+    """Return the process-wide OpenAI rate limiter (None if disabled)."""
+    global _limiter, _limiter_config
+    config = tuple(
+        os.environ.get(name)
+        for name in ("OPENAI_RPM", "OPENAI_TPM", "OPENAI_RATE_LIMIT_DB")
+    )
+    if config != _limiter_config:
+        _limiter = limiter_from_env()
+        _limiter_config = config
+    return _limiter
+
+
+def _estimate_tokens(request: dict) -> int:
+    """Rough upper bound on the tokens a chat request will consume."""
+    chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+    return chars // 4 + int(request.get("max_tokens") or 0)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if getattr(exc, "status_code", None) in _RETRYABLE_STATUS:
+        return True
+    if not _openai_available:
+        return False
+    from openai import APIConnectionError
+
+    return isinstance(exc, APIConnectionError)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Return the server-requested delay in seconds, if the error carries one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return float(retry_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _create_completion(client, request: dict):
+    """
+    Call the chat completions API, waiting on the shared rate limiter first
+    and retrying rate-limited or transient failures with backoff.
+
+    Raises :class:`~opord.rate_limit.RateLimitTimeout` if capacity is not
+    available within ``RATE_LIMIT_WAIT_SECONDS``.
+    """
+    limiter = get_rate_limiter()
+    estimated = _estimate_tokens(request)
+    for attempt in range(MAX_RETRIES + 1):
+        if limiter is not None:
+            limiter.acquire(estimated, timeout=RATE_LIMIT_WAIT_SECONDS)
+        try:
+            response = client.chat.completions.create(**request)
+        except Exception as exc:
+            if limiter is not None:
+                # A failed call used no tokens; a retry takes its own estimate.
+                limiter.refund(estimated)
+            if attempt == MAX_RETRIES or not _is_retryable(exc):
+                raise
+            server_delay = _retry_after(exc)
+            if server_delay is not None:
+                delay = server_delay + random.uniform(0, 0.5)
+            else:
+                delay = _backoff_delay(attempt)
+            if limiter is not None and getattr(exc, "status_code", None) == 429:
+                # Pause every worker, not just this one.
+                limiter.block_for(delay)
+            else:
+                time.sleep(delay)
+            continue
+
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if limiter is not None and isinstance(total, int):
+            limiter.refund(estimated - total)
+        return response
+
+
+def _recorded_completion(client, request: dict, section_name: str,
+                         operation: Optional[str], source: str):
+    """Run :func:`_create_completion` and record its usage and latency."""
+    call = AICall(request["model"], section_name, operation=operation, source=source)
+    started = time.perf_counter()
+    try:
+        response = _create_completion(client, request)
+    except Exception as exc:
+        call.outcome, call.error = "error", type(exc).__name__
+        raise
+    else:
+        served_by = getattr(response, "model", None)
+        if isinstance(served_by, str) and served_by:
+            call.model = served_by  # dated snapshot, e.g. gpt-4o-2024-08-06
+        call.prompt_tokens, call.cached_tokens, call.completion_tokens = usage_counts(
+            getattr(response, "usage", None)
+        )
+        return response
+    finally:
+        # Includes time spent waiting on the rate limiter and in retries.
+        call.latency_ms = (time.perf_counter() - started) * 1000
+        record_call(call)
+
+
+def _resolve_model(model: Optional[str] = None) -> str:
+    """Return *model* or the configured default model name."""
+    return model or os.environ.get("OPENAI_MODEL", "gpt-4o")
+
+
+def _clip(value: str, limit: int = MAX_SUMMARY_FIELD_CHARS) -> str:
+    """Truncate *value* to *limit* characters, marking the cut."""
+    if len(value) <= limit:
+        return value
+    return value[:limit].rstrip() + " [...]"
+
+
+def build_op_summary(form_data: dict) -> str:
+    """
+    Build the short operational summary fed as context to every AI call.
+
+    Each field is clipped so that a huge paste cannot blow the prompt past
+    the model's context window (or the token budget).
+    """
+    return (
+        f"Operation: {_clip(form_data.get('operation_name') or 'TBD')}. "
+        f"Mission: {_clip(form_data.get('mission') or 'TBD')}. "
+        f"Insert method: {_clip(form_data.get('insert_method') or 'TBD')}. "
+        f"DZ/LZ: {_clip(form_data.get('dz_lz') or 'TBD')}. "
+        f"Enemy: {_clip(form_data.get('enemy_composition') or 'unknown')}."
+    )
+
+
+def summary_key(op_summary: str, model: Optional[str] = None) -> str:
+    """Return a stable cache key for AI output derived from *op_summary*."""
+    digest = hashlib.sha256()
+    digest.update(_resolve_model(model).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(op_summary.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def shared_prompt_prefix(requests: List[dict]) -> str:
+    """
+    Return the prompt text (all messages, in order) that *requests* share
+    from the start -- the part a provider-side prompt cache can reuse.
+    """
+    return os.path.commonprefix([
+        "\n".join(message["content"] for message in request["messages"])
+        for request in requests
+    ])
+
+
+def build_section_request(section_name: str, user_notes: str, model: Optional[str] = None,
+                          example: Optional[str] = None, draft: Optional[str] = None) -> dict:
+    """
+    Return the chat-completion request body for one OPORD section.
+
+    Shared by the interactive path (:func:`generate_section`) and the batch
+    path (:mod:`opord.batch`) so both send identical prompts.
+
+    The static instructions and *user_notes* come first and the
+    section-specific text last, so every section request for one order
+    starts with the same bytes and the provider can serve that prefix from
+    its prompt cache (see :func:`shared_prompt_prefix`).
+    """
+    user_message = _SECTION_PREAMBLE + user_notes + "\n\n"
+    if example:
+        user_message += (
+            f"A similar past order used this text for the '{section_name}' section; "
+            f"adapt it to this operation:\n\n{_clip(example, MAX_EXAMPLE_CHARS)}\n\n"
+        )
+    if draft:
+        user_message += (
+            f"A first draft of the '{section_name}' section follows; correct and "
+            f"improve it for this operation, keeping what is right:\n\n{draft}\n\n"
+        )
+    user_message += f"Generate the '{section_name}' section."
+    return {
+        "model": _resolve_model(model),
+        "messages": [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": user_message},
+        ],
+        "temperature": 0.4,
+        "max_tokens": 300,
+    }
+
+
+def generate_section(section_name: str, user_notes: str, model: Optional[str] = None,
+                     example: Optional[str] = None, draft: Optional[str] = None,
+                     operation: Optional[str] = None, source: str = "interactive",
+                     client=None) -> str:
     """
     Generate OPORD section text using the OpenAI API.
 
@@ -59,6 +377,19 @@ def generate_section(section_name: str, user_notes: str, model: Optional[str] =
         Brief notes or keywords provided by the user describing the operation.
     model : str, optional
         OpenAI model name; defaults to the OPENAI_MODEL env var or "gpt-4o".
+    example : str, optional
+        The same section from a similar past order, given to the model as a
+        one-shot example.
+    draft : str, optional
+        A first draft of the section (see :mod:`opord.local_generator`) for
+        the model to refine.
+    operation : str, optional
+        Operation name the call is recorded against in telemetry.
+    source : str
+        What made the call, for telemetry: ``"interactive"``, ``"prefetch"``
+        or ``"regenerate"``.
+    client : optional
+        OpenAI-compatible client to use instead of :func:`get_client`.
 
     Returns
     -------
@@ -66,35 +397,170 @@ def generate_section(section_name: str, user_notes: str, model: Optional[str] =
         AI-generated text for the requested section, or an empty string if the
         OpenAI client is not configured.
     """
-    client = get_client()
+    client = client or get_client()
     if client is None:
         return ""
 
-    model = model or os.environ.get("OPENAI_MODEL", "gpt-4o")
-
-    user_message = (
-        f"Generate the '{section_name}' section of an OPORD for {UNIT_NAME}. "
-        f"Use the following operational notes as context:\n\n{user_notes}\n\n"
-        "Write only the content of that section (no headings). "
-        "Keep it under 150 words."
+    request = build_section_request(
+        section_name, user_notes, model=model, example=example, draft=draft
     )
+    response = _inflight.do(
+        request_fingerprint(request),
+        lambda: _recorded_completion(client, request, section_name, operation, source),
+    )
+    return response.choices[0].message.content.strip()
+
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
+def build_tasks_request(user_notes: str, units: List[str], model: Optional[str] = None,
+                        scheme_of_maneuver: Optional[str] = None,
+                        assigned: Optional[Dict[str, str]] = None,
+                        drafts: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Return the chat-completion request body for the tasks of *units*.
+
+    The model answers with one JSON object mapping each unit to its task
+    (enforced with a strict JSON schema), so every platoon and HQ task comes
+    from a single call.  The prompt starts with the same prefix as the
+    section requests (see :func:`build_section_request`).
+    """
+    user_message = _SECTION_PREAMBLE + user_notes + "\n\n"
+    if scheme_of_maneuver:
+        user_message += (
+            "The scheme of maneuver for this order is below; every task must be "
+            f"consistent with it:\n\n{_clip(scheme_of_maneuver)}\n\n"
+        )
+    if assigned:
+        user_message += "Tasks already assigned:\n" + "".join(
+            f"- {unit}: {task}\n" for unit, task in assigned.items()
+        ) + "\n"
+    if drafts:
+        user_message += (
+            "First drafts of the tasks follow; correct and improve them for this "
+            "operation, keeping what is right:\n"
+        ) + "".join(f"- {unit}: {task}\n" for unit, task in drafts.items()) + "\n"
+    max_chars = min(FIELD_LIMITS[task_key(unit)] for unit in units)
+    user_message += (
+        "Answer with a JSON object that has one key per unit below, each value "
+        f"being that unit's task in one or two sentences (under {MAX_TASK_WORDS} "
+        f"words and {max_chars} characters):\n" + "".join(f"- {unit}\n" for unit in units) + "\n"
+        f"Generate the '{TASKS_SECTION}' section."
+    )
+    return {
+        "model": _resolve_model(model),
+        "messages": [
             {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": user_message},
         ],
-        temperature=0.4,
-        max_tokens=300,
+        "temperature": 0.4,
+        "max_tokens": 120 * len(units),
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "subordinate_tasks",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        unit: {"type": "string", "maxLength": FIELD_LIMITS[task_key(unit)]}
+                        for unit in units
+                    },
+                    "required": list(units),
+                    "additionalProperties": False,
+                },
+            },
+        },
+    }
+
+
+def parse_tasks(text: str, units: List[str]) -> Dict[str, str]:
+    """
+    Return the non-empty tasks for *units* found in the model's JSON answer.
+
+    Unit names are matched case-insensitively; anything that is not a JSON
+    object, unknown units and non-text values are ignored.  A task longer
+    than its form field allows is clipped to fit.
+    """
+    try:
+        answer = json.loads(text)
+    except ValueError:
+        return {}
+    if not isinstance(answer, dict):
+        return {}
+    by_name = {unit.casefold(): unit for unit in units}
+    tasks = {}
+    for name, task in answer.items():
+        unit = by_name.get(str(name).strip().casefold())
+        if unit and isinstance(task, str) and task.strip():
+            tasks[unit] = clip_to_limit(task_key(unit), task)
+    return tasks
+
+
+def generate_subordinate_tasks(user_notes: str, units: List[str], model: Optional[str] = None,
+                               scheme_of_maneuver: Optional[str] = None,
+                               assigned: Optional[Dict[str, str]] = None,
+                               drafts: Optional[Dict[str, str]] = None,
+                               operation: Optional[str] = None,
+                               source: str = "interactive", client=None) -> Dict[str, str]:
+    """
+    Generate the tasks of several subordinate units in one API call.
+
+    Parameters
+    ----------
+    user_notes : str
+        Operational summary (see :func:`build_op_summary`).
+    units : list of str
+        Units (from ``SUBORDINATE_UNITS``) that need a task.
+    model : str, optional
+        OpenAI model name.
+    scheme_of_maneuver : str, optional
+        The order's scheme of maneuver, which the tasks must agree with.
+    assigned : dict, optional
+        Tasks the user already gave other units, keyed by unit.
+    drafts : dict, optional
+        First drafts of the tasks (see :func:`opord.local_generator.draft_tasks`)
+        for the model to refine, keyed by unit.
+    operation : str, optional
+        Operation name the call is recorded against in telemetry.
+    source : str
+        What made the call, for telemetry.
+    client : optional
+        OpenAI-compatible client to use instead of :func:`get_client`.
+
+    Returns
+    -------
+    dict
+        Task text keyed by unit; units the model gave no usable task for are
+        left out, and the result is empty if the client is not configured.
+    """
+    client = client or get_client()
+    if client is None or not units:
+        return {}
+
+    request = build_tasks_request(
+        user_notes, units, model=model, scheme_of_maneuver=scheme_of_maneuver,
+        assigned=assigned, drafts=drafts,
     )
-    return response.choices[0].message.content.strip()
+    response = _inflight.do(
+        request_fingerprint(request),
+        lambda: _recorded_completion(client, request, TASKS_SECTION, operation, source),
+    )
+    return parse_tasks(response.choices[0].message.content or "", units)
 
 
-def generate_full_opord(form_data: dict, model: Optional[str] = None) -> dict:
+def generate_full_opord(form_data: dict, model: Optional[str] = None,
+                        prefilled: Optional[dict] = None,
+                        examples: Optional[dict] = None, mode: Optional[str] = None,
+                        client=None, source: str = "interactive",
+                        on_generated: Optional[Callable[[Dict[str, str]], None]] = None) -> dict:
     """
     Given a dictionary of raw user inputs, call the AI for each OPORD
     paragraph that is missing or sparse, and return an enriched dictionary.
+    Blank subordinate unit tasks are filled by one further call, which also
+    sees the (possibly generated) scheme of maneuver.
+
+    In ``"local"`` mode the blank paragraphs get rule-based drafts instead,
+    and in ``"hybrid"`` mode the model refines those drafts; if it is not
+    configured, or a call fails, the remaining paragraphs keep the drafts.
 
     Parameters
     ----------
@@ -102,43 +568,146 @@ def generate_full_opord(form_data: dict, model: Optional[str] = None) -> dict:
         Dictionary of user-submitted form fields (may be partially filled).
     model : str, optional
         OpenAI model name.
+    prefilled : dict, optional
+        Section and task text already generated for this operational
+        summary (for example by the suggestion prefetcher), keyed by form
+        field.  Blank fields found here are filled without another API
+        call.  Ignored in ``"local"`` mode, which never uses model output.
+    examples : dict, optional
+        Section text from a similar past order, keyed by form field, passed
+        to the model as an example for the fields it still has to write.
+    mode : str, optional
+        One of ``AI_MODES``; defaults to ``OPORD_AI_MODE``.
+    client : optional
+        OpenAI-compatible client to use instead of :func:`get_client`.
+    source : str
+        What made the calls, for telemetry.
+    on_generated : callable, optional
+        Called with ``{form field: text}`` as soon as the model writes a
+        section or the tasks (drafts and prefilled text are not reported).
 
     Returns
     -------
     dict
         Copy of form_data with AI-generated values inserted for blank fields.
     """
-    client = get_client()
-    if client is None:
+    mode = mode or ai_mode()
+    client = None if mode == "local" else client or get_client()
+    if client is None and mode == "ai":
         return form_data
 
     result = dict(form_data)
+    prefilled = (prefilled or {}) if mode != "local" else {}
+    examples = examples or {}
+    blank = [(key, label) for key, label in AUTO_FILL_FIELDS if not result.get(key)]
+    drafts = draft_sections(form_data, [key for key, _ in blank]) if mode != "ai" else {}
     # Build a short operational summary to feed as context for every call.
-    op_summary = (
-        f"Operation: {form_data.get('operation_name', 'TBD')}. "
-        f"Mission: {form_data.get('mission', 'TBD')}. "
-        f"Insert method: {form_data.get('insert_method', 'TBD')}. "
-        f"DZ/LZ: {form_data.get('dz_lz', 'TBD')}. "
-        f"Enemy: {form_data.get('enemy_composition', 'unknown')}."
-    )
+    op_summary = build_op_summary(form_data)
+
+    for key, label in blank:
+        if prefilled.get(key):
+            result[key] = prefilled[key]
+            continue
+        if client is None:
+            result[key] = drafts[key]
+            continue
+        try:
+            result[key] = generate_section(
+                label, op_summary, model=model, example=examples.get(key),
+                draft=drafts.get(key), operation=form_data.get("operation_name"),
+                source=source, client=client,
+            )
+            if result[key] and on_generated is not None:
+                on_generated({key: result[key]})
+        except Exception:
+            if mode != "hybrid":
+                raise
+            # Do not wait on a failing model for every remaining paragraph.
+            client = None
+        if not result.get(key) and key in drafts:
+            result[key] = drafts[key]
 
-    # Map of (result key, section label) for fields to auto-fill if blank.
-    auto_fill_fields = [
-        ("enemy_capabilities", "Enemy Capabilities"),
-        ("enemy_most_likely_coa", "Enemy Most Likely Course of Action"),
-        ("enemy_most_dangerous_coa", "Enemy Most Dangerous Course of Action"),
-        ("commanders_intent", "Commander's Intent"),
-        ("concept_of_operations", "Concept of Operations"),
-        ("scheme_of_maneuver", "Scheme of Maneuver"),
-        ("scheme_of_fires", "Scheme of Fires"),
-        ("coordinating_instructions", "Coordinating Instructions"),
-        ("sustainment_logistics", "Logistics paragraph"),
-        ("sustainment_medical", "Medical paragraph"),
-        ("signal", "Command and Signal paragraph"),
-    ]
-
-    for key, label in auto_fill_fields:
-        if not result.get(key):
-            result[key] = generate_section(label, op_summary, model=model)
+    # Blank subordinate tasks: one call for all of them, made after the
+    # scheme of maneuver they must agree with is settled.
+    for _, key in TASK_FIELDS:
+        if not result.get(key) and prefilled.get(key):
+            result[key] = prefilled[key]
+    open_units = [unit for unit, key in TASK_FIELDS if not result.get(key)]
+    task_drafts = draft_tasks(form_data) if mode != "ai" and open_units else {}
+    tasks = {}
+    if open_units and client is not None:
+        try:
+            tasks = generate_subordinate_tasks(
+                op_summary, open_units, model=model,
+                scheme_of_maneuver=result.get("scheme_of_maneuver"),
+                assigned={unit: result[key] for unit, key in TASK_FIELDS if result.get(key)},
+                drafts={unit: task_drafts[unit] for unit in open_units if unit in task_drafts},
+                operation=form_data.get("operation_name"), source=source, client=client,
+            )
+            if tasks and on_generated is not None:
+                on_generated({key: tasks[unit] for unit, key in TASK_FIELDS if tasks.get(unit)})
+        except Exception:
+            if mode != "hybrid":
+                raise
+    for unit, key in TASK_FIELDS:
+        if unit in open_units and (tasks.get(unit) or task_drafts.get(unit)):
+            result[key] = tasks.get(unit) or task_drafts[unit]
 
     return result
+
+
+def regenerate_field(form_data: dict, key: str, model: Optional[str] = None,
+                     mode: Optional[str] = None, client=None) -> str:
+    """
+    Write new text for one AI-fillable field of an existing order.
+
+    Only that field's call is made: a section from ``AUTO_FILL_FIELDS``
+    gets a :func:`generate_section` call, a subordinate task field a
+    one-unit :func:`generate_subordinate_tasks` call that sees the other
+    units' tasks.  Modes behave as in :func:`generate_full_opord`.
+
+    Returns
+    -------
+    str
+        The new text, or an empty string if nothing could write it (no
+        client in ``"ai"`` mode, or an empty answer).
+
+    Raises
+    ------
+    KeyError
+        If *key* is neither an auto-fill field nor a subordinate task field.
+    """
+    labels = dict(AUTO_FILL_FIELDS)
+    units = {task_field: unit for unit, task_field in TASK_FIELDS}
+    if key not in labels and key not in units:
+        raise KeyError(key)
+    mode = mode or ai_mode()
+    client = None if mode == "local" else client or get_client()
+    draft = ""
+    if mode != "ai":
+        draft = draft_tasks(form_data)[units[key]] if key in units else draft_section(key, form_data)
+    if client is None:
+        return draft
+
+    op_summary = build_op_summary(form_data)
+    operation = form_data.get("operation_name")
+    try:
+        if key in units:
+            unit = units[key]
+            tasks = generate_subordinate_tasks(
+                op_summary, [unit], model=model,
+                scheme_of_maneuver=form_data.get("scheme_of_maneuver"),
+                assigned={other: form_data[field] for other, field in TASK_FIELDS
+                          if field != key and form_data.get(field)},
+                drafts={unit: draft} if draft else None,
+                operation=operation, source="regenerate", client=client,
+            )
+            return tasks.get(unit) or draft
+        return generate_section(
+            labels[key], op_summary, model=model, draft=draft or None,
+            operation=operation, source="regenerate", client=client,
+        ) or draft
+    except Exception:
+        if mode != "hybrid":
+            raise
+        return draft
@@ -0,0 +1,533 @@
+"""
+Offline batch AI enrichment for exercise packages.
+
+Collects every blank auto-fill section across a set of orders into one
+JSONL file in the OpenAI Batch API format, submits it, polls until it
+completes and merges the generated text back into each order's form dict.
+An order's blank subordinate tasks go out as one structured request, as in
+:func:`~opord.ai_helper.generate_full_opord`.
+Batch jobs trade latency (up to 24 hours) for throughput and about half
+the per-token cost of interactive calls.
+
+A job lives in its own directory::
+
+    orders.json      cleaned input forms, keyed by order id
+    requests.jsonl   one chat-completion request per missing section, plus
+                     one per order for its missing subordinate tasks
+    state.json       backend, batch id and progress
+    results.jsonl    raw batch output, once downloaded
+    enriched/        one merged form dict per order (<order id>.json)
+
+Each step records its progress in ``state.json`` and is skipped when the
+job is run again, so an interrupted job resumes where it stopped -- it
+keeps polling the batch it already submitted rather than paying for a
+second one.
+
+``LocalBatchBackend`` runs the same JSONL file in-process, by default
+through a stand-in that makes no network calls, for tests and dry runs.
+
+Usage
+-----
+    python -m opord.batch orders/*.json --job exercise-01 [--local] [--pdf-dir DIR]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .ai_helper import (
+    AUTO_FILL_FIELDS,
+    TASKS_SECTION,
+    build_op_summary,
+    build_section_request,
+    build_tasks_request,
+    get_client,
+    parse_tasks,
+)
+from .cli import read_order_file
+from .pdf_export import render_pdf_data
+from .schema import TASK_FIELDS, build_opord_data, validate_form
+from .telemetry import AICall, record_call, usage_counts
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+
+# Batch statuses after which polling stops.
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Request key of an order's subordinate tasks (``<order id>:tasks``).
+TASKS_KEY = "tasks"
+
+
+def custom_id(order_id: str, key: str) -> str:
+    """Return the batch request id for one section of one order."""
+    return f"{order_id}:{key}"
+
+
+def _split_custom_id(request_id: str) -> Tuple[str, str]:
+    order_id, _, key = request_id.rpartition(":")
+    return order_id, key
+
+
+def load_order(path: str) -> Tuple[str, dict]:
+    """
+    Read one order from a YAML or JSON file (see
+    :func:`~opord.cli.read_order_file`).
+
+    The file holds either a flat form dict or a nested order dict as
+    produced by ``generate_dict()``.  The order id is the file name without
+    its extension.
+    """
+    return os.path.splitext(os.path.basename(path))[0], read_order_file(path)
+
+
+def load_orders(paths: Iterable[str]) -> Dict[str, dict]:
+    """
+    Read several order files, keyed by order id.
+
+    Raises
+    ------
+    OSError
+        If a file cannot be read.
+    ValueError
+        If a file is invalid, or two files have the same order id.
+    """
+    orders: Dict[str, dict] = {}
+    sources: Dict[str, str] = {}
+    for path in paths:
+        order_id, form = load_order(path)
+        if order_id in orders:
+            raise ValueError(
+                f"{path}: order id {order_id!r} is already used by {sources[order_id]}; "
+                "rename one of the files."
+            )
+        orders[order_id], sources[order_id] = form, path
+    return orders
+
+
+def build_batch_requests(orders: Dict[str, dict], model: Optional[str] = None) -> List[dict]:
+    """
+    Return one Batch API request line per blank auto-fill section, and one
+    per order with blank subordinate tasks.
+
+    Parameters
+    ----------
+    orders : dict
+        Cleaned flat form dicts keyed by order id.
+    model : str, optional
+        OpenAI model name.
+
+    Returns
+    -------
+    list of dict
+        ``{"custom_id", "method", "url", "body"}`` records, where ``body`` is
+        the same request the interactive path would send.
+    """
+    lines = []
+    for order_id, form in orders.items():
+        op_summary = build_op_summary(form)
+        for key, label in AUTO_FILL_FIELDS:
+            if not form.get(key):
+                lines.append({
+                    "custom_id": custom_id(order_id, key),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": build_section_request(label, op_summary, model=model),
+                })
+        # The scheme of maneuver may be written in the same batch, so the
+        # tasks can only follow the one the user gave.
+        open_units = [unit for unit, key in TASK_FIELDS if not form.get(key)]
+        if open_units:
+            lines.append({
+                "custom_id": custom_id(order_id, TASKS_KEY),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": build_tasks_request(
+                    op_summary, open_units, model=model,
+                    scheme_of_maneuver=form.get("scheme_of_maneuver"),
+                    assigned={unit: form[key] for unit, key in TASK_FIELDS if form.get(key)},
+                ),
+            })
+    return lines
+
+
+def parse_batch_output(lines: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Parse Batch API output lines.
+
+    Returns
+    -------
+    tuple of (dict, dict)
+        Generated text by request id, and error messages by request id.
+    """
+    texts: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        request_id = record["custom_id"]
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or body.get("error") or {}
+            errors[request_id] = (
+                error.get("message") if isinstance(error, dict) else str(error)
+            ) or f"HTTP {response.get('status_code')}"
+            continue
+        texts[request_id] = body["choices"][0]["message"]["content"].strip()
+    return texts, errors
+
+
+def record_batch_usage(lines: Iterable[str]) -> int:
+    """Record the token usage of every response in Batch API output; return the count."""
+    labels = dict(AUTO_FILL_FIELDS, **{TASKS_KEY: TASKS_SECTION})
+    count = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        order_id, key = _split_custom_id(record["custom_id"])
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        failed = bool(record.get("error")) or response.get("status_code") != 200
+        prompt, cached, completion = usage_counts(body.get("usage"))
+        record_call(AICall(
+            body.get("model") or "unknown", labels.get(key, key),
+            prompt_tokens=prompt, cached_tokens=cached, completion_tokens=completion,
+            outcome="error" if failed else "ok", operation=order_id, source="batch",
+        ))
+        count += 1
+    return count
+
+
+def merge_results(orders: Dict[str, dict], texts: Dict[str, str]) -> Dict[str, dict]:
+    """
+    Return copies of *orders* with generated text in their blank fields.
+
+    The answer to a tasks request is parsed with
+    :func:`~opord.ai_helper.parse_tasks` and fills the blank task fields.
+    """
+    enriched = {order_id: dict(form) for order_id, form in orders.items()}
+    for request_id, text in texts.items():
+        order_id, key = _split_custom_id(request_id)
+        form = enriched.get(order_id)
+        if form is None:
+            continue
+        if key == TASKS_KEY:
+            open_units = [unit for unit, task_key in TASK_FIELDS if not form.get(task_key)]
+            tasks = parse_tasks(text, open_units)
+            for unit, task_key in TASK_FIELDS:
+                if tasks.get(unit):
+                    form[task_key] = tasks[unit]
+        elif not form.get(key):
+            form[key] = text
+    return enriched
+
+
+def write_pdfs(enriched: Dict[str, dict], directory: str) -> List[str]:
+    """Render each enriched order to ``<directory>/<order id>.pdf``; return the paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for order_id, form in enriched.items():
+        cleaned, _ = validate_form(form, partial=True)
+        path = os.path.join(directory, f"{order_id}.pdf")
+        with open(path, "wb") as fh:
+            fh.write(render_pdf_data(build_opord_data(cleaned)))
+        paths.append(path)
+    return paths
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+class OpenAIBatchBackend:
+    """Submit jobs to the OpenAI Batch API."""
+
+    name = "openai"
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+        if self.client is None:
+            raise RuntimeError("OpenAI is not configured; set OPENAI_API_KEY.")
+
+    def submit(self, requests_path: str, metadata: Optional[dict] = None) -> str:
+        with open(requests_path, "rb") as fh:
+            uploaded = self.client.files.create(file=fh, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+            metadata=metadata,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def fetch(self, batch_id: str) -> str:
+        """Return the output and per-request error lines of a finished batch."""
+        batch = self.client.batches.retrieve(batch_id)
+        parts = [
+            self.client.files.content(file_id).text
+            for file_id in (batch.output_file_id, batch.error_file_id)
+            if file_id
+        ]
+        return "\n".join(parts)
+
+
+def stand_in_completion(body: dict) -> str:
+    """Return deterministic placeholder text for a request, without any API call."""
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        units = response_format["json_schema"]["schema"]["properties"]
+        return json.dumps({unit: f"[{unit}: batch stand-in task]" for unit in units})
+    match = re.search(r"the '(.+?)' section", body["messages"][-1]["content"])
+    section = match.group(1) if match else "Section"
+    return f"[{section}: batch stand-in text]"
+
+
+class LocalBatchBackend:
+    """
+    Run a batch file in-process and write Batch API-style output.
+
+    *complete* maps a request body to the generated text; the default is
+    :func:`stand_in_completion`.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str, complete: Callable[[dict], str] = stand_in_completion):
+        self.directory = directory
+        self.complete = complete
+
+    def _output_path(self, batch_id: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.output.jsonl")
+
+    def submit(self, requests_path: str, metadata: Optional[dict] = None) -> str:
+        with open(requests_path, "rb") as fh:
+            batch_id = "local-" + hashlib.sha256(fh.read()).hexdigest()[:16]
+        records = []
+        with open(requests_path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                try:
+                    text = self.complete(request["body"])
+                except Exception as exc:  # noqa: BLE001
+                    records.append({
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"message": str(exc)},
+                    })
+                    continue
+                records.append({
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": text}}]},
+                    },
+                    "error": None,
+                })
+        os.makedirs(self.directory, exist_ok=True)
+        _write_atomic(
+            self._output_path(batch_id),
+            "".join(json.dumps(record) + "\n" for record in records),
+        )
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed" if os.path.exists(self._output_path(batch_id)) else "failed"
+
+    def fetch(self, batch_id: str) -> str:
+        with open(self._output_path(batch_id), encoding="utf-8") as fh:
+            return fh.read()
+
+
+class BatchJob:
+    """A resumable batch enrichment job stored in *directory*."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.state = self._load_state()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self._path("state.json"), encoding="utf-8") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, **changes) -> None:
+        self.state.update(changes)
+        _write_atomic(self._path("state.json"), json.dumps(self.state, indent=2))
+
+    def _load_orders(self) -> Dict[str, dict]:
+        with open(self._path("orders.json"), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def prepare(self, orders: Dict[str, dict], model: Optional[str] = None) -> int:
+        """
+        Validate *orders* and write the request file; return the request count.
+
+        A job that is already prepared keeps its original orders and requests.
+        """
+        if self.state.get("prepared"):
+            return self.state["requests"]
+        cleaned = {}
+        for order_id, form in orders.items():
+            cleaned[order_id], errors = validate_form(form, partial=True)
+            if errors:
+                raise ValueError(f"{order_id}: " + " ".join(e.message for e in errors))
+        lines = build_batch_requests(cleaned, model=model)
+        _write_atomic(self._path("orders.json"), json.dumps(cleaned, indent=2))
+        _write_atomic(
+            self._path("requests.jsonl"),
+            "".join(json.dumps(line) + "\n" for line in lines),
+        )
+        self._save_state(prepared=True, orders=len(cleaned), requests=len(lines))
+        return len(lines)
+
+    def submit(self, backend) -> Optional[str]:
+        """Submit the request file unless already submitted; return the batch id."""
+        if self.state.get("batch_id"):
+            return self.state["batch_id"]
+        if not self.state.get("requests"):
+            return None
+        batch_id = backend.submit(
+            self._path("requests.jsonl"),
+            metadata={"job": os.path.basename(os.path.abspath(self.directory))},
+        )
+        self._save_state(
+            backend=backend.name, batch_id=batch_id, status="submitted", submitted=time.time()
+        )
+        return batch_id
+
+    def wait(self, backend, poll_interval: float = 30.0, timeout: Optional[float] = None,
+             sleep: Callable[[float], None] = time.sleep) -> str:
+        """
+        Poll the submitted batch until it finishes or *timeout* seconds pass.
+
+        Returns the last status seen.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = backend.status(self.state["batch_id"])
+            if status != self.state.get("status"):
+                self._save_state(status=status)
+            if status in TERMINAL_STATUSES:
+                return status
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                return status
+            sleep(poll_interval)
+
+    def collect(self, backend) -> Dict[str, dict]:
+        """
+        Download the batch output (once) and merge it into the orders.
+
+        Writes ``enriched/<order id>.json`` for every order and records the
+        ids of failed requests in the job state.
+        """
+        texts: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        if self.state.get("batch_id"):
+            results_path = self._path("results.jsonl")
+            if not os.path.exists(results_path):
+                output = backend.fetch(self.state["batch_id"])
+                _write_atomic(results_path, output)
+                if backend.name != "local":  # the local backend makes no API calls
+                    record_batch_usage(output.splitlines())
+            with open(results_path, encoding="utf-8") as fh:
+                texts, errors = parse_batch_output(fh)
+        enriched = merge_results(self._load_orders(), texts)
+        enriched_dir = self._path("enriched")
+        os.makedirs(enriched_dir, exist_ok=True)
+        for order_id, form in enriched.items():
+            _write_atomic(os.path.join(enriched_dir, f"{order_id}.json"), json.dumps(form, indent=2))
+        self._save_state(merged=True, failed=errors)
+        return enriched
+
+    def run(self, orders: Dict[str, dict], backend, model: Optional[str] = None,
+            poll_interval: float = 30.0, timeout: Optional[float] = None) -> Optional[Dict[str, dict]]:
+        """
+        Prepare, submit, wait for and collect the job, resuming earlier progress.
+
+        Returns the enriched orders, or None if the batch is still running
+        when *timeout* expires (run again later to resume).
+
+        Raises
+        ------
+        RuntimeError
+            If the batch failed as a whole.  The batch id is cleared so the
+            next run submits the request file again.
+        """
+        self.prepare(orders, model=model)
+        if self.submit(backend) is not None:
+            status = self.wait(backend, poll_interval=poll_interval, timeout=timeout)
+            if status == "failed":
+                failed_id = self.state["batch_id"]
+                self._save_state(batch_id=None, status=None)
+                raise RuntimeError(f"Batch {failed_id} failed; run again to resubmit.")
+            if status not in TERMINAL_STATUSES:
+                return None
+        return self.collect(backend)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m opord.batch",
+        description="Enrich a set of orders with one offline AI batch job.",
+    )
+    parser.add_argument("orders", nargs="+", help="order YAML/JSON files (flat form or generate_dict)")
+    parser.add_argument("--job", required=True, help="job directory (created if missing)")
+    parser.add_argument("--model", help="OpenAI model (default: OPENAI_MODEL or gpt-4o)")
+    parser.add_argument("--local", action="store_true",
+                        help="run in-process with stand-in text instead of the Batch API")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="seconds between polls")
+    parser.add_argument("--timeout", type=float,
+                        help="stop polling after this many seconds (rerun to resume)")
+    parser.add_argument("--pdf-dir", help="also write each enriched order as a PDF here")
+    args = parser.parse_args(argv)
+
+    try:
+        orders = load_orders(args.orders)
+        job = BatchJob(args.job)
+        backend = (LocalBatchBackend(job._path("local")) if args.local
+                   else OpenAIBatchBackend())
+        requests = job.prepare(orders, model=args.model)
+        print(f"{job.state['orders']} order(s), {requests} section request(s)")
+        enriched = job.run(orders, backend, model=args.model,
+                           poll_interval=args.poll_interval, timeout=args.timeout)
+    except (OSError, RuntimeError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    if enriched is None:
+        print(f"Batch {job.state['batch_id']} is still {job.state['status']}; "
+              "run the same command again to resume.")
+        return 2
+    failed = job.state.get("failed") or {}
+    print(f"Merged {requests - len(failed)} section(s) into {len(enriched)} order(s) "
+          f"in {os.path.join(args.job, 'enriched')}")
+    for request_id, message in sorted(failed.items()):
+        print(f"  failed {request_id}: {message}", file=sys.stderr)
+    if args.pdf_dir:
+        print(f"Wrote {len(write_pdfs(enriched, args.pdf_dir))} PDF(s) to {args.pdf_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Bulk export of an exercise package to Google Slides.
+
+Exporting 20-50 orders one :func:`~opord.slides_helper.export_to_slides`
+call at a time costs several sequential round trips per order.  The bulk
+exporter puts every presentation in one new Drive folder and cuts the
+round trips to a handful for the whole package:
+
+1. One call creates the folder.
+2. One Drive batch HTTP request copies the template into the folder once
+   per order, or creates a blank presentation there per order.
+3. For blank presentations, one Slides batch HTTP request reads each
+   default first slide.
+4. The ``batchUpdate`` calls that fill the presentations run concurrently,
+   each worker thread with its own Slides service (``googleapiclient``
+   services are not thread-safe).
+
+Every call goes through the quota-aware schedulers of
+:mod:`opord.slides_scheduler`, so a bulk export runs at the quota ceiling.
+The command builds its own schedulers, but their token buckets live in the
+same SQLite file as the web app's (``GOOGLE_RATE_LIMIT_DB``), so the quota
+budget is shared with exports from the web app on the same host.  Round-robin
+fairness between users only applies within one process: a bulk export
+competes with the web app's exports for quota, not for turns.  An order that
+fails is reported without stopping the others.
+
+Usage
+-----
+    python -m opord.bulk_export orders/*.json --folder "EX IRON HAWK 25"
+"""
+
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from .cli import load_order_file
+from .generator import OPORDGenerator
+from .slides_helper import (
+    blank_deck_requests,
+    get_credentials,
+    presentation_title,
+    presentation_url,
+    template_requests,
+)
+from .slides_scheduler import QuotaScheduler, get_scheduler, scheduler_from_env
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+PRESENTATION_MIME = "application/vnd.google-apps.presentation"
+
+# Concurrent batchUpdate calls; the Slides write quota paces them anyway.
+DEFAULT_WORKERS = 8
+
+# Only the parts of a presentation needed to fill its first slide.
+_FIRST_SLIDE_FIELDS = "slides(objectId,pageElements(objectId,shape(placeholder(type))))"
+
+_APIS = ("drive", "slides", "slides_read")
+
+
+@dataclass
+class BulkExport:
+    """The folder of a bulk export and the outcome of each order."""
+    folder_id: str
+    urls: List[Optional[str]] = field(default_factory=list)
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def folder_url(self) -> str:
+        return f"https://drive.google.com/drive/folders/{self.folder_id}"
+
+
+def _google_services(creds) -> Callable[[str], Any]:
+    from googleapiclient.discovery import build
+
+    versions = {"drive": "v3", "slides": "v1"}
+    return lambda name: build(name, versions[name], credentials=creds)
+
+
+def bulk_export_to_slides(orders: Sequence[dict], folder_name: str, user: str = "",
+                          max_workers: int = DEFAULT_WORKERS,
+                          schedulers: Optional[Mapping[str, QuotaScheduler]] = None,
+                          services: Optional[Callable[[str], Any]] = None
+                          ) -> Optional[BulkExport]:
+    """
+    Export several orders as presentations in one new Drive folder.
+
+    Parameters
+    ----------
+    orders : sequence of dict
+        Outputs of ``OPORDGenerator.generate_dict()``.
+    folder_name : str
+        Name of the Drive folder to create.
+    user : str
+        Who is exporting; API calls are queued fairly between users.
+    max_workers : int
+        Concurrent ``batchUpdate`` calls.
+    schedulers : Mapping, optional
+        Schedulers for "drive", "slides" and "slides_read" (default: the
+        process-wide ones).
+    services : callable, optional
+        Builds a new ``googleapiclient`` service given "drive" or "slides"
+        (default: from the configured Google credentials).
+
+    Returns
+    -------
+    BulkExport or None
+        The folder and per-order URLs and errors (in the order of
+        *orders*), or None if export is unavailable.
+    """
+    if services is None:
+        creds = get_credentials()
+        if creds is None:
+            return None
+        services = _google_services(creds)
+    schedulers = schedulers or {api: get_scheduler(api) for api in _APIS}
+    drive_scheduler = schedulers["drive"]
+    drive = services("drive")
+    slides = services("slides")
+
+    folder = drive_scheduler.execute(
+        drive.files().create(body={"name": folder_name, "mimeType": FOLDER_MIME}, fields="id"),
+        user,
+    )
+    result = BulkExport(folder["id"], [None] * len(orders))
+
+    # Stage 1: every presentation file, in one Drive batch request.
+    template_id = os.environ.get("GOOGLE_SLIDES_TEMPLATE_ID", "")
+    files = {}
+    for index, order in enumerate(orders):
+        body = {"name": presentation_title(order), "parents": [result.folder_id]}
+        if template_id:
+            files[str(index)] = drive.files().copy(fileId=template_id, body=body, fields="id")
+        else:
+            body["mimeType"] = PRESENTATION_MIME
+            files[str(index)] = drive.files().create(body=body, fields="id")
+    presentation_ids = {}
+    for request_id, outcome in drive_scheduler.execute_batch(
+            drive.new_batch_http_request, files, user).items():
+        if isinstance(outcome, Exception):
+            result.errors[int(request_id)] = str(outcome)
+        else:
+            presentation_ids[int(request_id)] = outcome["id"]
+
+    # Stage 2: the requests that fill each presentation.
+    updates = {}
+    if template_id:
+        for index, presentation_id in presentation_ids.items():
+            updates[index] = template_requests(orders[index])
+    else:
+        reads = {
+            str(index): slides.presentations().get(
+                presentationId=presentation_id, fields=_FIRST_SLIDE_FIELDS
+            )
+            for index, presentation_id in presentation_ids.items()
+        }
+        for request_id, outcome in schedulers["slides_read"].execute_batch(
+                slides.new_batch_http_request, reads, user).items():
+            index = int(request_id)
+            if isinstance(outcome, Exception):
+                result.errors[index] = str(outcome)
+            else:
+                updates[index] = blank_deck_requests(orders[index], outcome["slides"][0])
+
+    # Stage 3: the batchUpdate calls, concurrently.
+    local = threading.local()
+
+    def update(index: int) -> None:
+        if not hasattr(local, "slides"):
+            local.slides = services("slides")
+        schedulers["slides"].batch_update(
+            local.slides, presentation_ids[index], updates[index], user
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {index: pool.submit(update, index) for index in sorted(updates)}
+        for index, future in futures.items():
+            try:
+                future.result()
+            except Exception as exc:
+                result.errors[index] = str(exc)
+            else:
+                result.urls[index] = presentation_url(presentation_ids[index])
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m opord.bulk_export",
+        description="Export a set of orders to Google Slides in one Drive folder.",
+    )
+    parser.add_argument("orders", nargs="+", help="order YAML/JSON files (flat form or generate_dict)")
+    parser.add_argument("--folder", required=True, help="name of the Drive folder to create")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent batchUpdate calls (default {DEFAULT_WORKERS})")
+    parser.add_argument("--wait", type=float, default=600.0,
+                        help="longest any call waits for quota, in seconds (default 600)")
+    args = parser.parse_args(argv)
+
+    try:
+        orders = [OPORDGenerator(load_order_file(path)).generate_dict() for path in args.orders]
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    # A command-line run is not bound by the web server's request timeout.
+    schedulers = {api: scheduler_from_env(api, args.wait) for api in _APIS}
+    result = bulk_export_to_slides(orders, args.folder, max_workers=args.workers,
+                                   schedulers=schedulers)
+    if result is None:
+        print("error: Google Slides export is not configured; "
+              "set GOOGLE_CREDENTIALS_FILE.", file=sys.stderr)
+        return 1
+    print(f"Folder: {result.folder_url}")
+    for path, url in zip(args.orders, result.urls):
+        if url:
+            print(f"  {path}: {url}")
+    for index, message in sorted(result.errors.items()):
+        print(f"  failed {args.orders[index]}: {message}", file=sys.stderr)
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+Command-line rendering of OPORD files.
+
+Staff who keep orders as YAML or JSON files (e.g. in a git repository) can
+render them without the web form::
+
+    python -m opord render orders/iron-hawk.yaml --out rendered/
+    python -m opord watch orders/ --out rendered/
+
+An order file holds either the flat form fields used by the web form or
+the nested structure of ``generate_dict()``.  Each order is written as
+``<name>.txt`` (plain text) and ``<name>.json`` (the order dict), plus
+``.md`` / ``.pdf`` on request.
+
+``watch`` renders the whole directory once, then re-renders only the files
+that change, and rewrites an output only when its content differs.  Within
+a changed file, the ``.txt`` and ``.md`` outputs reuse every paragraph whose
+inputs did not change; the ``.json`` and ``.pdf`` outputs are rebuilt whole
+(the PDF is laid out as one document).  It waits on OS
+file notifications through the optional ``watchdog`` package, and polls
+modification times when that is not installed.  YAML files need the
+optional ``PyYAML`` package.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import yaml
+    _yaml_available = True
+except ImportError:  # pragma: no cover
+    _yaml_available = False
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    _watchdog_available = True
+except ImportError:  # pragma: no cover
+    _watchdog_available = False
+
+from .generator import (
+    SECTION_INPUTS,
+    OPORDData,
+    OPORDGenerator,
+    join_sections,
+    markdown_section,
+)
+from .pdf_export import render_pdf_data
+from .schema import build_opord_data, normalize_form, validate_form
+
+ORDER_EXTENSIONS = {".yaml", ".yml", ".json"}
+FORMATS = ("txt", "json", "md", "pdf")
+DEFAULT_FORMATS = ("txt", "json")
+
+# Seconds to let a burst of file events (e.g. a git checkout) settle.
+DEBOUNCE_SECONDS = 0.2
+
+
+def read_order_file(path: str) -> dict:
+    """
+    Read a YAML or JSON order file into a cleaned flat form dict.
+
+    Raises
+    ------
+    OSError
+        If the file cannot be read.
+    ValueError
+        If the file cannot be parsed or a field is invalid.
+    """
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+        if not _yaml_available:
+            raise ValueError(f"{path}: PyYAML is required to read YAML orders (pip install pyyaml).")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as exc:
+            raise ValueError(f"{path}: {exc}") from exc
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"{path}: {exc}") from exc
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping of order fields")
+    cleaned, errors = validate_form(normalize_form(data), partial=True)
+    if errors:
+        raise ValueError(f"{path}: " + " ".join(error.message for error in errors))
+    return cleaned
+
+
+def load_order_file(path: str) -> OPORDData:
+    """Load a YAML or JSON order file into ``OPORDData`` (see :func:`read_order_file`)."""
+    return build_opord_data(read_order_file(path))
+
+
+def _write_if_changed(path: str, content: Union[str, bytes]) -> bool:
+    """Write *content* to *path* unless it already holds it; return True if written."""
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == data:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+@dataclass
+class _Rendered:
+    inputs: Dict[str, tuple]
+    sections: Dict[str, List[str]]
+    markdown: Dict[str, str]
+
+
+class OrderRenderer:
+    """
+    Render order files into *out_dir*, reusing the text and Markdown of
+    sections whose inputs have not changed since the file was last rendered.
+
+    Outputs mirror the file's path relative to *root* (default: its
+    directory).
+    """
+
+    def __init__(self, out_dir: str, formats: Iterable[str] = DEFAULT_FORMATS,
+                 root: Optional[str] = None):
+        self.out_dir = out_dir
+        self.formats = tuple(formats)
+        self.root = root
+        self.sections_rendered = 0
+        self._cache: Dict[str, _Rendered] = {}
+
+    def _output_base(self, path: str) -> str:
+        relative = os.path.relpath(path, self.root) if self.root else os.path.basename(path)
+        return os.path.join(self.out_dir, os.path.splitext(relative)[0])
+
+    def render(self, path: str) -> List[str]:
+        """Render one order file; return the output paths that changed."""
+        data = load_order_file(path)
+        generator = OPORDGenerator(data)
+        previous = self._cache.get(path)
+        inputs = {
+            name: tuple(getattr(data, attr) for attr in attrs)
+            for name, attrs in SECTION_INPUTS.items()
+        }
+        sections, markdown = {}, {}
+        for name in SECTION_INPUTS:
+            if previous is not None and previous.inputs[name] == inputs[name]:
+                sections[name] = previous.sections[name]
+                markdown[name] = previous.markdown[name]
+            else:
+                sections[name] = generator.render_section(name)
+                markdown[name] = (markdown_section(name, sections[name])
+                                  if "md" in self.formats else "")
+                self.sections_rendered += 1
+        self._cache[path] = _Rendered(inputs, sections, markdown)
+
+        renderers: Dict[str, Callable[[], Union[str, bytes]]] = {
+            "txt": lambda: join_sections(sections.items()) + "\n",
+            "json": lambda: json.dumps(generator.generate_dict(), indent=2, ensure_ascii=False) + "\n",
+            "md": lambda: "".join(markdown.values()),
+            "pdf": lambda: render_pdf_data(data),
+        }
+        base = self._output_base(path)
+        return [
+            f"{base}.{fmt}" for fmt in self.formats
+            if _write_if_changed(f"{base}.{fmt}", renderers[fmt]())
+        ]
+
+    def forget(self, path: str) -> None:
+        """Drop a deleted order file and its outputs."""
+        self._cache.pop(path, None)
+        base = self._output_base(path)
+        for fmt in self.formats:
+            try:
+                os.remove(f"{base}.{fmt}")
+            except FileNotFoundError:
+                pass
+
+
+def _is_order_file(path: str, exclude: str) -> bool:
+    name = os.path.basename(path)
+    return (
+        os.path.splitext(name)[1].lower() in ORDER_EXTENSIONS
+        and not name.startswith(".")
+        and not os.path.abspath(path).startswith(exclude + os.sep)
+    )
+
+
+def order_files(directory: str, exclude: str) -> List[str]:
+    """Return the order files under *directory*, skipping *exclude* and hidden dirs."""
+    paths = []
+    for current, dirs, files in os.walk(directory):
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith(".") and os.path.abspath(os.path.join(current, d)) != exclude
+        ]
+        paths += [
+            os.path.join(current, name) for name in sorted(files)
+            if _is_order_file(os.path.join(current, name), exclude)
+        ]
+    return paths
+
+
+class Watcher:
+    """Keep the rendered outputs of a directory of order files current."""
+
+    def __init__(self, directory: str, renderer: OrderRenderer,
+                 log: Callable[[str], None] = print):
+        self.directory = directory
+        self.renderer = renderer
+        self.log = log
+        self._exclude = os.path.abspath(renderer.out_dir)
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+
+    def _signature(self, path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def handle(self, paths: Iterable[str]) -> None:
+        """Re-render changed files and drop the outputs of deleted ones."""
+        for path in sorted(set(paths)):
+            signature = self._signature(path)
+            if signature is None:
+                if self._signatures.pop(path, None) is not None:
+                    self.renderer.forget(path)
+                    self.log(f"removed {path}")
+                continue
+            if self._signatures.get(path) == signature:
+                continue  # touched or duplicate event, content unchanged
+            self._signatures[path] = signature
+            before = self.renderer.sections_rendered
+            try:
+                written = self.renderer.render(path)
+            except (OSError, ValueError) as exc:
+                self.log(f"error: {exc}")
+                continue
+            sections = self.renderer.sections_rendered - before
+            self.log(f"rendered {path}: {sections} section(s), {len(written)} output(s) updated")
+
+    def scan(self) -> None:
+        """Render every new, changed or deleted file found by walking the directory."""
+        current = order_files(self.directory, self._exclude)
+        self.handle(list(current) + [p for p in self._signatures if p not in set(current)])
+
+    def poll(self, stop: threading.Event, interval: float = 1.0) -> None:
+        """Scan every *interval* seconds until *stop* is set."""
+        self.scan()
+        while not stop.wait(interval):
+            self.scan()
+
+    def notify(self, stop: threading.Event) -> None:
+        """Re-render on OS file notifications (needs ``watchdog``) until *stop* is set."""
+        events: "queue.Queue[str]" = queue.Queue()
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path and _is_order_file(path, watcher._exclude):
+                        events.put(os.path.normpath(path))
+
+        observer = Observer()
+        observer.schedule(_Handler(), self.directory, recursive=True)
+        observer.start()
+        try:
+            self.scan()
+            while not stop.is_set():
+                try:
+                    pending: Set[str] = {events.get(timeout=0.5)}
+                except queue.Empty:
+                    continue
+                # Collect the rest of the burst before rendering.
+                stop.wait(DEBOUNCE_SECONDS)
+                while not events.empty():
+                    pending.add(events.get_nowait())
+                self.handle(pending)
+        finally:
+            observer.stop()
+            observer.join()
+
+
+def _formats(value: str) -> Tuple[str, ...]:
+    formats = tuple(f.strip() for f in value.split(",") if f.strip())
+    unknown = set(formats) - set(FORMATS)
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"choose from {', '.join(FORMATS)} (got {value!r})"
+        )
+    return formats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m opord", description="Render OPORD YAML/JSON files."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("render", "render order files once"),
+                            ("watch", "re-render a directory of orders as files change")):
+        command = commands.add_parser(name, help=help_text)
+        if name == "render":
+            command.add_argument("paths", nargs="+", help="order files or directories")
+        else:
+            command.add_argument("directory", help="directory of order files")
+            command.add_argument("--interval", type=float, default=1.0,
+                                 help="polling interval without watchdog (seconds)")
+            command.add_argument("--poll", action="store_true",
+                                 help="poll even if watchdog is installed")
+        command.add_argument("--out", default="rendered", help="output directory")
+        command.add_argument("--format", type=_formats, default=DEFAULT_FORMATS,
+                             help=f"comma-separated formats: {', '.join(FORMATS)} "
+                                  f"(default: {','.join(DEFAULT_FORMATS)})")
+    args = parser.parse_args(argv)
+
+    if args.command == "render":
+        exclude = os.path.abspath(args.out)
+        status = 0
+        for target in args.paths:
+            is_dir = os.path.isdir(target)
+            renderer = OrderRenderer(args.out, args.format, root=target if is_dir else None)
+            for path in order_files(target, exclude) if is_dir else [target]:
+                try:
+                    written = renderer.render(path)
+                except (OSError, ValueError) as exc:
+                    print(f"error: {exc}", file=sys.stderr)
+                    status = 1
+                    continue
+                print(f"{path}: {len(written)} output(s) updated")
+        return status
+
+    renderer = OrderRenderer(args.out, args.format, root=args.directory)
+    watcher = Watcher(args.directory, renderer)
+    stop = threading.Event()
+    use_notifications = _watchdog_available and not args.poll
+    print(f"Watching {args.directory} ("
+          f"{'file notifications' if use_notifications else f'polling every {args.interval}s'}"
+          f"); press Ctrl+C to stop.")
+    try:
+        if use_notifications:
+            watcher.notify(stop)
+        else:
+            watcher.poll(stop, args.interval)
+    except KeyboardInterrupt:
+        stop.set()
+    return 0
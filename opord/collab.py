@@ -0,0 +1,186 @@
+"""
+Live collaboration on a shared draft over Server-Sent Events.
+
+Several editors (say the XO, fire support officer, first sergeant and
+commander) open the same draft from :mod:`opord.drafts`.  Each one sends
+its own edits as field deltas (``PATCH /api/drafts/<id>``), which the
+server merges, and keeps one event stream open
+(``GET /api/drafts/<id>/events``).  The stream sends a ``delta`` event
+with only the fields changed since the last revision the editor received,
+and a ``locks`` event whenever the paragraph locks change.  Whole forms
+are never re-sent.
+
+The draft store is the single source of truth.  A stream re-reads the
+fields changed since its revision whenever this process changes the draft
+(:class:`DraftHub`) and otherwise every ``POLL_SECONDS``, which also
+covers edits and lock expiries from other worker processes.
+
+Each open stream holds one server thread for up to ``STREAM_MAX_SECONDS``.
+A process serves at most ``OPORD_MAX_LIVE_STREAMS`` streams at once
+(:class:`StreamSlots`; ``gunicorn.conf.py`` adds that many threads to each
+worker's pool for them), so a deployment serves ``workers x
+OPORD_MAX_LIVE_STREAMS`` live editors.  Editors beyond that get a 503 and
+fall back to polling the draft with empty patches until a slot frees up.
+The server only notices a closed tab when it next writes to the stream,
+so its slot is freed within ``KEEPALIVE_SECONDS``.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+from .drafts import DraftStore
+
+# How often a stream checks the store for changes made by other processes.
+POLL_SECONDS = 2.0
+
+# Comment line sent on an idle stream so proxies and dead clients are noticed.
+KEEPALIVE_SECONDS = 15.0
+
+# Streams end after this long; the browser reconnects (with Last-Event-ID),
+# which lets server workers be recycled without losing edits.
+STREAM_MAX_SECONDS = 300.0
+
+# Browser reconnect delay (milliseconds) announced at the start of a stream.
+RETRY_MS = 1000
+
+# Live streams one process serves at once (each holds a server thread).
+DEFAULT_MAX_LIVE_STREAMS = 32
+
+
+class DraftHub:
+    """Wakes the event streams of a draft when this process changes it."""
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._versions: Dict[str, int] = {}
+
+    def version(self, draft_id: str) -> int:
+        """Return the change counter of *draft_id* in this process."""
+        with self._changed:
+            return self._versions.get(draft_id, 0)
+
+    def notify(self, draft_id: str) -> None:
+        """Record a change of *draft_id* and wake its streams."""
+        with self._changed:
+            self._versions[draft_id] = self._versions.get(draft_id, 0) + 1
+            self._changed.notify_all()
+
+    def wait(self, draft_id: str, seen: int, timeout: float) -> bool:
+        """Wait until *draft_id* changes after counter *seen*; False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: self._versions.get(draft_id, 0) != seen, timeout
+            )
+
+
+class _HeldStream:
+    """A stream that gives its slot back when the server closes it."""
+
+    def __init__(self, stream: Iterator[str], release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._closed = False
+
+    def __iter__(self):
+        return self._stream
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            try:
+                self._stream.close()
+            finally:
+                self._release()
+
+
+class StreamSlots:
+    """Caps the live event streams one process serves at once."""
+
+    def __init__(self, limit: Optional[int] = None):
+        if limit is None:
+            limit = int(os.environ.get("OPORD_MAX_LIVE_STREAMS", DEFAULT_MAX_LIVE_STREAMS))
+        self.limit = max(0, limit)
+        self._free = threading.BoundedSemaphore(self.limit) if self.limit else None
+
+    def open(self, stream: Iterator[str]) -> Optional[_HeldStream]:
+        """
+        Return *stream* holding a slot until it is closed, or None if every
+        slot is taken (the generator is then never started).
+        """
+        if self._free is None or not self._free.acquire(blocking=False):
+            return None
+        return _HeldStream(stream, self._free.release)
+
+
+def sse_event(event: str, data, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def event_stream(store: DraftStore, hub: DraftHub, draft_id: str, revision: int = 0,
+                 poll_seconds: float = POLL_SECONDS,
+                 max_seconds: float = STREAM_MAX_SECONDS) -> Iterator[str]:
+    """
+    Yield the Server-Sent Events of one editor's view of a draft.
+
+    Parameters
+    ----------
+    store : DraftStore
+        Where the draft lives.
+    hub : DraftHub
+        Change notifications of this process.
+    draft_id : str
+        The shared draft.
+    revision : int
+        The last revision the editor has (e.g. from ``Last-Event-ID``);
+        0 sends every field first.
+    poll_seconds, max_seconds : float
+        Check interval for other processes' changes, and stream lifetime.
+
+    Yields
+    ------
+    str
+        ``delta`` events (``{"revision", "fields"}``, with the revision as
+        the event ID), ``locks`` events (``{"locks": {paragraph: editor}}``),
+        keep-alive comments, and a final ``gone`` event if the draft is
+        deleted.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    deadline = time.monotonic() + max_seconds
+    last_locks = None
+    idle = 0.0
+    while True:
+        # Read the counter before the store so a change made in between
+        # wakes the wait below at once.
+        seen = hub.version(draft_id)
+        changes = store.changes_since(draft_id, revision)
+        if changes is None:
+            yield sse_event("gone", {"draft_id": draft_id})
+            return
+        if changes.revision < revision:
+            # The editor's copy is not of this draft: start from scratch.
+            revision = 0
+            continue
+        if changes.fields:
+            revision = changes.revision
+            yield sse_event("delta", {"revision": revision, "fields": changes.fields}, revision)
+            idle = 0.0
+        locks = store.locks(draft_id)
+        if locks != last_locks:
+            last_locks = locks
+            yield sse_event("locks", {"locks": locks})
+            idle = 0.0
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        wait = min(poll_seconds, remaining)
+        if not hub.wait(draft_id, seen, wait):
+            idle += wait
+            if idle >= KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
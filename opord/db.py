@@ -0,0 +1,35 @@
+"""
+SQLite helpers shared by the local stores (revisions, search, telemetry...).
+
+All stores live in one database file, by default ``instance/opord.db`` next
+to ``app.py`` (Flask's instance folder); set ``OPORD_DB_PATH`` to move it.
+Connections are opened per operation, which keeps the stores safe to use
+from several threads and from forked server workers.
+"""
+
+import os
+import sqlite3
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_db_path() -> str:
+    """Return the configured database path (``OPORD_DB_PATH``) or the default."""
+    return os.environ.get("OPORD_DB_PATH") or os.path.join(
+        _PROJECT_ROOT, "instance", "opord.db"
+    )
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Open a connection in autocommit mode with WAL journaling.
+
+    Callers manage transactions explicitly (``BEGIN IMMEDIATE`` for
+    read-modify-write sequences) and must close the connection.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
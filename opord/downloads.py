@@ -0,0 +1,94 @@
+"""
+Plain-text, Markdown, JSON and PDF downloads of an OPORD.
+
+Orders are rendered as a stream of chunks, so the first bytes of a large
+order go out before the rest has been rendered.  Rendered bytes are cached
+under a hash of the order's content, so downloading the same order again
+(in any worker thread) sends the cached bytes without rendering.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Union
+
+from .generator import OPORDGenerator
+from .http_cache import BoundedCache
+from .pdf_export import render_pdf
+from .schema import opord_data_from_dict
+
+# Target size of streamed chunks (bytes).
+CHUNK_BYTES = 64 * 1024
+
+# Rendered downloads kept in memory, by content hash and format.
+_rendered = BoundedCache(maxsize=32)
+
+
+def _iter_json(document: dict) -> Iterator[str]:
+    return json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(document)
+
+
+@dataclass(frozen=True)
+class DownloadFormat:
+    """One downloadable representation of an order."""
+    mimetype: str
+    extension: str
+    render: Callable[[dict], Iterator[Union[str, bytes]]]
+
+
+FORMATS = {
+    "txt": DownloadFormat(
+        "text/plain", "txt", lambda doc: OPORDGenerator(opord_data_from_dict(doc)).iter_text()
+    ),
+    "md": DownloadFormat(
+        "text/markdown", "md", lambda doc: OPORDGenerator(opord_data_from_dict(doc)).iter_markdown()
+    ),
+    "json": DownloadFormat("application/json", "json", _iter_json),
+    # A PDF's cross-reference table needs every page first; sent in one chunk.
+    "pdf": DownloadFormat("application/pdf", "pdf", lambda doc: iter([render_pdf(doc)])),
+}
+
+
+def content_key(document: dict, fmt: str) -> str:
+    """Return the cache key (also used as ETag) for *document* rendered as *fmt*."""
+    digest = hashlib.sha256(fmt.encode("ascii") + b"\0")
+    digest.update(json.dumps(document, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def download_filename(operation: str, fmt: str, version: Optional[int] = None) -> str:
+    """Return a safe attachment file name such as ``OPORD-IRON_HAWK-v3.txt``."""
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", operation).strip("_") or "TBD"
+    suffix = f"-v{version}" if version else ""
+    return f"OPORD-{name}{suffix}.{FORMATS[fmt].extension}"
+
+
+def cached_download(key: str) -> Optional[bytes]:
+    """Return the rendered bytes stored under *key*, if any."""
+    return _rendered.get(key)
+
+
+def stream_download(document: dict, fmt: str, key: str) -> Iterator[bytes]:
+    """
+    Render *document* as *fmt*, yielding UTF-8 chunks of about ``CHUNK_BYTES``.
+
+    Once the whole body has been sent it is cached under *key*.
+    """
+    sent = []
+    pending = []
+    pending_size = 0
+    for text in FORMATS[fmt].render(document):
+        data = text if isinstance(text, bytes) else text.encode("utf-8")
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= CHUNK_BYTES:
+            chunk = b"".join(pending)
+            sent.append(chunk)
+            pending, pending_size = [], 0
+            yield chunk
+    if pending:
+        chunk = b"".join(pending)
+        sent.append(chunk)
+        yield chunk
+    _rendered.put(key, b"".join(sent))
@@ -0,0 +1,333 @@
+"""
+Server-side autosave drafts of the OPORD form.
+
+A draft is a flat form mapping kept under a random ID.  The browser sends
+only the fields changed since the last draft revision it saw; each patch
+upserts just those fields and bumps the draft's revision, so autosave
+bandwidth and server work follow the size of the edits, not of the form.
+Every field row remembers the revision that last wrote it, which lets a
+patch return the fields another tab changed since the caller's revision.
+
+``/generate`` accepts a ``draft_id`` and builds the order from the draft,
+so a form that survived only as a draft (e.g. after a browser crash) can
+be generated without re-sending it.
+
+Several editors can share one draft (see :mod:`opord.collab`).  Each OPORD
+paragraph (``FieldSpec.paragraph``) can be locked by one editor at a time;
+a patch that touches a paragraph locked by someone else is refused as a
+whole, and a patch by a named editor takes or renews the locks of the
+paragraphs it touches.  Locks expire ``LOCK_TTL_SECONDS`` after their last
+renewal, so a closed tab does not hold a paragraph for long.
+"""
+
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+from .db import connect
+from .schema import FIELDS_BY_KEY
+
+# Drafts not touched for this long are removed when a new one is created.
+DRAFT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# A paragraph lock lapses this long after its holder last edited or renewed it.
+LOCK_TTL_SECONDS = 120
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS drafts (
+        draft_id TEXT    PRIMARY KEY,
+        revision INTEGER NOT NULL,
+        created  REAL    NOT NULL,
+        updated  REAL    NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS draft_fields (
+        draft_id TEXT    NOT NULL,
+        key      TEXT    NOT NULL,
+        value    TEXT    NOT NULL,
+        revision INTEGER NOT NULL,
+        PRIMARY KEY (draft_id, key)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS draft_locks (
+        draft_id  TEXT    NOT NULL,
+        paragraph INTEGER NOT NULL,
+        editor    TEXT    NOT NULL,
+        expires   REAL    NOT NULL,
+        PRIMARY KEY (draft_id, paragraph)
+    ) WITHOUT ROWID
+    """,
+)
+
+_UPSERT = (
+    "INSERT INTO draft_fields (draft_id, key, value, revision) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (draft_id, key) DO UPDATE SET value = excluded.value, "
+    "revision = excluded.revision WHERE value != excluded.value"
+)
+
+_LOCK = (
+    "INSERT INTO draft_locks (draft_id, paragraph, editor, expires) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (draft_id, paragraph) DO UPDATE SET editor = excluded.editor, "
+    "expires = excluded.expires"
+)
+
+
+@dataclass
+class Draft:
+    """A draft's current revision and fields."""
+    draft_id: str
+    revision: int
+    fields: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {"draft_id": self.draft_id, "revision": self.revision, "fields": self.fields}
+
+
+class ParagraphLocked(Exception):
+    """A change touched paragraphs another editor holds."""
+
+    def __init__(self, holders: Dict[int, str]):
+        super().__init__(", ".join(
+            f"paragraph {paragraph} is locked by {editor}" for paragraph, editor in holders.items()
+        ))
+        self.holders = holders
+
+
+def paragraphs_of(keys) -> set:
+    """Return the OPORD paragraphs the form fields *keys* belong to."""
+    return {FIELDS_BY_KEY[key].paragraph for key in keys if key in FIELDS_BY_KEY}
+
+
+class DraftStore:
+    """SQLite-backed store of autosave drafts, updated by field deltas."""
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = connect(path)
+        try:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        finally:
+            conn.close()
+
+    def create(self, fields: Optional[Mapping[str, str]] = None) -> Draft:
+        """Start a new draft (revision 1 if *fields* are given, else 0)."""
+        draft_id = secrets.token_urlsafe(16)
+        revision = 1 if fields else 0
+        now = time.time()
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._prune(conn, now - DRAFT_MAX_AGE_SECONDS)
+            conn.execute(
+                "INSERT INTO drafts (draft_id, revision, created, updated) VALUES (?, ?, ?, ?)",
+                (draft_id, revision, now, now),
+            )
+            conn.executemany(_UPSERT, [
+                (draft_id, key, value, revision) for key, value in (fields or {}).items()
+            ])
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return Draft(draft_id, revision, dict(fields or {}))
+
+    def get(self, draft_id: str) -> Optional[Draft]:
+        """Return the draft with all its fields, or None if it does not exist."""
+        return self.changes_since(draft_id, 0)
+
+    def changes_since(self, draft_id: str, revision: int) -> Optional[Draft]:
+        """
+        Return the draft's current revision with the fields changed after
+        *revision*, or None if the draft does not exist.
+        """
+        conn = connect(self.path)
+        try:
+            # One read transaction: the revision and fields are consistent.
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT revision FROM drafts WHERE draft_id = ?", (draft_id,)
+            ).fetchone()
+            fields = {} if row is None else dict(conn.execute(
+                "SELECT key, value FROM draft_fields WHERE draft_id = ? AND revision > ?",
+                (draft_id, revision),
+            ).fetchall())
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return None if row is None else Draft(draft_id, row[0], fields)
+
+    def patch(self, draft_id: str, revision: int, changes: Mapping[str, str],
+              editor: Optional[str] = None) -> Optional[Draft]:
+        """
+        Merge *changes* into the draft.
+
+        Parameters
+        ----------
+        draft_id : str
+            The draft to update.
+        revision : int
+            The latest draft revision the caller has seen.
+        changes : Mapping
+            Changed fields only; the caller's values win over concurrent
+            edits of the same field.
+        editor : str, optional
+            Who is editing.  A named editor takes (or renews) the locks of
+            the paragraphs *changes* touch.
+
+        Returns
+        -------
+        Draft or None
+            The draft's new revision, with ``fields`` holding only the
+            changes made by others since *revision* (which the caller has
+            not seen), or None if the draft does not exist.  A patch with
+            no changes is a cheap poll.
+
+        Raises
+        ------
+        ParagraphLocked
+            If *changes* touch a paragraph locked by another editor; nothing
+            is written.
+        """
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT revision FROM drafts WHERE draft_id = ?", (draft_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            current = row[0]
+            now = time.time()
+            touched = paragraphs_of(changes)
+            holders = {
+                paragraph: holder for paragraph, holder in self._locks(conn, draft_id, now).items()
+                if paragraph in touched and holder != editor
+            }
+            if holders:
+                conn.execute("ROLLBACK")
+                raise ParagraphLocked(holders)
+            if editor:
+                conn.executemany(_LOCK, [
+                    (draft_id, paragraph, editor, now + LOCK_TTL_SECONDS) for paragraph in touched
+                ])
+            # A revision the draft never reached means the caller's copy is
+            # not of this draft: it has seen none of it.
+            seen = revision if revision <= current else 0
+            unseen = dict(conn.execute(
+                "SELECT key, value FROM draft_fields WHERE draft_id = ? AND revision > ?",
+                (draft_id, seen),
+            ).fetchall())
+            if changes:
+                current += 1
+                conn.executemany(_UPSERT, [
+                    (draft_id, key, value, current) for key, value in changes.items()
+                ])
+                conn.execute(
+                    "UPDATE drafts SET revision = ?, updated = ? WHERE draft_id = ?",
+                    (current, now, draft_id),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        for key in changes:
+            unseen.pop(key, None)
+        return Draft(draft_id, current, unseen)
+
+    def delete(self, draft_id: str) -> bool:
+        """Remove a draft; returns False if it did not exist."""
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM draft_fields WHERE draft_id = ?", (draft_id,))
+            conn.execute("DELETE FROM draft_locks WHERE draft_id = ?", (draft_id,))
+            deleted = conn.execute(
+                "DELETE FROM drafts WHERE draft_id = ?", (draft_id,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return bool(deleted)
+
+    def lock(self, draft_id: str, paragraph: int, editor: str) -> Optional[Dict[int, str]]:
+        """
+        Take or renew *editor*'s lock on one paragraph of a draft.
+
+        Returns the draft's locks afterwards (None if the draft does not
+        exist), or raises :class:`ParagraphLocked` if another editor holds it.
+        """
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM drafts WHERE draft_id = ?", (draft_id,)).fetchone() is None:
+                conn.execute("ROLLBACK")
+                return None
+            now = time.time()
+            locks = self._locks(conn, draft_id, now)
+            holder = locks.get(paragraph)
+            if holder is not None and holder != editor:
+                conn.execute("ROLLBACK")
+                raise ParagraphLocked({paragraph: holder})
+            conn.execute(_LOCK, (draft_id, paragraph, editor, now + LOCK_TTL_SECONDS))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        locks[paragraph] = editor
+        return locks
+
+    def unlock(self, draft_id: str, paragraph: int, editor: str) -> bool:
+        """Release *editor*'s lock on a paragraph; returns False if it held none."""
+        conn = connect(self.path)
+        try:
+            released = conn.execute(
+                "DELETE FROM draft_locks WHERE draft_id = ? AND paragraph = ? AND editor = ?",
+                (draft_id, paragraph, editor),
+            ).rowcount
+        finally:
+            conn.close()
+        return bool(released)
+
+    def locks(self, draft_id: str) -> Dict[int, str]:
+        """Return the unexpired locks of a draft as ``{paragraph: editor}``."""
+        conn = connect(self.path)
+        try:
+            return self._locks(conn, draft_id, time.time())
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _locks(conn, draft_id: str, now: float) -> Dict[int, str]:
+        return dict(conn.execute(
+            "SELECT paragraph, editor FROM draft_locks "
+            "WHERE draft_id = ? AND expires > ? ORDER BY paragraph",
+            (draft_id, now),
+        ).fetchall())
+
+    @staticmethod
+    def _prune(conn, cutoff: float) -> None:
+        for table in ("draft_fields", "draft_locks"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE draft_id IN "
+                "(SELECT draft_id FROM drafts WHERE updated < ?)", (cutoff,)
+            )
+        conn.execute("DELETE FROM drafts WHERE updated < ?", (cutoff,))
@@ -0,0 +1,354 @@
+"""
+Evaluation harness for the AI section prompts.
+
+Runs a fixed corpus of operation summaries through ``generate_full_opord``
+and records, for every section, the call latency, token usage and a set
+of conformance checks on the text (word limit, no headings, no
+classification markings beyond the training banner, 24-hour times).  A
+run is saved as JSON together with the prompt configuration it used
+(model, temperature, max tokens, system prompt hash) and can be compared
+against a saved baseline, so a change to ``_SYSTEM_PROMPT``,
+``temperature`` or ``max_tokens`` is measured instead of guessed.
+
+The endpoint is whatever the client points at: the OpenAI API,
+``OPENAI_BASE_URL`` (or ``--base-url``) for a compatible server, or
+``--stand-in`` for an in-process stand-in that needs no network and
+simulates provider-side prompt caching.
+
+Usage
+-----
+    python -m opord.evaluation --out runs/new.json [--baseline runs/base.json]
+                               [--stand-in | --base-url URL] [--model M]
+                               [--mode ai|hybrid] [--corpus FILE] [--repeat N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from .ai_helper import (
+    AUTO_FILL_FIELDS,
+    _SYSTEM_PROMPT,
+    build_op_summary,
+    build_section_request,
+    generate_full_opord,
+    get_client,
+)
+from .telemetry import percentile, usage_counts
+
+# Fixed operation summaries the prompts are evaluated on.  Only the summary
+# fields matter: every other auto-fill field is left blank.
+CORPUS = [
+    {"operation_name": "IRON HAWK", "mission": "C/1-7 CAV seizes OBJ EAGLE NLT 0600Z to secure the airfield.",
+     "insert_method": "Airborne (Static Line)", "dz_lz": "DZ FALCON",
+     "enemy_composition": "Mechanized infantry platoon with BMPs"},
+    {"operation_name": "STEEL TALON", "mission": "C Co clears OBJ FALCON to deny enemy use of the river crossing.",
+     "insert_method": "Air Assault (Helicopter)", "dz_lz": "LZ ROBIN",
+     "enemy_composition": "Dismounted infantry squad with a ZU-23 section"},
+    {"operation_name": "SILENT OWL", "mission": "C Co raids OBJ RAVEN NLT 0300Z to destroy the radar site.",
+     "insert_method": "Airborne (HALO/HAHO)", "dz_lz": "DZ OSPREY",
+     "enemy_composition": "Air defense team and security detachment"},
+    {"operation_name": "BLACK RIVER", "mission": "C Co blocks OBJ CONDOR to prevent enemy withdrawal.",
+     "insert_method": "Ground (Motor March)", "dz_lz": "",
+     "enemy_composition": "Motorized rifle company with mortars"},
+    {"operation_name": "DUST DEVIL", "mission": "C Co secures OBJ KESTREL to protect the supply route.",
+     "insert_method": "Ground (Dismounted)", "dz_lz": "",
+     "enemy_composition": "Insurgent cell with IEDs"},
+    {"operation_name": "NIGHT HERON", "mission": "C Co ambushes the enemy resupply convoy at OBJ HERON.",
+     "insert_method": "Air Assault (Helicopter)", "dz_lz": "LZ WREN",
+     "enemy_composition": "Sniper team and observation post"},
+]
+
+MAX_WORDS = 150
+
+_HEADING = re.compile(
+    r"^\s*(#{1,6}\s|\*\*[^*]+\*\*\s*$|\d+\.\s+[A-Z][A-Z ]+$|[a-z]\.\s+[A-Z][\w ]+\.$|[A-Z][A-Z /&'-]{3,}:?\s*$)",
+    re.MULTILINE,
+)
+_CLASSIFIED = re.compile(
+    r"\b(TOP SECRET|SECRET|CONFIDENTIAL|NOFORN|ORCON|REL TO)\b|\((TS|S|C)(//[A-Z ]+)?\)"
+)
+_TWELVE_HOUR = re.compile(r"\b\d{1,2}(:\d{2})?\s?([AaPp]\.?[Mm]\.?)(?=\W|$)")
+
+# Trailing instruction of every section prompt (see build_section_request).
+_SECTION_REQUEST = re.compile(r"Generate the '(.+?)' section\.$")
+
+
+def check_section(label: str, text: str) -> Dict[str, bool]:
+    """Return the conformance checks for one section's text (True = pass)."""
+    first_line = text.strip().splitlines()[0] if text.strip() else ""
+    return {
+        "non_empty": bool(text.strip()),
+        "word_limit": len(text.split()) <= MAX_WORDS,
+        "no_headings": not _HEADING.search(text)
+        and not first_line.lower().startswith(label.lower()),
+        "no_classified_markings": not _CLASSIFIED.search(text),
+        "military_time": not _TWELVE_HOUR.search(text),
+    }
+
+
+@dataclass
+class SectionResult:
+    """One section of one corpus order."""
+    case: str
+    section: str
+    latency_ms: Optional[float]
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    words: int
+    checks: Dict[str, bool] = field(default_factory=dict)
+
+
+class _MeteredClient:
+    """Wrap a chat client, recording each completion's latency and usage by section."""
+
+    def __init__(self, inner):
+        self._inner = inner
+        self.calls: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **request):
+        started = time.perf_counter()
+        response = self._inner.chat.completions.create(**request)
+        latency = (time.perf_counter() - started) * 1000
+        match = _SECTION_REQUEST.search(request["messages"][-1]["content"])
+        with self._lock:
+            self.calls[match.group(1) if match else "?"] = (
+                latency, usage_counts(getattr(response, "usage", None))
+            )
+        return response
+
+
+class StandInClient:
+    """
+    In-process stand-in for the chat completions endpoint.
+
+    Returns deterministic text without any network call, reports usage
+    estimated at four characters per token and, like OpenAI, reports the
+    prompt prefix shared with an earlier request as cached once it is at
+    least 1024 tokens (in 128-token steps).
+    """
+
+    model = "stand-in"
+
+    def __init__(self, respond: Optional[Callable[[dict], str]] = None, delay: float = 0.0):
+        self.respond = respond or self._default_response
+        self.delay = delay
+        self._prompts: List[str] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @staticmethod
+    def _default_response(request: dict) -> str:
+        match = _SECTION_REQUEST.search(request["messages"][-1]["content"])
+        section = match.group(1) if match else "section"
+        return (f"Stand-in {section.lower()} text: the company completes its tasks "
+                "on time and reports on the command net at 0600Z.")
+
+    def _create(self, **request):
+        prompt = "\n".join(message["content"] for message in request["messages"])
+        with self._lock:
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._prompts),
+                         default=0)
+            self._prompts.append(prompt)
+        shared_tokens = shared // 4
+        cached = shared_tokens // 128 * 128 if shared_tokens >= 1024 else 0
+        if self.delay:
+            time.sleep(self.delay)
+        text = self.respond(request)
+        usage = SimpleNamespace(
+            prompt_tokens=len(prompt) // 4,
+            completion_tokens=len(text) // 4,
+            total_tokens=len(prompt) // 4 + len(text) // 4,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+        )
+        message = SimpleNamespace(role="assistant", content=text)
+        return SimpleNamespace(model=self.model, choices=[SimpleNamespace(message=message)],
+                               usage=usage)
+
+
+def prompt_config(model: Optional[str] = None) -> dict:
+    """Describe the prompt settings a run is measuring."""
+    request = build_section_request("Signal", build_op_summary(CORPUS[0]), model=model)
+    return {
+        "model": request["model"],
+        "temperature": request.get("temperature"),
+        "max_tokens": request.get("max_tokens"),
+        "system_prompt_sha256": hashlib.sha256(_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:16],
+    }
+
+
+def run_corpus(client, corpus: List[dict] = CORPUS, model: Optional[str] = None,
+               mode: str = "ai", repeat: int = 1) -> List[SectionResult]:
+    """Generate every blank section of every corpus order and measure each one."""
+    labels = dict(AUTO_FILL_FIELDS)
+    results = []
+    for round_number in range(repeat):
+        for form in corpus:
+            metered = _MeteredClient(client)
+            # A per-round marker keeps repeated rounds from being merged by
+            # the in-flight request deduplication.
+            form = dict(form, operation_name=f"{form['operation_name']}"
+                        + (f" #{round_number + 1}" if repeat > 1 else ""))
+            enriched = generate_full_opord(form, model=model, mode=mode, client=metered)
+            for key, label in AUTO_FILL_FIELDS:
+                text = enriched.get(key) or ""
+                latency, (prompt, cached, completion) = metered.calls.get(
+                    labels[key], (None, (0, 0, 0))
+                )
+                results.append(SectionResult(
+                    form["operation_name"], key, latency, prompt, cached, completion,
+                    len(text.split()), check_section(label, text),
+                ))
+    return results
+
+
+def summarize(results: List[SectionResult]) -> Dict[str, dict]:
+    """Aggregate results per section (plus ``"all"``)."""
+    groups: Dict[str, List[SectionResult]] = {}
+    for result in results:
+        groups.setdefault(result.section, []).append(result)
+        groups.setdefault("all", []).append(result)
+    summary = {}
+    for section, group in groups.items():
+        latencies = [r.latency_ms for r in group if r.latency_ms is not None]
+        prompt = sum(r.prompt_tokens for r in group)
+        summary[section] = {
+            "calls": len(group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "mean_prompt_tokens": prompt / len(group),
+            "mean_completion_tokens": sum(r.completion_tokens for r in group) / len(group),
+            "cached_pct": 100.0 * sum(r.cached_tokens for r in group) / prompt if prompt else 0.0,
+            "mean_words": sum(r.words for r in group) / len(group),
+            "pass_rate": {
+                check: sum(r.checks[check] for r in group) / len(group)
+                for check in group[0].checks
+            },
+        }
+    return summary
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict],
+            tolerance: float = 0.2) -> List[str]:
+    """
+    Return the regressions of a run summary against a baseline summary.
+
+    A regression is any lower check pass rate, or a p95 latency or mean
+    token count more than *tolerance* (a fraction) above the baseline.
+    """
+    regressions = []
+    for section, now in current.items():
+        before = baseline.get(section)
+        if before is None:
+            continue
+        for check, rate in now["pass_rate"].items():
+            old = before["pass_rate"].get(check)
+            if old is not None and rate < old:
+                regressions.append(f"{section}: {check} pass rate {old:.0%} -> {rate:.0%}")
+        for metric in ("p95_ms", "mean_prompt_tokens", "mean_completion_tokens"):
+            old, new = before.get(metric), now.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{section}: {metric} {old:.0f} -> {new:.0f}")
+    return regressions
+
+
+def _print_summary(summary: Dict[str, dict]) -> None:
+    checks = list(summary["all"]["pass_rate"])
+    header = ["section", "p50 ms", "p95 ms", "prompt", "cached %", "completion", "words"] + checks
+    lines = [header]
+    for section in [key for key, _ in AUTO_FILL_FIELDS] + ["all"]:
+        row = summary.get(section)
+        if row is None:
+            continue
+        lines.append([
+            section,
+            "-" if row["p50_ms"] is None else f"{row['p50_ms']:.0f}",
+            "-" if row["p95_ms"] is None else f"{row['p95_ms']:.0f}",
+            f"{row['mean_prompt_tokens']:.0f}", f"{row['cached_pct']:.0f}",
+            f"{row['mean_completion_tokens']:.0f}", f"{row['mean_words']:.0f}",
+        ] + [f"{row['pass_rate'][check]:.0%}" for check in checks])
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    for line in lines:
+        print("  ".join(cell.ljust(w) if i == 0 else cell.rjust(w)
+                        for i, (cell, w) in enumerate(zip(line, widths))))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m opord.evaluation",
+        description="Measure AI section prompts on a fixed corpus.",
+    )
+    parser.add_argument("--out", help="write the run (config, results, summary) to this JSON file")
+    parser.add_argument("--baseline", help="compare against a run saved with --out")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed latency/token growth over the baseline (fraction)")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="use the in-process stand-in endpoint (no network)")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (sets OPENAI_BASE_URL)")
+    parser.add_argument("--model", help="model (default: OPENAI_MODEL or gpt-4o)")
+    parser.add_argument("--mode", choices=("ai", "hybrid"), default="ai",
+                        help="evaluate plain AI sections or AI-refined local drafts")
+    parser.add_argument("--corpus", help="JSON list of forms to use instead of the built-in corpus")
+    parser.add_argument("--repeat", type=int, default=1, help="runs over the corpus")
+    args = parser.parse_args(argv)
+
+    # Evaluation calls are not production traffic.
+    os.environ["OPORD_TELEMETRY"] = "0"
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    client = StandInClient() if args.stand_in else get_client()
+    if client is None:
+        print("error: no AI client configured (set OPENAI_API_KEY, or use --stand-in)",
+              file=sys.stderr)
+        return 1
+    corpus = CORPUS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as fh:
+            corpus = json.load(fh)
+
+    results = run_corpus(client, corpus, model=args.model, mode=args.mode, repeat=args.repeat)
+    summary = summarize(results)
+    _print_summary(summary)
+    run = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "endpoint": "stand-in" if args.stand_in else os.environ.get("OPENAI_BASE_URL", "openai"),
+        "mode": args.mode,
+        "config": prompt_config(args.model),
+        "summary": summary,
+        "results": [asdict(result) for result in results],
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(run, fh, indent=2)
+        print(f"Saved run to {args.out}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        changed = {key: (baseline["config"].get(key), value)
+                   for key, value in run["config"].items()
+                   if baseline["config"].get(key) != value}
+        for key, (old, new) in changed.items():
+            print(f"config {key}: {old} -> {new}")
+        regressions = compare(summary, baseline["summary"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,9 @@ Doctrine reference: FM 6-0, Appendix C (Operation Order format).
 Unit model: Airborne / Air Assault company based on a PIR in the 82nd Airborne Division.
 """
 
+import re
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 
 # ---------------------------------------------------------------------------
@@ -119,6 +120,43 @@ class OPORDData:
 # Generator
 # ---------------------------------------------------------------------------
 
+# Sections of the plain-text order, in order, and the OPORDData attributes
+# each one's text depends on (so callers can re-render only what changed).
+SECTION_INPUTS = {
+    "header": ("classification", "operation_name", "dtg", "time_zone", "reference_maps"),
+    "paragraph_1": ("situation",),
+    "paragraph_2": ("mission", "insert_method", "dz_lz"),
+    "paragraph_3": ("execution",),
+    "paragraph_4": ("sustainment",),
+    "paragraph_5": ("command_and_signal",),
+    "footer": ("classification",),
+}
+
+
+def join_sections(sections: Iterable[Tuple[str, List[str]]]) -> str:
+    """Join ``(section name, lines)`` pairs into the plain-text order."""
+    return "\n".join(
+        line
+        for name, lines in sections
+        for line in ([""] + lines if name.startswith("paragraph_") else lines)
+    )
+
+
+def markdown_section(name: str, lines: List[str]) -> str:
+    """Return the Markdown of one section given its plain-text *lines*."""
+    if name == "header":
+        return "\n".join(
+            [f"**{lines[0]}**"]  # classification banner
+            + [f"# {line}" if line.startswith("OPERATION ORDER ") else _markdown_line(line)
+               for line in lines[1:]]
+        ) + "\n"
+    if name == "footer":
+        *footer, classification = lines
+        return "\n".join([_markdown_line(line) for line in footer] + [f"**{classification}**"]) + "\n"
+    title, *body = lines
+    return "\n".join([f"\n## {title}"] + [_markdown_line(line) for line in body]) + "\n"
+
+
 class OPORDGenerator:
     """
     Generates a formatted 5-paragraph OPORD for Charlie Company, 1-7 CAV.
@@ -127,7 +165,7 @@ class OPORDGenerator:
     def __init__(self, data: OPORDData):
         self.data = data
 
-    def _header(self) -> str:
+    def _header(self) -> List[str]:
         lines = [
             self.data.classification,
             "",
@@ -139,9 +177,9 @@ class OPORDGenerator:
             "",
             ("=" * 70),
         ]
-        return "\n".join(lines)
+        return lines
 
-    def _paragraph_1(self) -> str:
+    def _paragraph_1(self) -> List[str]:
         s = self.data.situation
         e = s.enemy
         f = s.friendly
@@ -169,9 +207,9 @@ class OPORDGenerator:
             "  d. Civil Considerations.",
             f"     {s.civil_considerations or 'None assessed at this time.'}",
         ]
-        return "\n".join(lines)
+        return lines
 
-    def _paragraph_2(self) -> str:
+    def _paragraph_2(self) -> List[str]:
         lines = [
             "2. MISSION",
             "",
@@ -184,9 +222,9 @@ class OPORDGenerator:
             ]
         if self.data.dz_lz:
             lines += [f"  DZ/LZ: {self.data.dz_lz}"]
-        return "\n".join(lines)
+        return lines
 
-    def _paragraph_3(self) -> str:
+    def _paragraph_3(self) -> List[str]:
         ex = self.data.execution
         lines = [
             "3. EXECUTION",
@@ -219,9 +257,9 @@ class OPORDGenerator:
             "  g. Rules of Engagement.",
             f"     {ex.rules_of_engagement or 'Standard ROE apply. PID required prior to engagement.'}",
         ]
-        return "\n".join(lines)
+        return lines
 
-    def _paragraph_4(self) -> str:
+    def _paragraph_4(self) -> List[str]:
         su = self.data.sustainment
         lines = [
             "4. SUSTAINMENT",
@@ -235,9 +273,9 @@ class OPORDGenerator:
             "  c. Medical.",
             f"     {su.medical or 'Casevac IAW unit SOP. Nearest MTF: TBD.'}",
         ]
-        return "\n".join(lines)
+        return lines
 
-    def _paragraph_5(self) -> str:
+    def _paragraph_5(self) -> List[str]:
         cs = self.data.command_and_signal
         lines = [
             "5. COMMAND AND SIGNAL",
@@ -252,10 +290,10 @@ class OPORDGenerator:
             f"     Frequencies:             {cs.frequencies or 'See signal annex.'}",
             f"     Challenge / Password:    {cs.challenge_and_password or 'TBD'}",
         ]
-        return "\n".join(lines)
+        return lines
 
-    def _footer(self) -> str:
-        return "\n".join([
+    def _footer(self) -> List[str]:
+        return [
             "",
             ("=" * 70),
             "",
@@ -264,25 +302,46 @@ class OPORDGenerator:
             f"  [Commander, {UNIT_SHORT}]",
             "",
             self.data.classification,
-        ])
+        ]
+
+    def render_section(self, name: str) -> List[str]:
+        """Return the lines of one section (a key of ``SECTION_INPUTS``)."""
+        if name not in SECTION_INPUTS:
+            raise KeyError(name)
+        return getattr(self, f"_{name}")()
+
+    def _sections(self) -> Iterator[List[str]]:
+        """Yield every section of the order as a list of lines, one at a time."""
+        for name in SECTION_INPUTS:
+            if name.startswith("paragraph_"):
+                yield [""]
+            yield self.render_section(name)
 
     def generate_text(self) -> str:
         """Return the complete OPORD as a formatted plain-text string."""
-        sections = [
-            self._header(),
-            "",
-            self._paragraph_1(),
-            "",
-            self._paragraph_2(),
-            "",
-            self._paragraph_3(),
-            "",
-            self._paragraph_4(),
-            "",
-            self._paragraph_5(),
-            self._footer(),
-        ]
-        return "\n".join(sections)
+        # Field values are copied once into their line and once by the final
+        # join, so time and memory stay linear in the size of the input.
+        return join_sections((name, self.render_section(name)) for name in SECTION_INPUTS)
+
+    def iter_text(self) -> Iterator[str]:
+        """
+        Yield the plain-text OPORD section by section.
+
+        The chunks join to exactly ``generate_text()``; only one section is
+        rendered at a time, which suits streaming responses.
+        """
+        for index, section in enumerate(self._sections()):
+            yield ("\n" if index else "") + "\n".join(section)
+
+    def iter_markdown(self) -> Iterator[str]:
+        """
+        Yield the OPORD as Markdown, section by section.
+
+        Same content as ``generate_text()``: paragraph titles become ``##``
+        headings, sub-paragraphs ``###`` headings and their fields list items.
+        """
+        for name in SECTION_INPUTS:
+            yield markdown_section(name, self.render_section(name))
 
     def generate_dict(self) -> dict:
         """Return the OPORD as a dictionary (useful for JSON / template rendering)."""
@@ -341,3 +400,21 @@ class OPORDGenerator:
             },
             "subordinate_units": SUBORDINATE_UNITS,
         }
+
+
+_SUBPARAGRAPH = re.compile(r"^  [a-z]\. \S")
+_ALIGNMENT = re.compile(r": {2,}")
+
+
+def _markdown_line(line: str) -> str:
+    """Convert one body line of the plain-text layout to Markdown."""
+    if not line.strip():
+        return ""
+    if line == "=" * 70:
+        return "---"
+    if _SUBPARAGRAPH.match(line):
+        return f"### {line.strip()}"
+    if line.startswith("     "):
+        return "- " + _ALIGNMENT.sub(": ", line.strip(), count=1)
+    # Free text (e.g. the mission statement): keep the line break.
+    return f"{line.strip()}  "
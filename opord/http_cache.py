@@ -0,0 +1,177 @@
+"""
+HTTP caching and compression helpers for the Flask app.
+
+- ``BoundedCache``: small thread-safe LRU used for rendered pages and
+  compressed response bodies.
+- ``static_version``: content hash used to fingerprint static asset URLs so
+  they can be cached "forever" by browsers and proxies.
+- ``compress_response``: gzip (or brotli, when the optional ``brotli``
+  package is installed) for text responses, reusing earlier compressions of
+  the same ETag.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+try:
+    import brotli
+    _brotli_available = True
+except ImportError:  # pragma: no cover
+    _brotli_available = False
+
+# One year: the longest max-age caches are required to honour.
+FAR_FUTURE_MAX_AGE = 365 * 24 * 60 * 60
+
+COMPRESSIBLE_MIMETYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/markdown",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+}
+
+# Bodies smaller than this are not worth the compression overhead.
+MIN_COMPRESS_BYTES = 500
+
+# Larger bodies are left alone rather than buffered in memory.
+MAX_COMPRESS_BYTES = 5 * 1024 * 1024
+
+
+class BoundedCache:
+    """Thread-safe least-recently-used mapping with a fixed capacity."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def content_etag(body) -> str:
+    """Return a strong ETag value for a response body."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+_static_versions = BoundedCache(maxsize=256)
+
+
+def static_version(static_folder: str, filename: str) -> Optional[str]:
+    """
+    Return a short content hash for a static file, or None if it is missing.
+
+    Hashes are cached per (path, mtime, size), so an edited file gets a new
+    URL without restarting the app.
+    """
+    path = os.path.join(static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    version = _static_versions.get(key)
+    if version is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(65536), b""):
+                digest.update(chunk)
+        version = digest.hexdigest()[:12]
+        _static_versions.put(key, version)
+    return version
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from a werkzeug Accept-Encoding object."""
+    if _brotli_available and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+_compressed_bodies = BoundedCache(maxsize=64)
+
+
+def compress_response(response, accept_encodings):
+    """
+    Compress a Flask/werkzeug response in place when worthwhile.
+
+    Streaming (generator) responses and non-200 responses are left as they
+    are.  When the response carries a strong ETag the compressed body is
+    cached under it, and the ETag is weakened because the compressed bytes
+    differ from the identity representation.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or "Content-Encoding" in response.headers:
+        return response
+    if "Content-Range" in response.headers:
+        return response
+    if response.is_streamed and not response.direct_passthrough:
+        return response
+    length = response.content_length
+    if length is not None and not MIN_COMPRESS_BYTES <= length <= MAX_COMPRESS_BYTES:
+        return response
+
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    # File responses are passed straight through by default; read them so
+    # the body can be replaced.
+    response.direct_passthrough = False
+    etag, weak = response.get_etag()
+    cache_key = (etag, encoding) if etag and not weak else None
+    compressed = _compressed_bodies.get(cache_key) if cache_key else None
+    if compressed is not None:
+        # Release the unread body (e.g. an open static file).
+        close = getattr(response.response, "close", None)
+        if close is not None:
+            close()
+    else:
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_BYTES:
+            return response
+        compressed = _compress(body, encoding)
+        if cache_key:
+            _compressed_bodies.put(cache_key, compressed)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
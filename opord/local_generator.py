@@ -0,0 +1,375 @@
+"""
+Local, rule-based drafts of the AI auto-fill sections and subordinate tasks.
+
+Builds doctrinally shaped text for each auto-fill section from the insert
+method, DZ/LZ, enemy composition and mission statement alone: the insert
+method selects a profile (parachute, free-fall, air assault or ground),
+the enemy composition is matched against known threat types, and the
+objective and tactical task are read from the mission statement.  No
+network and no model are involved; a full set of drafts takes tens of
+microseconds, so it serves as a zero-latency fallback when the AI is not
+configured or fails, and as a first draft for the AI to refine (see
+``OPORD_AI_MODE`` in :mod:`opord.ai_helper`).
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .generator import SUBORDINATE_UNITS, UNIT_SHORT
+from .schema import clip_to_limit, task_key
+
+
+@dataclass(frozen=True)
+class InsertProfile:
+    """How the company gets to the objective area."""
+    insertion: str   # noun phrase: "a static-line parachute assault"
+    zone_kind: str   # "DZ", "LZ" or "attack position"
+    assembly: str    # what happens on the zone
+    resupply: str    # how Class I / V reach the company afterwards
+    evacuation: str  # how casualties leave the objective area
+    vulnerability: str  # when the company is most exposed
+
+
+_PROFILES = {
+    "free_fall": InsertProfile(
+        "a military free-fall infiltration", "DZ",
+        "jumpers assemble by team on the DZ and move to the objective rally point undetected",
+        "door bundles dropped with the jumpers, then aerial resupply on call",
+        "ground evacuation to an HLZ near the DZ, then air MEDEVAC",
+        "during exit and assembly while teams are dispersed",
+    ),
+    "static_line": InsertProfile(
+        "a static-line parachute assault", "DZ",
+        "jumpers assemble on platoon assembly aids and the company reports red/amber/green",
+        "door bundles on the DZ, then aerial resupply on call",
+        "casualties collected at the DZ casualty collection point for air MEDEVAC",
+        "during the drop and assembly on the DZ",
+    ),
+    "air_assault": InsertProfile(
+        "an air assault", "LZ",
+        "platoons clear the LZ, establish security and move out by chalk",
+        "sling-load or internal-load resupply to the LZ on call",
+        "air MEDEVAC from the LZ or a cleared PZ near the objective",
+        "on final approach and during the first minutes on the LZ",
+    ),
+    "motor": InsertProfile(
+        "a tactical motor march", "attack position",
+        "vehicles halt at the release point and platoons dismount into the attack position",
+        "LOGPAC forward to the company trains after consolidation",
+        "ground evacuation by the company's vehicles to the battalion aid station",
+        "at the release point and while dismounting",
+    ),
+    "dismounted": InsertProfile(
+        "a dismounted movement", "attack position",
+        "platoons move in a wedge to the objective rally point and conduct a leader's reconnaissance",
+        "LOGPAC to the company trains after consolidation",
+        "litter carry to the casualty collection point, then ground evacuation",
+        "crossing danger areas on the route and at the objective rally point",
+    ),
+}
+
+# (words in the insert method, profile), checked in order.
+_PROFILE_MATCHES = [
+    (("halo", "haho", "free-fall", "freefall", "free fall"), "free_fall"),
+    (("static", "airborne", "parachute", "jump"), "static_line"),
+    (("air assault", "helicopter", "heliborne", "rotary"), "air_assault"),
+    (("motor", "vehicle", "mounted"), "motor"),
+    (("dismount", "foot", "ground", "infiltrat"), "dismounted"),
+]
+
+
+@dataclass(frozen=True)
+class ThreatType:
+    """What an enemy of one kind can do, and is likely / most dangerous to do."""
+    words: Tuple[str, ...]
+    capability: str
+    likely: str
+    dangerous: str
+
+
+_THREATS = [
+    ThreatType(
+        ("mechanized", "mech ", "armor", "armour", "tank", "bmp", "btr", "motorized", "apc", "ifv"),
+        "mounted direct fire and anti-armor weapons, with the mobility to reinforce "
+        "or counterattack within minutes",
+        "defends from prepared vehicle positions covering the likely avenues of approach",
+        "counterattacks with its mounted element before the company has consolidated",
+    ),
+    ThreatType(
+        ("air defense", "air defence", " ada ", "manpads", "zu-23", "sa-", "anti-aircraft"),
+        "air defense weapons able to engage aircraft on approach and departure routes",
+        "keeps its air defense weapons covering the approaches to the objective area",
+        "engages the insertion aircraft, forcing an abort or scattering the company",
+    ),
+    ThreatType(
+        ("mortar", "artillery", "indirect", "rocket"),
+        "indirect fire able to reach the insertion zone, routes and the objective",
+        "registers indirect fire on the insertion zone and the approaches to the objective",
+        "masses indirect fire on the company while it is assembling or consolidating",
+    ),
+    ThreatType(
+        ("insurgent", "militia", "guerrilla", "irregular", "cell", "partisan"),
+        "small arms and IEDs, with the ability to ambush and blend into the local population",
+        "harasses with small arms and IEDs, then disperses among the population",
+        "initiates a complex attack with IEDs and small arms on the company's route",
+    ),
+    ThreatType(
+        ("sniper", "recon", "observation post", " op ", "scout"),
+        "observers and precision fire able to report friendly movement and direct fire onto it",
+        "observes the insertion zone and reports friendly movement to its higher headquarters",
+        "directs fire onto the company while it is concentrated",
+    ),
+]
+
+_DEFAULT_THREAT = ThreatType(
+    (),
+    "small arms, light machine guns and hasty obstacles",
+    "defends the objective from hasty fighting positions",
+    "reinforces the objective and counterattacks before the company has consolidated",
+)
+
+_TASKS = {
+    "seize": "{obj} is seized and controlled",
+    "secure": "{obj} is secured",
+    "clear": "{obj} is cleared of enemy forces",
+    "destroy": "the enemy on {obj} is destroyed",
+    "defeat": "the enemy on {obj} is defeated",
+    "raid": "the raid on {obj} is complete and the company has withdrawn",
+    "ambush": "the enemy force is destroyed in the ambush and the company has withdrawn",
+    "block": "the enemy is unable to pass {obj}",
+    "defend": "{obj} is retained",
+    "retain": "{obj} is retained",
+    "occupy": "{obj} is occupied",
+    "isolate": "{obj} is isolated",
+    "attack": "the enemy on {obj} is defeated",
+}
+
+_OBJECTIVE = re.compile(r"\bOBJ(?:ECTIVE)?\.?\s+([A-Z0-9][\w-]*)", re.IGNORECASE)
+_TASK_WORD = re.compile(r"\b(" + "|".join(_TASKS) + r")s?\b", re.IGNORECASE)
+_TIME_LIMIT = re.compile(r"\b(NLT|NET)\s+([^\s,.;]+)", re.IGNORECASE)
+
+
+@dataclass
+class _Context:
+    profile: InsertProfile
+    zone: str
+    objective: str
+    task: str
+    time_limit: str
+    enemy: str
+    threats: List[ThreatType]
+
+
+def _profile(insert_method: str) -> InsertProfile:
+    text = insert_method.lower()
+    for words, name in _PROFILE_MATCHES:
+        if any(word in text for word in words):
+            return _PROFILES[name]
+    return _PROFILES["dismounted"]
+
+
+def _context(form_data: dict) -> _Context:
+    profile = _profile(form_data.get("insert_method") or "")
+    mission = form_data.get("mission") or ""
+    enemy = (form_data.get("enemy_composition") or "").strip().rstrip(".")
+    haystack = f" {enemy.lower()} "
+    threats = [t for t in _THREATS if any(word in haystack for word in t.words)]
+    objective = _OBJECTIVE.search(mission)
+    task = _TASK_WORD.search(mission)
+    time_limit = _TIME_LIMIT.search(mission)
+    return _Context(
+        profile=profile,
+        zone=(form_data.get("dz_lz") or "").strip() or f"the {profile.zone_kind}",
+        objective=objective.group(1).upper() if objective else "",
+        task=task.group(1).lower() if task else "seize",
+        time_limit=" ".join(time_limit.groups()).upper() if time_limit else "",
+        enemy=f"The enemy ({enemy})" if enemy else "The enemy",
+        threats=threats or [_DEFAULT_THREAT],
+    )
+
+
+def _obj(ctx: _Context) -> str:
+    return f"OBJ {ctx.objective}" if ctx.objective else "the objective"
+
+
+def _join(parts: Iterable[str]) -> str:
+    parts = list(parts)
+    return "; ".join(parts[:-1]) + "; and " + parts[-1] if len(parts) > 1 else parts[0]
+
+
+def _enemy_capabilities(ctx: _Context) -> str:
+    return (
+        f"{ctx.enemy} is assessed to have {_join(t.capability for t in ctx.threats)}. "
+        f"It can defend or delay in the vicinity of {_obj(ctx)} and is most dangerous to "
+        f"the company {ctx.profile.vulnerability}."
+    )
+
+
+def _enemy_most_likely_coa(ctx: _Context) -> str:
+    return (
+        f"{ctx.enemy} {ctx.threats[0].likely}. On contact it fights from its positions on "
+        f"{_obj(ctx)}, reports to its higher headquarters and withdraws along covered "
+        "routes once its positions become untenable."
+    )
+
+
+def _enemy_most_dangerous_coa(ctx: _Context) -> str:
+    return (
+        f"{ctx.enemy} detects the company {ctx.profile.vulnerability}, then "
+        f"{ctx.threats[0].dangerous}, preventing the company from massing on {_obj(ctx)}."
+    )
+
+
+def _end_state(ctx: _Context) -> str:
+    return _TASKS[ctx.task].format(obj=_obj(ctx))
+
+
+def _commanders_intent(ctx: _Context) -> str:
+    deadline = f" {ctx.time_limit}" if ctx.time_limit else ""
+    return (
+        f"Purpose: {ctx.task} {_obj(ctx)} in order to enable follow-on operations by "
+        f"the battalion. Key tasks: conduct {ctx.profile.insertion} onto {ctx.zone} "
+        f"and assemble rapidly; {ctx.task} {_obj(ctx)}{deadline}; consolidate and "
+        f"reorganize. End state: {_end_state(ctx)}, the company is consolidated and "
+        "prepared for follow-on missions, and casualties are evacuated."
+    )
+
+
+def _concept_of_operations(ctx: _Context) -> str:
+    return (
+        f"This is a three-phase operation. Phase I (Insertion): {UNIT_SHORT} conducts "
+        f"{ctx.profile.insertion} onto {ctx.zone}; {ctx.profile.assembly}. "
+        f"Phase II (Actions on the Objective): the company moves to {_obj(ctx)} and "
+        f"executes its task to {ctx.task} it, with a support-by-fire element isolating "
+        "the objective and an assault element clearing it. Phase III (Consolidation): "
+        "the company consolidates, reorganizes and prepares for follow-on missions."
+    )
+
+
+def _scheme_of_maneuver(ctx: _Context) -> str:
+    first, second, third, weapons = SUBORDINATE_UNITS[:4]
+    return (
+        f"After insertion onto {ctx.zone}, the company moves to the objective rally point. "
+        f"{weapons} and {third} establish support by fire on {_obj(ctx)}. {first} "
+        f"(main effort) assaults {_obj(ctx)}; {second} isolates the objective and blocks "
+        "enemy reinforcement. On the objective the company establishes a 360-degree "
+        "perimeter oriented on the most likely enemy counterattack routes."
+    )
+
+
+def _scheme_of_fires(ctx: _Context) -> str:
+    return (
+        f"Priority of fires to the support-by-fire element during the approach to "
+        f"{_obj(ctx)}, then to the main effort during the assault. Targets are planned on "
+        f"known enemy positions, on routes into {_obj(ctx)} and on likely counterattack "
+        f"routes. No fires on {ctx.zone} during insertion. Company mortars are positioned "
+        "to support the assault and consolidation."
+    )
+
+
+def _coordinating_instructions(ctx: _Context) -> str:
+    deadline = f" {ctx.time_limit}" if ctx.time_limit else ""
+    return (
+        f"Insertion by {ctx.profile.insertion} onto {ctx.zone}. Actions on {_obj(ctx)} "
+        f"complete{deadline}. Platoons report insertion complete, assembly complete, "
+        "objective complete and consolidation complete on the company net. Lost "
+        "personnel move to the nearest assembly point. ROE per higher headquarters."
+    )
+
+
+def _sustainment_logistics(ctx: _Context) -> str:
+    return (
+        "Soldiers carry 72 hours of Class I and water and a combat basic load of "
+        f"Class V. Resupply by {ctx.profile.resupply}. Company executive officer "
+        "tracks ammunition status reported during consolidation."
+    )
+
+
+def _sustainment_medical(ctx: _Context) -> str:
+    return (
+        "A combat medic accompanies each rifle platoon; every squad has combat lifesavers. "
+        f"Casualty collection point established near {ctx.zone} and moved forward to "
+        f"{_obj(ctx)} during consolidation. Evacuation: {ctx.profile.evacuation}. "
+        "Request MEDEVAC by 9-line on the company net."
+    )
+
+
+def _signal(ctx: _Context) -> str:
+    return (
+        "PACE: Primary company command net (FM); Alternate battalion command net; "
+        "Contingency runners and visual signals; Emergency pyrotechnics. Report "
+        f"insertion complete, {_obj(ctx)} complete and consolidation complete. "
+        "The company commander is located with the main effort."
+    )
+
+
+_DRAFTERS: Dict[str, Callable[[_Context], str]] = {
+    "enemy_capabilities": _enemy_capabilities,
+    "enemy_most_likely_coa": _enemy_most_likely_coa,
+    "enemy_most_dangerous_coa": _enemy_most_dangerous_coa,
+    "commanders_intent": _commanders_intent,
+    "concept_of_operations": _concept_of_operations,
+    "scheme_of_maneuver": _scheme_of_maneuver,
+    "scheme_of_fires": _scheme_of_fires,
+    "coordinating_instructions": _coordinating_instructions,
+    "sustainment_logistics": _sustainment_logistics,
+    "sustainment_medical": _sustainment_medical,
+    "signal": _signal,
+}
+
+# Form fields that can be drafted locally.
+DRAFT_FIELDS = list(_DRAFTERS)
+
+
+def _unit_tasks(ctx: _Context) -> Dict[str, str]:
+    # The same task organization as _scheme_of_maneuver.
+    first, second, third, weapons, hq = SUBORDINATE_UNITS
+    return {
+        first: f"Main effort. Assault and clear {_obj(ctx)}; on order, consolidate "
+               "and orient on the most likely counterattack route.",
+        second: f"Isolate {_obj(ctx)} and block enemy reinforcement; on order, "
+                "assume the main effort.",
+        third: f"With {weapons}, establish support by fire on {_obj(ctx)}; on order, "
+               "lift fires and follow and support the main effort.",
+        weapons: f"With {third}, establish support by fire on {_obj(ctx)}; mortars "
+                 "provide priority of fires to the main effort during the assault.",
+        hq: f"Control the insertion onto {ctx.zone}; establish the company CP and "
+            f"casualty collection point; coordinate resupply by {ctx.profile.resupply}.",
+    }
+
+
+def draft_section(key: str, form_data: dict) -> str:
+    """
+    Return a local draft of the auto-fill field *key* for *form_data*.
+
+    Raises
+    ------
+    KeyError
+        If *key* is not one of ``DRAFT_FIELDS``.
+    """
+    return _DRAFTERS[key](_context(form_data))
+
+
+def draft_sections(form_data: dict, keys: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Return local drafts for *keys* (default: every blank auto-fill field of
+    *form_data*), keyed by form field.
+    """
+    if keys is None:
+        keys = [key for key in DRAFT_FIELDS if not form_data.get(key)]
+    ctx = _context(form_data)
+    return {key: _DRAFTERS[key](ctx) for key in keys}
+
+
+def draft_tasks(form_data: dict) -> Dict[str, str]:
+    """
+    Return local drafts of every subordinate unit's task, keyed by unit.
+
+    Each draft is clipped to its task field's length limit, since long
+    zone or resupply names can push the template past it.
+    """
+    return {
+        unit: clip_to_limit(task_key(unit), task)
+        for unit, task in _unit_tasks(_context(form_data)).items()
+    }
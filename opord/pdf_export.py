@@ -0,0 +1,176 @@
+"""
+Local PDF export.
+
+Lays the five-paragraph order out on US Letter pages in the same
+monospaced layout as ``generate_text()``, with the classification banner
+at the top and bottom of every page and page numbers in the footer.  The
+PDF is written directly (no third-party dependency and no network), using
+the standard Courier fonts every PDF viewer provides, so nothing needs to
+be embedded.
+
+The font resources and the per-classification page template are built
+once per process and reused for every page of every order.
+"""
+
+import re
+import textwrap
+import zlib
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+from .generator import OPORDData, OPORDGenerator
+from .schema import opord_data_from_dict
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, in points
+MARGIN = 54
+FONT_SIZE = 9
+LEADING = 11
+# Courier glyphs are all 600/1000 em wide.
+CHAR_WIDTH = FONT_SIZE * 0.6
+COLUMNS = int((PAGE_WIDTH - 2 * MARGIN) // CHAR_WIDTH)
+# Body lines between the classification banners.
+LINES_PER_PAGE = int((PAGE_HEIGHT - 2 * MARGIN - 4 * LEADING) // LEADING)
+
+_TITLE = re.compile(r"^(\d\. [A-Z ]+|OPERATION ORDER .*|ACKNOWLEDGE)$")
+_SUBPARAGRAPH = re.compile(r"^  [a-z]\. \S")
+# Leading whitespace, plus an aligned "Label:   " prefix where present.
+_HANGING_INDENT = re.compile(r"^(\s*)(?:[^:]{1,40}:\s+)?")
+
+Line = Tuple[str, bool]  # (text, bold)
+
+
+def _escape(text: str) -> bytes:
+    """Encode *text* as the body of a PDF literal string (WinAnsi encoding)."""
+    data = text.encode("cp1252", errors="replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _wrap(line: str) -> List[str]:
+    """Wrap one layout line to the page width with a hanging indent."""
+    if len(line) <= COLUMNS:
+        return [line]
+    indent = " " * min(len(_HANGING_INDENT.match(line).group(0)), COLUMNS // 2)
+    return textwrap.wrap(
+        line, width=COLUMNS, subsequent_indent=indent,
+        break_long_words=True, break_on_hyphens=False, drop_whitespace=True,
+    ) or [""]
+
+
+def layout(text_lines: Iterable[str]) -> List[List[Line]]:
+    """Split the order's text lines into styled, wrapped lines per page."""
+    pages: List[List[Line]] = [[]]
+    for raw in text_lines:
+        bold = bool(_TITLE.match(raw) or _SUBPARAGRAPH.match(raw))
+        for line in _wrap(raw):
+            if len(pages[-1]) == LINES_PER_PAGE:
+                pages.append([])
+            pages[-1].append((line, bold))
+    # Do not start a page with blank lines.
+    for page in pages[1:]:
+        while page and not page[0][0].strip():
+            page.pop(0)
+    return [page for page in pages if page] or [[]]
+
+
+@lru_cache(maxsize=1)
+def _font_objects() -> Tuple[bytes, bytes]:
+    """The regular and bold font dictionaries (standard 14, WinAnsi)."""
+    return tuple(
+        f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} "
+        f"/Encoding /WinAnsiEncoding >>".encode("ascii")
+        for name in ("Courier", "Courier-Bold")
+    )
+
+
+@lru_cache(maxsize=16)
+def _page_template(classification: str) -> Tuple[bytes, bytes]:
+    """
+    Return the content-stream prefix and suffix shared by every page.
+
+    The prefix draws the classification banners; the suffix closes the text
+    object.  Page numbers and body lines go in between.
+    """
+    banner = _escape(classification)
+    x = (PAGE_WIDTH - len(classification) * CHAR_WIDTH) / 2
+    prefix = b"".join([
+        b"BT\n",
+        f"/F2 {FONT_SIZE} Tf\n".encode("ascii"),
+        f"1 0 0 1 {x:.2f} {PAGE_HEIGHT - MARGIN:.2f} Tm\n(".encode("ascii"), banner, b") Tj\n",
+        f"1 0 0 1 {x:.2f} {MARGIN:.2f} Tm\n(".encode("ascii"), banner, b") Tj\n",
+    ])
+    return prefix, b"ET\n"
+
+
+def _page_stream(lines: List[Line], classification: str, number: int, total: int) -> bytes:
+    prefix, suffix = _page_template(classification)
+    footer = f"Page {number} of {total}"
+    parts = [
+        prefix,
+        f"/F1 {FONT_SIZE} Tf\n1 0 0 1 {PAGE_WIDTH - MARGIN - len(footer) * CHAR_WIDTH:.2f} "
+        f"{MARGIN:.2f} Tm\n({footer}) Tj\n".encode("ascii"),
+        f"1 0 0 1 {MARGIN} {PAGE_HEIGHT - MARGIN - 3 * LEADING} Tm\n{LEADING} TL\n".encode("ascii"),
+    ]
+    current_bold = None
+    for text, bold in lines:
+        if bold != current_bold:
+            parts.append(f"/F{2 if bold else 1} {FONT_SIZE} Tf\n".encode("ascii"))
+            current_bold = bold
+        parts += [b"(", _escape(text), b") '\n"]
+    parts.append(suffix)
+    return zlib.compress(b"".join(parts), 6)
+
+
+def render_pdf_data(data: OPORDData) -> bytes:
+    """Render an order to PDF bytes."""
+    text_lines = OPORDGenerator(data).generate_text().split("\n")
+    # The banners are drawn on every page by the template.
+    if text_lines and text_lines[0] == data.classification:
+        text_lines = text_lines[1:]
+    if text_lines and text_lines[-1] == data.classification:
+        text_lines = text_lines[:-1]
+    pages = layout(text_lines)
+
+    regular, bold = _font_objects()
+    title = _escape(f"OPORD {data.operation_name or 'TBD'}")
+    # Object numbers: 1 catalog, 2 page tree, 3-4 fonts, 5 info, then a
+    # (page, contents) pair per page.
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(
+            f"{6 + 2 * i} 0 R".encode("ascii") for i in range(len(pages))
+        ) + f"] /Count {len(pages)} >>".encode("ascii"),
+        regular,
+        bold,
+        b"<< /Title (" + title + b") /Producer (Charlie OPORD Wizard) >>",
+    ]
+    for number, page in enumerate(pages, start=1):
+        stream = _page_stream(page, data.classification, number, len(pages))
+        contents_id = 5 + 2 * number
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+            f"/Contents {contents_id} 0 R >>".encode("ascii")
+        )
+        objects.append(
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii")
+            + stream + b"\nendstream"
+        )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("ascii") for offset in offsets)
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R /Info 5 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("ascii")
+    return bytes(out)
+
+
+def render_pdf(document: dict) -> bytes:
+    """Render a ``generate_dict()`` order dict to PDF bytes."""
+    return render_pdf_data(opord_data_from_dict(document))
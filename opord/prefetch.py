@@ -0,0 +1,314 @@
+"""
+Speculative AI suggestion prefetch.
+
+The fields that feed the operational summary (operation name, mission,
+insert method, DZ/LZ and enemy composition) are usually settled minutes
+before the OPORD form is submitted.  The form calls ``/api/suggest`` once
+they stop changing; the prefetcher then runs the same enrichment as
+``/generate`` (:func:`~opord.ai_helper.generate_full_opord`, in the
+configured AI mode, including the subordinate tasks call) in a background
+thread and caches each section under the summary hash as it arrives, so
+``/generate`` can reuse them instead of waiting on the upstream API.
+Prefetched tasks are only reused while the scheme of maneuver and the tasks
+given by the user are the ones they were written against.
+
+The cache lives in the shared SQLite database, so ``/generate`` finds the
+sections even when a different server worker ran the prefetch, and a job
+running in one worker is not started again by another.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from .ai_helper import (
+    AUTO_FILL_FIELDS,
+    build_op_summary,
+    generate_full_opord,
+    summary_key,
+)
+from .db import connect, default_db_path
+from .schema import TASK_FIELDS
+
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_ENTRIES = 256
+
+# A prefetch job claims its summary for this long, so other workers neither
+# start a duplicate job nor wait forever on one whose worker died.
+CLAIM_SECONDS = 5 * 60
+
+# How often a lookup checks for a job running in another worker.
+POLL_SECONDS = 0.25
+
+# Cache field holding what the cached tasks were written against.
+TASKS_BASIS_FIELD = "_tasks_basis"
+
+_PREFETCHED_FIELDS = [key for key, _ in AUTO_FILL_FIELDS] + [key for _, key in TASK_FIELDS]
+
+
+def _tasks_basis(form_data: dict, sections: dict) -> str:
+    """Fingerprint the scheme of maneuver and user-given tasks the tasks follow."""
+    scheme = form_data.get("scheme_of_maneuver") or sections.get("scheme_of_maneuver") or ""
+    given = [form_data.get(key) or "" for _, key in TASK_FIELDS]
+    return hashlib.sha256(json.dumps([scheme, given]).encode("utf-8")).hexdigest()
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS suggestion_entries (
+        key           TEXT PRIMARY KEY,
+        stored        REAL NOT NULL,
+        running_until REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS suggestion_sections (
+        key   TEXT NOT NULL,
+        field TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (key, field)
+    ) WITHOUT ROWID
+    """,
+)
+
+
+class SuggestionCache:
+    """
+    Size-bounded cache of generated sections per summary key, stored in
+    SQLite so that every worker process sees every prefetch.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        conn = connect(path)
+        try:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> dict:
+        """Return the cached sections for *key* (empty if none or expired)."""
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT stored FROM suggestion_entries WHERE key = ?", (key,)
+            ).fetchone()
+            sections = {} if row is None or time.time() - row[0] > self.ttl else dict(
+                conn.execute(
+                    "SELECT field, value FROM suggestion_sections WHERE key = ?", (key,)
+                ).fetchall()
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return sections
+
+    def update(self, key: str, sections: dict) -> None:
+        """Merge *sections* into the entry for *key*."""
+        now = time.time()
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT stored FROM suggestion_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[0] > self.ttl:
+                # Expired sections are not merged into the fresh entry.
+                conn.execute("DELETE FROM suggestion_sections WHERE key = ?", (key,))
+            conn.execute(
+                "INSERT INTO suggestion_entries (key, stored) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET stored = excluded.stored",
+                (key, now),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO suggestion_sections (key, field, value) VALUES (?, ?, ?)",
+                [(key, field, value) for field, value in sections.items()],
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, key: str, seconds: float = CLAIM_SECONDS) -> bool:
+        """Mark a prefetch of *key* as running; False if one already is."""
+        now = time.time()
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT running_until FROM suggestion_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[0] > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT INTO suggestion_entries (key, stored, running_until) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET running_until = excluded.running_until",
+                (key, now, now + seconds),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return True
+
+    def release(self, key: str) -> None:
+        """Mark the prefetch of *key* as finished."""
+        conn = connect(self.path)
+        try:
+            conn.execute(
+                "UPDATE suggestion_entries SET running_until = 0 WHERE key = ?", (key,)
+            )
+        finally:
+            conn.close()
+
+    def running(self, key: str) -> bool:
+        """Return True while some worker's prefetch of *key* is running."""
+        conn = connect(self.path)
+        try:
+            row = conn.execute(
+                "SELECT running_until FROM suggestion_entries WHERE key = ?", (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None and row[0] > time.time()
+
+    def clear(self) -> None:
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM suggestion_sections")
+            conn.execute("DELETE FROM suggestion_entries")
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now: float) -> None:
+        """Drop expired entries and all but the ``max_entries`` newest."""
+        conn.execute(
+            "DELETE FROM suggestion_entries WHERE running_until <= ? AND (stored < ? OR key IN "
+            "(SELECT key FROM suggestion_entries ORDER BY stored DESC LIMIT -1 OFFSET ?))",
+            (now, now - self.ttl, self.max_entries),
+        )
+        conn.execute(
+            "DELETE FROM suggestion_sections WHERE key NOT IN (SELECT key FROM suggestion_entries)"
+        )
+
+
+class Prefetcher:
+    """Run AI enrichment ahead of form submission and cache the results."""
+
+    def __init__(self, cache: Optional[SuggestionCache] = None, max_workers: int = 2):
+        self.cache = cache or SuggestionCache(default_db_path())
+        # Threads are only started on first submit, so it is safe to create
+        # the prefetcher before a pre-forking server forks its workers.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="opord-prefetch"
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, form_data: dict, model: Optional[str] = None,
+               examples: Optional[dict] = None) -> Tuple[str, str]:
+        """
+        Start generating the blank auto-fill sections and tasks of *form_data*.
+
+        *examples* maps form fields to text from a similar past order, given
+        to the model as an example of that section.
+
+        Returns
+        -------
+        tuple of (str, str)
+            The summary key and a status: ``"ready"`` when every wanted
+            section is cached, ``"pending"`` when a job for this summary is
+            already running, or ``"started"`` when a new job was queued.
+        """
+        op_summary = build_op_summary(form_data)
+        key = summary_key(op_summary, model)
+        cached = self._usable(form_data, self.cache.get(key))
+        if all(form_data.get(field) or field in cached for field in _PREFETCHED_FIELDS):
+            return key, "ready"
+
+        with self._lock:
+            running = self._inflight.get(key)
+            if running is not None and not running.done():
+                return key, "pending"
+            if not self.cache.claim(key):
+                # Another worker process is already prefetching it.
+                return key, "pending"
+            self._inflight[key] = self._executor.submit(
+                self._run, key, dict(form_data), cached, model, examples or {},
+            )
+        return key, "started"
+
+    def lookup(self, form_data: dict, model: Optional[str] = None,
+               timeout: Optional[float] = None) -> dict:
+        """
+        Return cached sections (and tasks) for the summary of *form_data*.
+
+        If a prefetch for the same summary is still running, in this or
+        another worker process, wait up to *timeout* seconds for it to
+        finish first; whatever is cached by then is returned.  Tasks written
+        against a different scheme of maneuver or different user-given tasks
+        are left out.
+        """
+        key = summary_key(build_op_summary(form_data), model)
+        with self._lock:
+            running = self._inflight.get(key)
+        if running is not None and timeout:
+            try:
+                running.result(timeout=timeout)
+            except Exception:  # noqa: BLE001
+                pass
+        elif timeout:
+            deadline = time.monotonic() + timeout
+            while self.cache.running(key) and time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+        return self._usable(form_data, self.cache.get(key))
+
+    @staticmethod
+    def _usable(form_data: dict, sections: dict) -> dict:
+        """Drop the tasks of *sections* unless they follow *form_data*."""
+        basis = sections.pop(TASKS_BASIS_FIELD, None)
+        if basis != _tasks_basis(form_data, sections):
+            for _, field in TASK_FIELDS:
+                sections.pop(field, None)
+        return sections
+
+    def _run(self, key: str, form_data: dict, cached: dict,
+             model: Optional[str], examples: dict) -> None:
+        known = dict(cached)
+
+        def store(sections: dict) -> None:
+            known.update(sections)
+            if any(field in sections for _, field in TASK_FIELDS):
+                sections = dict(sections, **{TASKS_BASIS_FIELD: _tasks_basis(form_data, known)})
+            self.cache.update(key, sections)
+
+        try:
+            generate_full_opord(
+                form_data, model=model, prefilled=cached, examples=examples,
+                source="prefetch", on_generated=store,
+            )
+        except Exception:  # noqa: BLE001
+            # Leave the rest for /generate to generate.
+            pass
+        finally:
+            self.cache.release(key)
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,184 @@
+"""
+Token-bucket rate limiting for OpenAI calls, shared across processes.
+
+Each app worker fans out several AI calls per OPORD, so bursts from a few
+workers easily exceed the account's requests-per-minute (RPM) and
+tokens-per-minute (TPM) limits.  The buckets live in a small SQLite file so
+every worker process on the host draws from the same budget; no external
+service (Redis etc.) is needed.
+
+Configuration (environment variables)
+-------------------------------------
+OPENAI_RPM               Requests per minute (default 500; 0 disables limiting).
+OPENAI_TPM               Tokens per minute (default 30000; 0 disables the TPM bucket).
+OPENAI_RATE_LIMIT_DB     Path of the shared SQLite file
+                         (default: <tempdir>/opord_openai_ratelimit.sqlite3).
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Optional
+
+from .db import connect
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 30000
+DEFAULT_DB_NAME = "opord_openai_ratelimit.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name          TEXT PRIMARY KEY,
+    requests      REAL NOT NULL,
+    tokens        REAL NOT NULL,
+    updated       REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity does not become available within the timeout."""
+
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets stored in SQLite.
+
+    Parameters
+    ----------
+    path : str
+        SQLite file shared by every process that should share the budget.
+    requests_per_minute : int
+        Request bucket capacity, refilled continuously over one minute.
+    tokens_per_minute : int
+        Token bucket capacity; 0 disables token accounting.
+    name : str
+        Bucket name, allowing several independent budgets in one file.
+    clock, sleep : callable, optional
+        Time source and sleep function (overridable for tests).
+    """
+
+    def __init__(self, path: str, requests_per_minute: int, tokens_per_minute: int = 0,
+                 name: str = "openai", clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.path = path
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.name = name
+        self._clock = clock
+        self._sleep = sleep
+        # A fresh connection per operation keeps the limiter safe to use
+        # from forked workers and from several threads at once.
+        conn = connect(self.path)
+        try:
+            conn.execute(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _refill(self, conn: sqlite3.Connection, now: float):
+        row = conn.execute(
+            "SELECT requests, tokens, updated, blocked_until FROM buckets WHERE name = ?",
+            (self.name,),
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO buckets (name, requests, tokens, updated) VALUES (?, ?, ?, ?)",
+                (self.name, float(self.rpm), float(self.tpm), now),
+            )
+            return float(self.rpm), float(self.tpm), 0.0
+        requests, tokens, updated, blocked_until = row
+        elapsed = max(0.0, now - updated)
+        requests = min(float(self.rpm), requests + elapsed * self.rpm / 60.0)
+        tokens = min(float(self.tpm), tokens + elapsed * self.tpm / 60.0)
+        return requests, tokens, blocked_until
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> float:
+        """
+        Block until one request and *tokens* tokens are available, then take them.
+
+        Returns
+        -------
+        float
+            Seconds spent waiting.
+        """
+        needed = float(min(tokens, self.tpm)) if self.tpm else 0.0
+        start = self._clock()
+        while True:
+            now = self._clock()
+            conn = connect(self.path)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                requests, available, blocked_until = self._refill(conn, now)
+                if now >= blocked_until and requests >= 1.0 and available >= needed:
+                    conn.execute(
+                        "UPDATE buckets SET requests = ?, tokens = ?, updated = ? WHERE name = ?",
+                        (requests - 1.0, available - needed, now, self.name),
+                    )
+                    conn.execute("COMMIT")
+                    return now - start
+                conn.execute(
+                    "UPDATE buckets SET requests = ?, tokens = ?, updated = ? WHERE name = ?",
+                    (requests, available, now, self.name),
+                )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+            wait = max(
+                blocked_until - now,
+                (1.0 - requests) * 60.0 / self.rpm,
+                (needed - available) * 60.0 / self.tpm if self.tpm else 0.0,
+                0.01,
+            )
+            if timeout is not None and now + wait - start > timeout:
+                raise RateLimitTimeout(
+                    f"OpenAI rate limit capacity not available within {timeout:.0f}s"
+                )
+            self._sleep(wait)
+
+    def refund(self, tokens: float) -> None:
+        """Return over-estimated tokens (or charge under-estimated ones if negative)."""
+        if not self.tpm or not tokens:
+            return
+        now = self._clock()
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            requests, available, _ = self._refill(conn, now)
+            available = min(float(self.tpm), available + tokens)
+            conn.execute(
+                "UPDATE buckets SET requests = ?, tokens = ?, updated = ? WHERE name = ?",
+                (requests, available, now, self.name),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def block_for(self, seconds: float) -> None:
+        """Pause every process sharing this bucket for *seconds* (e.g. after a 429)."""
+        until = self._clock() + seconds
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._refill(conn, self._clock())
+            conn.execute(
+                "UPDATE buckets SET blocked_until = MAX(blocked_until, ?) WHERE name = ?",
+                (until, self.name),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+
+def limiter_from_env() -> Optional[TokenBucketLimiter]:
+    """Build the OpenAI limiter from environment variables, or None if disabled."""
+    rpm = int(os.environ.get("OPENAI_RPM", DEFAULT_RPM) or 0)
+    if rpm <= 0:
+        return None
+    tpm = int(os.environ.get("OPENAI_TPM", DEFAULT_TPM) or 0)
+    path = os.environ.get("OPENAI_RATE_LIMIT_DB") or os.path.join(
+        tempfile.gettempdir(), DEFAULT_DB_NAME
+    )
+    return TokenBucketLimiter(path, rpm, max(tpm, 0))
@@ -0,0 +1,274 @@
+"""
+Versioned OPORD revision store.
+
+Every generated order is saved as a new revision of its operation (keyed
+by operation name).  Revisions are stored as compressed field-level deltas
+against the previous revision, with a full snapshot every
+``SNAPSHOT_INTERVAL`` revisions so that checking out any version replays
+at most ``SNAPSHOT_INTERVAL - 1`` deltas.
+
+Documents are the nested dicts produced by ``OPORDGenerator.generate_dict()``;
+deltas and diffs work on their leaf fields (e.g. ``situation.enemy.strength``).
+"""
+
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import connect
+
+# A full snapshot is written every N revisions.
+SNAPSHOT_INTERVAL = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    operation   TEXT    NOT NULL,
+    version     INTEGER NOT NULL,
+    is_snapshot INTEGER NOT NULL,
+    payload     BLOB    NOT NULL,
+    created     REAL    NOT NULL,
+    PRIMARY KEY (operation, version)
+)
+"""
+
+Path = Tuple[str, ...]
+
+
+@dataclass
+class FieldChange:
+    """One leaf field that differs between two revisions."""
+    path: str
+    old: Any
+    new: Any
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "old": self.old, "new": self.new}
+
+
+@dataclass
+class RevisionInfo:
+    """Metadata for one stored revision."""
+    version: int
+    created: float
+    is_snapshot: bool
+    stored_bytes: int
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "created": self.created,
+            "is_snapshot": self.is_snapshot,
+            "stored_bytes": self.stored_bytes,
+        }
+
+
+def flatten(document: dict, prefix: Path = ()) -> Dict[Path, Any]:
+    """Flatten nested dicts into ``{path tuple: leaf value}``."""
+    flat: Dict[Path, Any] = {}
+    for key, value in document.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, path))
+        else:
+            flat[path] = value
+    return flat
+
+
+def unflatten(flat: Dict[Path, Any]) -> dict:
+    """Inverse of :func:`flatten`."""
+    document: dict = {}
+    for path, value in flat.items():
+        target = document
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return document
+
+
+_MISSING = object()
+
+
+def _encode(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decode(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def _make_delta(old: Dict[Path, Any], new: Dict[Path, Any]) -> dict:
+    return {
+        "set": [[list(path), value] for path, value in new.items() if old.get(path, _MISSING) != value],
+        "del": [list(path) for path in old if path not in new],
+    }
+
+
+def _apply_delta(state: Dict[Path, Any], delta: dict) -> None:
+    for path in delta["del"]:
+        state.pop(tuple(path), None)
+    for path, value in delta["set"]:
+        state[tuple(path)] = value
+
+
+class RevisionStore:
+    """SQLite-backed store of delta-compressed OPORD revisions."""
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = connect(path)
+        try:
+            conn.execute(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _load_flat(self, conn, operation: str, version: int) -> Optional[Dict[Path, Any]]:
+        rows = conn.execute(
+            """
+            SELECT version, is_snapshot, payload FROM revisions
+            WHERE operation = ? AND version <= ? AND version >= (
+                SELECT MAX(version) FROM revisions
+                WHERE operation = ? AND version <= ? AND is_snapshot = 1
+            )
+            ORDER BY version
+            """,
+            (operation, version, operation, version),
+        ).fetchall()
+        if not rows or rows[-1][0] != version:
+            return None
+        state: Dict[Path, Any] = {}
+        for _, is_snapshot, payload in rows:
+            if is_snapshot:
+                state = {tuple(path): value for path, value in _decode(payload)}
+            else:
+                _apply_delta(state, _decode(payload))
+        return state
+
+    def save(self, operation: str, document: dict) -> int:
+        """
+        Store *document* as the next revision of *operation*.
+
+        Returns the new version number, or the latest existing version if
+        the document is unchanged since then.
+        """
+        new_flat = flatten(document)
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            latest = conn.execute(
+                "SELECT MAX(version) FROM revisions WHERE operation = ?", (operation,)
+            ).fetchone()[0] or 0
+            version = latest + 1
+            if latest and (version - 1) % SNAPSHOT_INTERVAL != 0:
+                old_flat = self._load_flat(conn, operation, latest)
+                delta = _make_delta(old_flat, new_flat)
+                if not delta["set"] and not delta["del"]:
+                    conn.execute("ROLLBACK")
+                    return latest
+                is_snapshot, payload = 0, _encode(delta)
+            else:
+                if latest and self._load_flat(conn, operation, latest) == new_flat:
+                    conn.execute("ROLLBACK")
+                    return latest
+                is_snapshot = 1
+                payload = _encode([[list(path), value] for path, value in new_flat.items()])
+            conn.execute(
+                "INSERT INTO revisions (operation, version, is_snapshot, payload, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (operation, version, is_snapshot, payload, time.time()),
+            )
+            conn.execute("COMMIT")
+            return version
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def latest_version(self, operation: str) -> int:
+        """Return the newest version number of *operation* (0 if none)."""
+        conn = connect(self.path)
+        try:
+            row = conn.execute(
+                "SELECT MAX(version) FROM revisions WHERE operation = ?", (operation,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] or 0
+
+    def latest_versions(self) -> Dict[str, int]:
+        """
+        Return ``{operation: newest version}`` for every stored operation,
+        least recently saved first.
+        """
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT operation, MAX(version) FROM revisions "
+                "GROUP BY operation ORDER BY MAX(created)"
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def checkout(self, operation: str, version: Optional[int] = None) -> Optional[dict]:
+        """Return the document at *version* (default: latest), or None if absent."""
+        if version is None:
+            version = self.latest_version(operation)
+        if version < 1:
+            return None
+        conn = connect(self.path)
+        try:
+            flat = self._load_flat(conn, operation, version)
+        finally:
+            conn.close()
+        return unflatten(flat) if flat is not None else None
+
+    def history(self, operation: str) -> List[RevisionInfo]:
+        """Return metadata for every revision of *operation*, oldest first."""
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT version, created, is_snapshot, LENGTH(payload) FROM revisions "
+                "WHERE operation = ? ORDER BY version",
+                (operation,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [RevisionInfo(v, created, bool(snap), size) for v, created, snap, size in rows]
+
+    def operations(self) -> List[str]:
+        """Return the names of all stored operations."""
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT DISTINCT operation FROM revisions ORDER BY operation"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def diff(self, operation: str, from_version: int, to_version: int) -> Optional[List[FieldChange]]:
+        """
+        Return the leaf fields that differ between two versions.
+
+        Version 0 is the empty document before the first revision, so the
+        first revision diffs as every field added.  Returns None if either
+        version does not exist.
+        """
+        conn = connect(self.path)
+        try:
+            old = {} if from_version == 0 else self._load_flat(conn, operation, from_version)
+            new = self._load_flat(conn, operation, to_version)
+        finally:
+            conn.close()
+        if old is None or new is None:
+            return None
+        changes = []
+        for path in sorted(set(old) | set(new)):
+            before, after = old.get(path), new.get(path)
+            if before != after:
+                changes.append(FieldChange(".".join(path), before, after))
+        return changes
@@ -0,0 +1,274 @@
+"""
+Form schema for the OPORD data model.
+
+``FIELDS`` maps every flat form key (as used by the HTML form, the AI
+helper and the JSON APIs) to its location in ``OPORDData``, together with
+its paragraph, label and length limit.  ``validate_form`` and
+``parse_form`` use the table to clean and validate a submitted form in a
+single pass and report structured per-field errors.
+"""
+
+import os
+from dataclasses import asdict, dataclass
+from typing import List, Mapping, Tuple
+
+from .generator import OPORDData, SUBORDINATE_UNITS
+
+DEFAULT_CLASSIFICATION = "UNCLASSIFIED // TRAINING USE ONLY"
+
+# Length limits (characters) for single-line inputs and free-text areas,
+# configurable with OPORD_MAX_SHORT_FIELD_CHARS / OPORD_MAX_FIELD_CHARS.
+SHORT_TEXT = int(os.environ.get("OPORD_MAX_SHORT_FIELD_CHARS", 200))
+LONG_TEXT = int(os.environ.get("OPORD_MAX_FIELD_CHARS", 4000))
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """One flat form field and where it lives in ``OPORDData``."""
+    key: str
+    path: Tuple[str, ...]
+    label: str
+    paragraph: int  # 0 = heading, 1-5 = OPORD paragraph
+    max_length: int = LONG_TEXT
+    default: str = ""
+    required: bool = False
+
+
+@dataclass
+class FieldError:
+    """A validation problem with one form field."""
+    field: str
+    message: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def task_key(unit: str) -> str:
+    """Return the form key for a subordinate unit's task (e.g. ``task_1st``)."""
+    return f"task_{unit.split()[0].lower()}"
+
+
+FIELDS: List[FieldSpec] = [
+    # Heading
+    FieldSpec("operation_name", ("operation_name",), "Operation Name", 0, SHORT_TEXT, required=True),
+    FieldSpec("classification", ("classification",), "Classification", 0, SHORT_TEXT,
+              default=DEFAULT_CLASSIFICATION),
+    FieldSpec("dtg", ("dtg",), "Date-Time Group", 0, SHORT_TEXT),
+    FieldSpec("reference_maps", ("reference_maps",), "Reference Map(s)", 0, SHORT_TEXT),
+    FieldSpec("time_zone", ("time_zone",), "Time Zone", 0, SHORT_TEXT, default="ZULU"),
+    FieldSpec("insert_method", ("insert_method",), "Insert Method", 0, SHORT_TEXT),
+    FieldSpec("dz_lz", ("dz_lz",), "DZ / LZ", 0, SHORT_TEXT),
+    # Paragraph 1 - Situation
+    FieldSpec("enemy_composition", ("situation", "enemy", "composition"), "Enemy Composition", 1, SHORT_TEXT),
+    FieldSpec("enemy_disposition", ("situation", "enemy", "disposition"), "Enemy Disposition", 1, SHORT_TEXT),
+    FieldSpec("enemy_strength", ("situation", "enemy", "strength"), "Enemy Strength", 1, SHORT_TEXT),
+    FieldSpec("enemy_recent_activity", ("situation", "enemy", "recent_activity"),
+              "Enemy Recent Activity", 1, SHORT_TEXT),
+    FieldSpec("enemy_capabilities", ("situation", "enemy", "capabilities"), "Enemy Capabilities", 1),
+    FieldSpec("enemy_most_likely_coa", ("situation", "enemy", "most_likely_coa"), "Enemy Most Likely COA", 1),
+    FieldSpec("enemy_most_dangerous_coa", ("situation", "enemy", "most_dangerous_coa"),
+              "Enemy Most Dangerous COA", 1),
+    FieldSpec("friendly_higher_hq_mission", ("situation", "friendly", "higher_hq_mission"),
+              "Higher HQ Mission", 1),
+    FieldSpec("friendly_adjacent_units", ("situation", "friendly", "adjacent_units"),
+              "Adjacent Units", 1, SHORT_TEXT),
+    FieldSpec("friendly_supporting_units", ("situation", "friendly", "supporting_units"),
+              "Supporting Units", 1, SHORT_TEXT),
+    FieldSpec("attachments_detachments", ("situation", "attachments_detachments"),
+              "Attachments and Detachments", 1),
+    FieldSpec("civil_considerations", ("situation", "civil_considerations"), "Civil Considerations", 1),
+    # Paragraph 2 - Mission
+    FieldSpec("mission", ("mission",), "Mission Statement", 2, required=True),
+    # Paragraph 3 - Execution
+    FieldSpec("commanders_intent", ("execution", "commanders_intent"), "Commander's Intent", 3),
+    FieldSpec("concept_of_operations", ("execution", "concept_of_operations"), "Concept of Operations", 3),
+    FieldSpec("scheme_of_maneuver", ("execution", "scheme_of_maneuver"), "Scheme of Maneuver", 3),
+    FieldSpec("scheme_of_fires", ("execution", "scheme_of_fires"), "Scheme of Fires", 3),
+] + [
+    FieldSpec(task_key(unit), ("execution", "tasks_to_subordinates", unit), f"Task: {unit}", 3, SHORT_TEXT)
+    for unit in SUBORDINATE_UNITS
+] + [
+    FieldSpec("coordinating_instructions", ("execution", "coordinating_instructions"),
+              "Coordinating Instructions", 3),
+    FieldSpec("rules_of_engagement", ("execution", "rules_of_engagement"), "Rules of Engagement", 3),
+    # Paragraph 4 - Sustainment
+    FieldSpec("sustainment_logistics", ("sustainment", "logistics"), "Logistics", 4),
+    FieldSpec("sustainment_personnel", ("sustainment", "personnel"), "Personnel", 4),
+    FieldSpec("sustainment_medical", ("sustainment", "medical"), "Medical", 4),
+    # Paragraph 5 - Command and Signal
+    FieldSpec("command_cp", ("command_and_signal", "command"), "CP Location", 5, SHORT_TEXT),
+    FieldSpec("succession_of_command", ("command_and_signal", "succession_of_command"),
+              "Succession of Command", 5, SHORT_TEXT),
+    FieldSpec("signal", ("command_and_signal", "signal"), "Signal / PACE Plan", 5),
+    FieldSpec("frequencies", ("command_and_signal", "frequencies"), "Frequencies", 5, SHORT_TEXT),
+    FieldSpec("challenge_and_password", ("command_and_signal", "challenge_and_password"),
+              "Challenge / Password", 5, SHORT_TEXT),
+]
+
+FIELDS_BY_KEY = {spec.key: spec for spec in FIELDS}
+
+# FieldSpec.paragraph -> title, e.g. for paragraph locks on shared drafts.
+PARAGRAPH_TITLES = {
+    0: "Heading",
+    1: "Situation",
+    2: "Mission",
+    3: "Execution",
+    4: "Sustainment",
+    5: "Command and Signal",
+}
+
+# (unit, form key) pairs for the "Tasks to Subordinate Units" inputs.
+TASK_FIELDS = [(unit, task_key(unit)) for unit in SUBORDINATE_UNITS]
+
+# Form key -> per-field length limit, e.g. for ``maxlength`` attributes.
+FIELD_LIMITS = {spec.key: spec.max_length for spec in FIELDS}
+
+
+def validate_form(form: Mapping, partial: bool = False) -> Tuple[dict, List[FieldError]]:
+    """
+    Clean and validate a flat form mapping in one pass over the schema.
+
+    Parameters
+    ----------
+    form : Mapping
+        A dict, werkzeug ``MultiDict`` or decoded JSON object.  Unknown keys
+        are ignored.
+    partial : bool
+        If True, required fields may be missing (e.g. for autosave or
+        suggestion requests on a half-filled form).
+
+    Returns
+    -------
+    tuple of (dict, list of FieldError)
+        The cleaned ``{form key: stripped string}`` mapping for every schema
+        field, and any validation errors.
+    """
+    cleaned = {}
+    errors: List[FieldError] = []
+    for spec in FIELDS:
+        value = _clean_field(spec, form.get(spec.key), errors)
+        if spec.required and not partial and not value:
+            errors.append(FieldError(spec.key, f"{spec.label} is required."))
+        cleaned[spec.key] = value
+    return cleaned, errors
+
+
+def _clean_field(spec: FieldSpec, value, errors: List[FieldError]) -> str:
+    if value is None:
+        return spec.default
+    if not isinstance(value, str):
+        errors.append(FieldError(spec.key, f"{spec.label} must be text."))
+        return spec.default
+    value = value.strip()
+    if len(value) > spec.max_length:
+        errors.append(FieldError(
+            spec.key,
+            f"{spec.label} is too long ({len(value)} characters; "
+            f"the limit is {spec.max_length}).",
+        ))
+    return value
+
+
+def clip_to_limit(key: str, value: str) -> str:
+    """
+    Shorten generated text to the length limit of form field *key*.
+
+    The cut falls on a word boundary where possible and is marked with
+    "...", so the result always passes :func:`validate_form`.
+    """
+    limit = FIELDS_BY_KEY[key].max_length
+    value = value.strip()
+    if len(value) <= limit:
+        return value
+    cut = value[:limit - 3]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:") + "..."
+
+
+def validate_fields(changes: Mapping) -> Tuple[dict, List[FieldError]]:
+    """
+    Clean and validate only the fields present in *changes*.
+
+    Used for field deltas (e.g. autosave), where the work should follow the
+    size of the edit rather than of the form.  Unknown keys are errors here.
+    """
+    cleaned = {}
+    errors: List[FieldError] = []
+    for key, value in changes.items():
+        spec = FIELDS_BY_KEY.get(key)
+        if spec is None:
+            errors.append(FieldError(str(key), f"Unknown field {key!r}."))
+            continue
+        cleaned[key] = _clean_field(spec, value, errors)
+    return cleaned, errors
+
+
+def build_opord_data(cleaned: Mapping) -> OPORDData:
+    """Build an ``OPORDData`` object from a cleaned flat form mapping."""
+    data = OPORDData()
+    for spec in FIELDS:
+        value = cleaned.get(spec.key, spec.default)
+        *parents, attr = spec.path
+        target = data
+        for name in parents:
+            target = getattr(target, name)
+        if isinstance(target, dict):
+            # Subordinate tasks: only units with a task are listed.
+            if value:
+                target[attr] = value
+        else:
+            setattr(target, attr, value)
+    return data
+
+
+def form_from_dict(document: Mapping) -> dict:
+    """
+    Return the flat form mapping for an order dict.
+
+    Inverse of ``OPORDGenerator(build_opord_data(form)).generate_dict()``:
+    *document* is a nested dict as produced by ``generate_dict()`` (e.g. a
+    stored revision); missing fields get their defaults.
+    """
+    form = {}
+    for spec in FIELDS:
+        value = document
+        for name in spec.path:
+            value = value.get(name) if isinstance(value, Mapping) else None
+        form[spec.key] = value if isinstance(value, str) else spec.default
+    return form
+
+
+def _scalars_as_text(value):
+    if isinstance(value, Mapping):
+        return {key: _scalars_as_text(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, list)):
+        return value
+    return str(value)
+
+
+def normalize_form(data: Mapping) -> dict:
+    """
+    Return the flat form mapping for an order read from a file.
+
+    *data* is either a flat form mapping or a nested ``generate_dict()``-style
+    order.  Scalars that YAML parses as numbers or dates (e.g. ``strength:
+    30``) are turned back into text.
+    """
+    data = _scalars_as_text(data)
+    if isinstance(data.get("situation"), Mapping) or isinstance(data.get("execution"), Mapping):
+        data = form_from_dict(data)
+    return data
+
+
+def opord_data_from_dict(document: Mapping) -> OPORDData:
+    """Rebuild the ``OPORDData`` behind a ``generate_dict()`` dict."""
+    return build_opord_data(form_from_dict(document))
+
+
+def parse_form(form: Mapping, partial: bool = False) -> Tuple[OPORDData, List[FieldError]]:
+    """Validate *form* and build the ``OPORDData`` it describes."""
+    cleaned, errors = validate_form(form, partial=partial)
+    return build_opord_data(cleaned), errors
+
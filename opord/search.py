@@ -0,0 +1,246 @@
+"""
+Full-text search over past OPORDs.
+
+Each operation's latest revision is indexed in an SQLite FTS5 table, with
+the fields planners search by most (operation name, mission, enemy
+composition, insert method, DZ/LZ, concept of operations) in their own
+weighted columns and every other text field in a catch-all column.
+Words are stemmed ("raids" matches "raid"), results are ranked with BM25
+and come back with a highlighted snippet.
+"""
+
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from markupsafe import Markup, escape
+
+from .db import connect
+from .revisions import flatten
+from .schema import FIELDS_BY_KEY
+
+# Indexed form fields, in column order, and their BM25 weights.  Anything
+# else in the order goes into the trailing ``body`` column.
+INDEXED_FIELDS = [
+    ("operation_name", 4.0),
+    ("mission", 3.0),
+    ("enemy_composition", 2.0),
+    ("insert_method", 2.0),
+    ("dz_lz", 2.0),
+    ("concept_of_operations", 1.5),
+]
+BODY_WEIGHT = 0.5
+
+MAX_RESULTS = 100
+
+_COLUMNS = [key for key, _ in INDEXED_FIELDS] + ["body"]
+_INDEXED_PATHS = {FIELDS_BY_KEY[key].path: key for key, _ in INDEXED_FIELDS}
+_BM25_WEIGHTS = ", ".join(str(w) for _, w in INDEXED_FIELDS) + f", {BODY_WEIGHT}"
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS search_docs (
+        id        INTEGER PRIMARY KEY,
+        operation TEXT    NOT NULL UNIQUE,
+        version   INTEGER NOT NULL,
+        updated   REAL    NOT NULL
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+        {", ".join(_COLUMNS)},
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+]
+
+# Private-use markers around matched terms in snippets; swapped for <mark>
+# after the rest of the snippet has been HTML-escaped.
+_HIT_OPEN, _HIT_CLOSE = "\ue000", "\ue001"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_available() -> bool:
+    """Return True if the linked SQLite library was built with FTS5."""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match (implicit AND); the last word also matches as a
+    prefix so partially typed queries work.  Words are quoted, so FTS5
+    operators and punctuation in user input are treated as plain text.
+    Returns None if *text* contains no words.
+    """
+    terms = _TERM_RE.findall(text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _document_columns(document: dict) -> List[str]:
+    """Split an order dict into the FTS column values."""
+    columns = {key: "" for key, _ in INDEXED_FIELDS}
+    body = []
+    for path, value in flatten(document).items():
+        if not isinstance(value, str) or not value:
+            continue
+        key = _INDEXED_PATHS.get(path)
+        if key:
+            columns[key] = value
+        else:
+            body.append(value)
+    return [columns[key] for key, _ in INDEXED_FIELDS] + ["\n".join(body)]
+
+
+def _snippet_html(snippet: str) -> Markup:
+    return Markup(
+        str(escape(snippet)).replace(_HIT_OPEN, "<mark>").replace(_HIT_CLOSE, "</mark>")
+    )
+
+
+@dataclass
+class SearchResult:
+    """One ranked match."""
+    operation: str
+    version: int
+    mission: str
+    insert_method: str
+    dz_lz: str
+    snippet: Markup  # HTML-escaped, matched terms wrapped in <mark>
+    score: float     # BM25; lower is better
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "version": self.version,
+            "mission": self.mission,
+            "insert_method": self.insert_method,
+            "dz_lz": self.dz_lz,
+            "snippet": str(self.snippet),
+            "score": self.score,
+        }
+
+
+class SearchIndex:
+    """FTS5 index holding the latest revision of every operation."""
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = connect(path)
+        try:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        finally:
+            conn.close()
+
+    def add(self, operation: str, version: int, document: dict) -> None:
+        """Index *document* as revision *version* of *operation*, replacing older ones."""
+        values = _document_columns(document)
+        conn = connect(self.path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, version FROM search_docs WHERE operation = ?", (operation,)
+            ).fetchone()
+            if row and row[1] > version:
+                # A newer revision was indexed concurrently.
+                conn.execute("ROLLBACK")
+                return
+            if row:
+                doc_id = row[0]
+                conn.execute("DELETE FROM search_fts WHERE rowid = ?", (doc_id,))
+                conn.execute(
+                    "UPDATE search_docs SET version = ?, updated = ? WHERE id = ?",
+                    (version, time.time(), doc_id),
+                )
+            else:
+                doc_id = conn.execute(
+                    "INSERT INTO search_docs (operation, version, updated) VALUES (?, ?, ?)",
+                    (operation, version, time.time()),
+                ).lastrowid
+            conn.execute(
+                f"INSERT INTO search_fts (rowid, {', '.join(_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(_COLUMNS))})",
+                (doc_id, *values),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def search(self, text: str, limit: int = 20) -> List[SearchResult]:
+        """
+        Return the best matches for a free-text query.
+
+        Parameters
+        ----------
+        text : str
+            Words to look for, e.g. ``"HALO DZ EAGLE mechanized"``.
+        limit : int
+            Maximum number of results (capped at ``MAX_RESULTS``).
+
+        Returns
+        -------
+        list of SearchResult
+            Best match first.
+        """
+        query = build_match_query(text)
+        if query is None:
+            return []
+        limit = max(1, min(limit, MAX_RESULTS))
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT d.operation, d.version, search_fts.mission,
+                       search_fts.insert_method, search_fts.dz_lz,
+                       snippet(search_fts, -1, ?, ?, '…', 16),
+                       bm25(search_fts, {_BM25_WEIGHTS}) AS score
+                FROM search_fts JOIN search_docs AS d ON d.id = search_fts.rowid
+                WHERE search_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+                """,
+                (_HIT_OPEN, _HIT_CLOSE, query, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            SearchResult(op, version, mission, insert, dz_lz, _snippet_html(snippet), score)
+            for op, version, mission, insert, dz_lz, snippet, score in rows
+        ]
+
+    def __len__(self) -> int:
+        conn = connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM search_docs").fetchone()[0]
+        finally:
+            conn.close()
+
+    def reindex(self, revisions) -> int:
+        """Index the latest revision of every operation in a ``RevisionStore``."""
+        count = 0
+        for operation in revisions.operations():
+            version = revisions.latest_version(operation)
+            self.add(operation, version, revisions.checkout(operation, version))
+            count += 1
+        return count
@@ -0,0 +1,213 @@
+"""
+Similar-order retrieval for AI autofill.
+
+Past orders are indexed on the inputs of the AI operational summary
+(mission, insert method, DZ/LZ and enemy composition; the operation
+codename is arbitrary and ignored) as hashed character n-gram counts, and
+ranked against a new form by TF-IDF cosine similarity computed with NumPy.
+
+When the best match is very close (``AUTOFILL_SIMILARITY``) its sections
+fill the new order's blank fields without any AI call.  A looser match
+(``EXAMPLE_SIMILARITY``) is passed to the model as an example of each
+section instead.
+
+NumPy is imported on first use, so importing the app does not pay for it.
+"""
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .ai_helper import AUTO_FILL_FIELDS, MAX_SUMMARY_FIELD_CHARS, SUMMARY_FIELDS
+from .schema import form_from_dict
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+# Form fields an order is matched on.
+MATCH_FIELDS = [key for key in SUMMARY_FIELDS if key != "operation_name"]
+
+NGRAM = 3
+DIMENSIONS = 2 ** 11
+
+# Most recently saved orders kept in memory (about 8 KB each).
+MAX_ORDERS = int(os.environ.get("OPORD_SIMILAR_MAX_ORDERS", 5000))
+
+# Cosine similarity needed to reuse a past order's sections verbatim, and to
+# offer them to the model as examples.
+AUTOFILL_SIMILARITY = float(os.environ.get("OPORD_AUTOFILL_SIMILARITY", 0.9))
+EXAMPLE_SIMILARITY = float(os.environ.get("OPORD_EXAMPLE_SIMILARITY", 0.5))
+
+
+def vectorize(form_data: dict, dimensions: int = DIMENSIONS) -> "np.ndarray":
+    """
+    Return the sublinear term-frequency vector of an order's match fields.
+
+    Each field's character n-grams are tagged with the field name and
+    hashed into *dimensions* buckets, so "EAGLE" in the mission and in the
+    DZ/LZ count as different features.
+    """
+    import numpy as np
+
+    buckets: List[int] = []
+    for key in MATCH_FIELDS:
+        text = " ".join((form_data.get(key) or "")[:MAX_SUMMARY_FIELD_CHARS].lower().split())
+        if not text:
+            continue
+        padded = f" {text} ".encode("utf-8")
+        tag = zlib.crc32(key.encode("ascii"))
+        buckets.extend(
+            zlib.crc32(padded[i:i + NGRAM], tag) % dimensions
+            for i in range(len(padded) - NGRAM + 1)
+        )
+    counts = np.bincount(np.asarray(buckets, dtype=np.int64), minlength=dimensions)
+    return np.log1p(counts).astype(np.float32)
+
+
+@dataclass
+class Match:
+    """The past order most similar to a query."""
+    operation: str
+    version: int
+    score: float
+    sections: Dict[str, str]  # non-blank AUTO_FILL_FIELDS of the order
+
+
+@dataclass
+class Suggestions:
+    """Sections a similar past order offers for a form's blank fields."""
+    match: Optional[Match] = None
+    autofill: Dict[str, str] = field(default_factory=dict)
+    examples: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Entry:
+    version: int
+    buckets: "np.ndarray"  # non-zero buckets of the order's vector ...
+    weights: "np.ndarray"  # ... and their term frequencies
+    sections: Dict[str, str]
+
+
+class SimilarityIndex:
+    """In-memory TF-IDF index over the most recently saved orders."""
+
+    def __init__(self, max_orders: int = MAX_ORDERS,
+                 autofill_similarity: float = AUTOFILL_SIMILARITY,
+                 example_similarity: float = EXAMPLE_SIMILARITY):
+        self.max_orders = max_orders
+        self.autofill_similarity = autofill_similarity
+        self.example_similarity = example_similarity
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Document frequency per bucket, created with the first order.
+        self._df = None
+        # (operations, row-normalised TF-IDF matrix, idf), rebuilt lazily.
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, operation: str, version: int, document: dict) -> None:
+        """Index revision *version* of *operation* (a ``generate_dict()`` dict)."""
+        import numpy as np
+
+        form = form_from_dict(document)
+        vector = vectorize(form)
+        buckets = np.flatnonzero(vector)
+        entry = _Entry(
+            version,
+            buckets,
+            vector[buckets],
+            {key: form[key] for key, _ in AUTO_FILL_FIELDS if form.get(key)},
+        )
+        with self._lock:
+            if self._df is None:
+                self._df = np.zeros(DIMENSIONS, dtype=np.int64)
+            old = self._entries.pop(operation, None)
+            if old is not None:
+                self._df[old.buckets] -= 1
+            self._entries[operation] = entry
+            self._df[entry.buckets] += 1
+            while len(self._entries) > self.max_orders:
+                _, evicted = self._entries.popitem(last=False)
+                self._df[evicted.buckets] -= 1
+            self._matrix = None
+
+    def sync(self, revisions, min_interval: float = 10.0) -> None:
+        """
+        Pick up orders saved through *revisions* (a ``RevisionStore``),
+        including by other worker processes.
+
+        Runs at most once per *min_interval* seconds.
+        """
+        now = time.monotonic()
+        if self._last_sync and now - self._last_sync < min_interval:
+            return
+        self._last_sync = now
+        latest = list(revisions.latest_versions().items())[-self.max_orders:]
+        for operation, version in latest:
+            entry = self._entries.get(operation)
+            if entry is None or entry.version < version:
+                document = revisions.checkout(operation, version)
+                if document is not None:
+                    self.add(operation, version, document)
+
+    def _weighted_matrix(self):
+        import numpy as np
+
+        with self._lock:
+            if self._matrix is None and self._entries:
+                operations = list(self._entries)
+                weighted = np.zeros((len(operations), DIMENSIONS), dtype=np.float32)
+                for row, entry in enumerate(self._entries.values()):
+                    weighted[row, entry.buckets] = entry.weights
+                idf = (np.log((1 + len(operations)) / (1 + self._df)) + 1).astype(np.float32)
+                weighted *= idf
+                norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+                weighted /= np.where(norms > 0, norms, 1)
+                self._matrix = (operations, weighted, idf)
+            return self._matrix
+
+    def best_match(self, form_data: dict) -> Optional[Match]:
+        """Return the most similar indexed order, or None if nothing overlaps."""
+        import numpy as np
+
+        query = vectorize(form_data)
+        built = self._weighted_matrix()
+        if built is None or not query.any():
+            return None
+        operations, weighted, idf = built
+        query *= idf
+        query /= np.linalg.norm(query)
+        scores = weighted @ query
+        best = int(np.argmax(scores))
+        if scores[best] <= 0:
+            return None
+        entry = self._entries.get(operations[best])
+        if entry is None:  # evicted since the matrix was built
+            return None
+        return Match(operations[best], entry.version, float(scores[best]), entry.sections)
+
+    def suggestions(self, form_data: dict) -> Suggestions:
+        """
+        Return sections for the blank auto-fill fields of *form_data*.
+
+        They go in ``autofill`` if the best match is at least
+        ``autofill_similarity`` alike, in ``examples`` if it is at least
+        ``example_similarity`` alike, and nowhere otherwise.
+        """
+        match = self.best_match(form_data)
+        if match is None or match.score < self.example_similarity:
+            return Suggestions(match)
+        sections = {
+            key: text for key, text in match.sections.items() if not form_data.get(key)
+        }
+        if match.score >= self.autofill_similarity:
+            return Suggestions(match, autofill=sections)
+        return Suggestions(match, examples=sections)
@@ -0,0 +1,83 @@
+"""
+Single-flight deduplication of identical in-flight calls.
+
+When several threads ask for the same thing at the same time (for example
+many users generating an OPORD from one shared scenario), only the first
+caller for a given key runs the underlying function; the others block until
+it finishes and receive the same result or exception.  Nothing is cached
+once the call completes — later callers start a new flight.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """A single in-flight call shared by every waiter for one key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn()`` unless a call for *key* is already in flight.
+
+        Parameters
+        ----------
+        key : str
+            Fingerprint identifying equivalent calls.
+        fn : callable
+            Zero-argument function performing the call.
+
+        Returns
+        -------
+        Any
+            The result of ``fn()``, either from this thread or from the
+            thread that was already running it.  Exceptions are re-raised in
+            every waiting thread.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Return the number of distinct keys currently being executed."""
+        with self._lock:
+            return len(self._calls)
+
+
+def request_fingerprint(request: dict) -> str:
+    """Return a stable hash of an API request's keyword arguments."""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -8,6 +8,12 @@ If GOOGLE_SLIDES_TEMPLATE_ID is set, the helper copies that template and
 replaces placeholder text. Otherwise it creates a blank presentation with
 one slide per OPORD paragraph.
 
+Every API call waits its turn in the quota-aware schedulers of
+:mod:`opord.slides_scheduler`, so many simultaneous exports share the
+Slides and Drive quotas fairly instead of failing.  The calls of one export
+share a single deadline, so the export as a whole fits inside the server's
+request timeout.
+
 Placeholder convention (for template-based workflow):
   {{UNIT_NAME}}, {{OPERATION_NAME}}, {{DTG}}, {{CLASSIFICATION}},
   {{MISSION}}, {{SITUATION_ENEMY}}, {{SITUATION_FRIENDLY}},
@@ -17,17 +23,22 @@ Placeholder convention (for template-based workflow):
   {{COMMAND_AND_SIGNAL}}
 """
 
+import importlib.util
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-try:
-    from google.auth.transport.requests import Request
+from .slides_scheduler import get_scheduler
+
+# The Google client libraries are slow to import and unused by most
+# deployments, so only check that they are installed here and import them
+# on first export.
+_google_available = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("googleapiclient", "google_auth_oauthlib")
+)
+
+if TYPE_CHECKING:  # pragma: no cover
     from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-    _google_available = True
-except ImportError:  # pragma: no cover
-    _google_available = False
 
 SCOPES = [
     "https://www.googleapis.com/auth/presentations",
@@ -42,6 +53,10 @@ def _get_credentials(credentials_file: str) -> Optional["Credentials"]:
     if not _google_available:
         return None
 
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
@@ -70,7 +85,137 @@ def _make_text_replace_request(placeholder: str, value: str) -> dict:
     }
 
 
-def export_to_slides(opord_dict: dict) -> Optional[str]:
+def get_credentials() -> Optional["Credentials"]:
+    """Return OAuth2 credentials for ``GOOGLE_CREDENTIALS_FILE``, or None if unavailable."""
+    credentials_file = os.environ.get("GOOGLE_CREDENTIALS_FILE", "credentials.json")
+    return _get_credentials(credentials_file)
+
+
+def presentation_title(opord_dict: dict) -> str:
+    """Return the presentation (and Drive file) name of an order."""
+    return (
+        f"OPORD {opord_dict.get('operation_name', 'TBD')} - "
+        f"{opord_dict.get('unit_short', 'C/1-7 CAV')}"
+    )
+
+
+def template_requests(opord_dict: dict) -> list:
+    """Return the replaceAllText requests that fill a copied template."""
+    ex = opord_dict.get("execution", {})
+    su = opord_dict.get("sustainment", {})
+    cs = opord_dict.get("command_and_signal", {})
+    sit = opord_dict.get("situation", {})
+
+    return [
+        _make_text_replace_request("UNIT_NAME", opord_dict.get("unit", "")),
+        _make_text_replace_request("OPERATION_NAME", opord_dict.get("operation_name", "")),
+        _make_text_replace_request("DTG", opord_dict.get("dtg", "")),
+        _make_text_replace_request("CLASSIFICATION", opord_dict.get("classification", "")),
+        _make_text_replace_request("MISSION", opord_dict.get("mission", "")),
+        _make_text_replace_request(
+            "SITUATION_ENEMY",
+            "\n".join([
+                f"Composition: {sit.get('enemy', {}).get('composition', '')}",
+                f"Disposition: {sit.get('enemy', {}).get('disposition', '')}",
+                f"Strength: {sit.get('enemy', {}).get('strength', '')}",
+                f"Most Likely COA: {sit.get('enemy', {}).get('most_likely_coa', '')}",
+            ])
+        ),
+        _make_text_replace_request(
+            "SITUATION_FRIENDLY",
+            sit.get("friendly", {}).get("higher_hq_mission", "")
+        ),
+        _make_text_replace_request(
+            "COMMANDERS_INTENT", ex.get("commanders_intent", "")
+        ),
+        _make_text_replace_request(
+            "CONCEPT_OF_OPS", ex.get("concept_of_operations", "")
+        ),
+        _make_text_replace_request(
+            "SCHEME_OF_MANEUVER", ex.get("scheme_of_maneuver", "")
+        ),
+        _make_text_replace_request(
+            "SCHEME_OF_FIRES", ex.get("scheme_of_fires", "")
+        ),
+        _make_text_replace_request(
+            "COORDINATING_INSTRUCTIONS", ex.get("coordinating_instructions", "")
+        ),
+        _make_text_replace_request(
+            "SUSTAINMENT_LOGISTICS", su.get("logistics", "")
+        ),
+        _make_text_replace_request(
+            "SUSTAINMENT_MEDICAL", su.get("medical", "")
+        ),
+        _make_text_replace_request(
+            "COMMAND_AND_SIGNAL",
+            f"{cs.get('signal', '')}  Frequencies: {cs.get('frequencies', '')}"
+        ),
+    ]
+
+
+def blank_deck_requests(opord_dict: dict, first_slide: dict) -> list:
+    """
+    Return the requests that fill a new blank presentation, one slide per
+    OPORD paragraph.
+
+    *first_slide* is the presentation's default slide (its ``objectId`` and
+    ``pageElements``), which receives the title slide.
+    """
+    requests = []
+    for idx, (slide_title, slide_body) in enumerate(_build_slide_content(opord_dict)):
+        slide_id = f"slide_{idx}"
+        title_id = f"title_{idx}"
+        body_id = f"body_{idx}"
+
+        if idx == 0:
+            # Use the default first slide
+            requests += _text_slide_requests(
+                first_slide["objectId"],
+                first_slide.get("pageElements", []),
+                slide_title,
+                slide_body,
+            )
+        else:
+            requests += [
+                {
+                    "createSlide": {
+                        "objectId": slide_id,
+                        "insertionIndex": idx,
+                        "slideLayoutReference": {"predefinedLayout": "TITLE_AND_BODY"},
+                        "placeholderIdMappings": [
+                            {
+                                "layoutPlaceholder": {
+                                    "type": "CENTERED_TITLE",
+                                    "index": 0,
+                                },
+                                "objectId": title_id,
+                            },
+                            {
+                                "layoutPlaceholder": {"type": "BODY", "index": 0},
+                                "objectId": body_id,
+                            },
+                        ],
+                    }
+                },
+                {
+                    "insertText": {
+                        "objectId": title_id,
+                        "insertionIndex": 0,
+                        "text": slide_title,
+                    }
+                },
+                {
+                    "insertText": {
+                        "objectId": body_id,
+                        "insertionIndex": 0,
+                        "text": slide_body[:3000],  # Slides has text limits
+                    }
+                },
+            ]
+    return requests
+
+
+def export_to_slides(opord_dict: dict, user: str = "") -> Optional[str]:
     """
     Export an OPORD dictionary to a Google Slides presentation.
 
@@ -78,162 +223,55 @@ def export_to_slides(opord_dict: dict) -> Optional[str]:
     ----------
     opord_dict : dict
         Output of OPORDGenerator.generate_dict().
+    user : str
+        Who is exporting; API calls are queued fairly between users.
 
     Returns
     -------
     str or None
         URL of the created presentation, or None if export is unavailable.
     """
-    credentials_file = os.environ.get("GOOGLE_CREDENTIALS_FILE", "credentials.json")
-    creds = _get_credentials(credentials_file)
+    creds = get_credentials()
     if creds is None:
         return None
 
+    from googleapiclient.discovery import build
+
     slides_service = build("slides", "v1", credentials=creds)
     drive_service = build("drive", "v3", credentials=creds)
+    slides = get_scheduler("slides")
+    # One deadline for every call of the export, not one per call.
+    deadline = slides.deadline()
 
     template_id = os.environ.get("GOOGLE_SLIDES_TEMPLATE_ID", "")
-    title = (
-        f"OPORD {opord_dict.get('operation_name', 'TBD')} - "
-        f"{opord_dict.get('unit_short', 'C/1-7 CAV')}"
-    )
+    title = presentation_title(opord_dict)
 
     if template_id:
         # Copy the template
-        copy_response = drive_service.files().copy(
-            fileId=template_id,
-            body={"name": title},
-        ).execute()
+        copy_response = get_scheduler("drive").execute(
+            drive_service.files().copy(fileId=template_id, body={"name": title}),
+            user,
+            deadline,
+        )
         presentation_id = copy_response["id"]
-
-        # Build replacement requests from OPORD data
-        ex = opord_dict.get("execution", {})
-        su = opord_dict.get("sustainment", {})
-        cs = opord_dict.get("command_and_signal", {})
-        sit = opord_dict.get("situation", {})
-
-        requests = [
-            _make_text_replace_request("UNIT_NAME", opord_dict.get("unit", "")),
-            _make_text_replace_request("OPERATION_NAME", opord_dict.get("operation_name", "")),
-            _make_text_replace_request("DTG", opord_dict.get("dtg", "")),
-            _make_text_replace_request("CLASSIFICATION", opord_dict.get("classification", "")),
-            _make_text_replace_request("MISSION", opord_dict.get("mission", "")),
-            _make_text_replace_request(
-                "SITUATION_ENEMY",
-                "\n".join([
-                    f"Composition: {sit.get('enemy', {}).get('composition', '')}",
-                    f"Disposition: {sit.get('enemy', {}).get('disposition', '')}",
-                    f"Strength: {sit.get('enemy', {}).get('strength', '')}",
-                    f"Most Likely COA: {sit.get('enemy', {}).get('most_likely_coa', '')}",
-                ])
-            ),
-            _make_text_replace_request(
-                "SITUATION_FRIENDLY",
-                sit.get("friendly", {}).get("higher_hq_mission", "")
-            ),
-            _make_text_replace_request(
-                "COMMANDERS_INTENT", ex.get("commanders_intent", "")
-            ),
-            _make_text_replace_request(
-                "CONCEPT_OF_OPS", ex.get("concept_of_operations", "")
-            ),
-            _make_text_replace_request(
-                "SCHEME_OF_MANEUVER", ex.get("scheme_of_maneuver", "")
-            ),
-            _make_text_replace_request(
-                "SCHEME_OF_FIRES", ex.get("scheme_of_fires", "")
-            ),
-            _make_text_replace_request(
-                "COORDINATING_INSTRUCTIONS", ex.get("coordinating_instructions", "")
-            ),
-            _make_text_replace_request(
-                "SUSTAINMENT_LOGISTICS", su.get("logistics", "")
-            ),
-            _make_text_replace_request(
-                "SUSTAINMENT_MEDICAL", su.get("medical", "")
-            ),
-            _make_text_replace_request(
-                "COMMAND_AND_SIGNAL",
-                f"{cs.get('signal', '')}  Frequencies: {cs.get('frequencies', '')}"
-            ),
-        ]
-
-        slides_service.presentations().batchUpdate(
-            presentationId=presentation_id,
-            body={"requests": requests},
-        ).execute()
-
+        requests = template_requests(opord_dict)
     else:
         # Create a blank presentation with text slides
-        presentation = slides_service.presentations().create(
-            body={"title": title}
-        ).execute()
+        presentation = slides.execute(
+            slides_service.presentations().create(body={"title": title}), user, deadline
+        )
         presentation_id = presentation["presentationId"]
+        requests = blank_deck_requests(opord_dict, presentation["slides"][0])
 
-        # Build slides for each paragraph
-        generator_text = _build_slide_content(opord_dict)
-        requests = []
-        for idx, (slide_title, slide_body) in enumerate(generator_text):
-            slide_id = f"slide_{idx}"
-            title_id = f"title_{idx}"
-            body_id = f"body_{idx}"
-
-            if idx == 0:
-                # Use the default first slide
-                first_slide = presentation["slides"][0]
-                existing_slide_id = first_slide["objectId"]
-                requests += _text_slide_requests(
-                    existing_slide_id,
-                    first_slide["pageElements"],
-                    slide_title,
-                    slide_body,
-                )
-            else:
-                requests += [
-                    {
-                        "createSlide": {
-                            "objectId": slide_id,
-                            "insertionIndex": idx,
-                            "slideLayoutReference": {"predefinedLayout": "TITLE_AND_BODY"},
-                            "placeholderIdMappings": [
-                                {
-                                    "layoutPlaceholder": {
-                                        "type": "CENTERED_TITLE",
-                                        "index": 0,
-                                    },
-                                    "objectId": title_id,
-                                },
-                                {
-                                    "layoutPlaceholder": {"type": "BODY", "index": 0},
-                                    "objectId": body_id,
-                                },
-                            ],
-                        }
-                    },
-                    {
-                        "insertText": {
-                            "objectId": title_id,
-                            "insertionIndex": 0,
-                            "text": slide_title,
-                        }
-                    },
-                    {
-                        "insertText": {
-                            "objectId": body_id,
-                            "insertionIndex": 0,
-                            "text": slide_body[:3000],  # Slides has text limits
-                        }
-                    },
-                ]
-
-        if requests:
-            slides_service.presentations().batchUpdate(
-                presentationId=presentation_id,
-                body={"requests": requests},
-            ).execute()
-
-    url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
-    return url
+    if requests:
+        slides.batch_update(slides_service, presentation_id, requests, user, deadline)
+
+    return presentation_url(presentation_id)
+
+
+def presentation_url(presentation_id: str) -> str:
+    """Return the editor URL of a presentation."""
+    return f"https://docs.google.com/presentation/d/{presentation_id}/edit"
 
 
 def _text_slide_requests(slide_id: str, page_elements: list,
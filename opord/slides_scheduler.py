@@ -0,0 +1,465 @@
+"""
+Quota-aware scheduling of Google Slides and Drive API calls.
+
+Every export runs a Drive copy or a Slides ``create`` followed by a
+``batchUpdate``, all charged to the one Google account in ``token.json``.
+When a whole battalion exports before a briefing, firing those calls
+straight away overruns the per-minute quotas and exports fail at random.
+Instead, each call waits its turn in a :class:`QuotaScheduler`:
+
+* Quota is drawn from a :class:`~opord.rate_limit.TokenBucketLimiter`
+  bucket per API, stored in SQLite so every worker process on the host
+  shares the budget and calls run as fast as the quota allows.
+* Callers queue per user and are served round-robin, so one user exporting
+  many orders cannot starve everyone else.
+* ``batchUpdate`` calls still queued for the same presentation are merged
+  into one call, and each caller gets its own slice of the replies.
+* Many independent calls can go out as Google batch HTTP requests
+  (:meth:`QuotaScheduler.execute_batch`); each call in a batch still costs
+  one unit of quota.
+* Rate-limited (429, or 403 ``rateLimitExceeded``) and transient 5xx
+  responses are retried after the server's ``Retry-After`` or with
+  exponential backoff; a 429 pauses every process sharing the bucket, not
+  just the caller.
+* Several calls can share one deadline (e.g. the copy and ``batchUpdate``
+  of one export), so together they fit inside the request timeout.
+
+Round-robin order is kept per process; the budget itself is host-wide.
+
+Configuration (environment variables)
+-------------------------------------
+GOOGLE_SLIDES_WRITE_RPM  Slides write requests per minute (default 60, Google's
+                         per-user limit; 0 disables limiting).
+GOOGLE_SLIDES_READ_RPM   Slides read requests per minute (default 600, Google's
+                         per-user limit; 0 disables limiting).
+GOOGLE_DRIVE_RPM         Drive requests per minute (default 12000, Google's
+                         per-user limit; 0 disables limiting).
+GOOGLE_RATE_LIMIT_DB     Path of the shared SQLite file
+                         (default: <tempdir>/opord_google_ratelimit.sqlite3).
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from .rate_limit import RateLimitTimeout, TokenBucketLimiter
+
+DEFAULT_SLIDES_WRITE_RPM = 60
+DEFAULT_SLIDES_READ_RPM = 600
+DEFAULT_DRIVE_RPM = 12000
+DEFAULT_DB_NAME = "opord_google_ratelimit.sqlite3"
+
+# Longest a call (or the calls sharing one deadline) waits for its turn,
+# quota and retries; an export must finish well inside the server's request
+# timeout (GUNICORN_TIMEOUT, 120 s).
+DEFAULT_WAIT_SECONDS = 90.0
+
+# Largest merged batchUpdate, in requests.
+MAX_BATCH_REQUESTS = 500
+
+# Most calls Google accepts in one batch HTTP request.
+MAX_BATCH_CALLS = 100
+
+# Retry policy for rate-limited or transiently failing calls.
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 32.0
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RATE_LIMIT_REASONS = ("ratelimitexceeded", "userratelimitexceeded")
+
+_ENV = {
+    "slides": ("GOOGLE_SLIDES_WRITE_RPM", DEFAULT_SLIDES_WRITE_RPM),
+    "slides_read": ("GOOGLE_SLIDES_READ_RPM", DEFAULT_SLIDES_READ_RPM),
+    "drive": ("GOOGLE_DRIVE_RPM", DEFAULT_DRIVE_RPM),
+}
+
+
+def _status(exc: Exception) -> Optional[int]:
+    """Return the HTTP status of a ``googleapiclient`` error, if any."""
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    status = _status(exc)
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    content = getattr(exc, "content", b"") or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", "replace")
+    return any(reason in content.lower() for reason in _RATE_LIMIT_REASONS)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    return _status(exc) in _RETRYABLE_STATUS or _is_rate_limited(exc)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Return the server-requested delay in seconds, if the error carries one."""
+    resp = getattr(exc, "resp", None)
+    value = resp.get("retry-after") if hasattr(resp, "get") else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _retry_delay(attempt: int, server_delay: Optional[float]) -> float:
+    """Wait the server asked for (plus jitter), else exponential backoff."""
+    if server_delay is not None:
+        return server_delay + random.uniform(0, 0.5)
+    return _backoff_delay(attempt)
+
+
+class _Call:
+    """One queued API call (or ``batchUpdate``) and its outcome."""
+
+    def __init__(self, user: str, run: Callable[[], Any], service=None,
+                 presentation_id: Optional[str] = None, requests: Optional[list] = None,
+                 cost: int = 1):
+        self.user = user
+        self.run = run
+        self.cost = cost
+        self.service = service
+        self.presentation_id = presentation_id
+        self.requests = requests or []
+        self.claimed = False
+        self.deadline: Optional[float] = None
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def finish(self, result=None, error: Optional[BaseException] = None) -> None:
+        self.result, self.error = result, error
+        self.done.set()
+
+
+class QuotaScheduler:
+    """
+    Fair, quota-paced queue for the calls of one Google API.
+
+    Calls run in the calling thread (``googleapiclient`` services are not
+    thread-safe), one caller at a time taking quota in round-robin order
+    of users; the calls themselves then run concurrently.
+
+    Parameters
+    ----------
+    limiter : TokenBucketLimiter or None
+        The API's request budget; None runs calls without pacing.
+    wait_seconds : float
+        Longest a call waits for its turn and quota before
+        :class:`~opord.rate_limit.RateLimitTimeout` is raised; retries stop
+        once their wait would pass the same deadline.
+    clock, sleep : callable, optional
+        Time source and sleep function (overridable for tests).
+    """
+
+    def __init__(self, limiter: Optional[TokenBucketLimiter],
+                 wait_seconds: float = DEFAULT_WAIT_SECONDS,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.limiter = limiter
+        self.wait_seconds = wait_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._turn = threading.Condition()
+        # User -> queued calls; insertion order is the round-robin order.
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._gate_busy = False
+
+    def deadline(self) -> float:
+        """Return the deadline of a call starting now, on this scheduler's clock."""
+        return self._clock() + self.wait_seconds
+
+    def execute(self, request, user: str = "", deadline: Optional[float] = None) -> Any:
+        """
+        Run a ``googleapiclient`` request (anything with ``execute()``) in turn.
+
+        Returns the response; raises the API error once retries run out, or
+        :class:`~opord.rate_limit.RateLimitTimeout` if the call waited too long.
+        Pass a *deadline* from :meth:`deadline` to bound several calls
+        together; by default each call gets ``wait_seconds`` of its own.
+        """
+        return self._submit(_Call(user, request.execute), deadline)
+
+    def batch_update(self, service, presentation_id: str, requests: List[dict],
+                     user: str = "", deadline: Optional[float] = None) -> dict:
+        """
+        Run a Slides ``presentations.batchUpdate`` in turn.
+
+        Queued updates of the same presentation are sent as one call; the
+        response holds only the replies to *requests*.  *deadline* is as
+        for :meth:`execute`.
+        """
+        def run():
+            return service.presentations().batchUpdate(
+                presentationId=presentation_id, body={"requests": requests}
+            ).execute()
+
+        return self._submit(_Call(user, run, service, presentation_id, list(requests)),
+                            deadline)
+
+    def execute_batch(self, new_batch: Callable[..., Any], requests: Mapping[str, Any],
+                      user: str = "") -> Dict[str, Any]:
+        """
+        Run many independent requests as Google batch HTTP requests, in turn.
+
+        Parameters
+        ----------
+        new_batch : callable
+            Returns an empty ``BatchHttpRequest`` given a ``callback``, e.g.
+            ``service.new_batch_http_request``.
+        requests : Mapping
+            Request ID -> ``googleapiclient`` request.
+        user : str
+            Who the requests are for.
+
+        Returns
+        -------
+        dict
+            Request ID -> response, or the exception of a request that
+            still failed once retries ran out.
+        """
+        results: Dict[str, Any] = {}
+        pending = dict(requests)
+        for attempt in range(MAX_RETRIES + 1):
+            retry: Dict[str, Any] = {}
+            rate_limited = False
+            server_delay: Optional[float] = None
+            ids = list(pending)
+            for start in range(0, len(ids), MAX_BATCH_CALLS):
+                chunk = ids[start:start + MAX_BATCH_CALLS]
+                outcomes: Dict[str, Any] = {}
+
+                def callback(request_id, response, exception, outcomes=outcomes):
+                    outcomes[request_id] = response if exception is None else exception
+
+                batch = new_batch(callback=callback)
+                for request_id in chunk:
+                    batch.add(pending[request_id], request_id=request_id)
+                try:
+                    self._submit(_Call(user, batch.execute, cost=len(chunk)))
+                except Exception as exc:
+                    # The batch request itself failed (or timed out).
+                    for request_id in chunk:
+                        results[request_id] = exc
+                    continue
+                for request_id in chunk:
+                    outcome = outcomes.get(request_id)
+                    if (isinstance(outcome, Exception) and _is_retryable(outcome)
+                            and attempt < MAX_RETRIES):
+                        retry[request_id] = pending[request_id]
+                        rate_limited = rate_limited or _is_rate_limited(outcome)
+                        after = _retry_after(outcome)
+                        if after is not None:
+                            server_delay = max(server_delay or 0.0, after)
+                    else:
+                        results[request_id] = outcome
+            if not retry:
+                break
+            delay = _retry_delay(attempt, server_delay)
+            if self.limiter is not None and rate_limited:
+                self.limiter.block_for(delay)
+            else:
+                self._sleep(delay)
+            pending = retry
+        return results
+
+    def pending(self) -> int:
+        """Return the number of calls waiting for their turn."""
+        with self._turn:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _submit(self, call: _Call, deadline: Optional[float] = None) -> Any:
+        if deadline is None:
+            deadline = self.deadline()
+        call.deadline = deadline
+        with self._turn:
+            self._queues.setdefault(call.user, deque()).append(call)
+            while not call.claimed:
+                if not self._gate_busy and self._next() is call:
+                    self._gate_busy = True
+                    batch = self._take(call)
+                    break
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._remove(call)
+                    raise RateLimitTimeout("Google API quota not available before the deadline")
+                self._turn.wait(remaining)
+        if call.claimed:
+            # Merged into another caller's batchUpdate.
+            call.done.wait()
+        else:
+            self._run(batch)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _next(self) -> Optional[_Call]:
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _remove(self, call: _Call) -> None:
+        queue = self._queues[call.user]
+        queue.remove(call)
+        if not queue:
+            del self._queues[call.user]
+
+    def _take(self, call: _Call) -> List[_Call]:
+        """Dequeue *call* (and queued updates of the same presentation)."""
+        self._remove(call)
+        if call.user in self._queues:
+            self._queues.move_to_end(call.user)
+        batch = [call]
+        if call.presentation_id is None:
+            return batch
+        size = len(call.requests)
+        for queue in list(self._queues.values()):
+            for other in list(queue):
+                if (other.presentation_id == call.presentation_id
+                        and size + len(other.requests) <= MAX_BATCH_REQUESTS):
+                    self._remove(other)
+                    other.claimed = True
+                    size += len(other.requests)
+                    batch.append(other)
+        return batch
+
+    def _release_gate(self) -> None:
+        with self._turn:
+            self._gate_busy = False
+            self._turn.notify_all()
+
+    def _run(self, batch: List[_Call]) -> None:
+        leader = batch[0]
+        # A merged batchUpdate must finish in time for every caller in it.
+        deadline = min(call.deadline for call in batch)
+        try:
+            self._acquire(deadline, leader.cost)
+        except BaseException as exc:
+            for call in batch:
+                call.finish(error=exc)
+            return
+        finally:
+            self._release_gate()
+        if len(batch) == 1:
+            try:
+                leader.finish(self._call_with_retries(leader.run, deadline, leader.cost,
+                                                      acquired=True))
+            except Exception as exc:
+                leader.finish(error=exc)
+            return
+        try:
+            response = self._call_with_retries(self._merged(batch), deadline, acquired=True)
+        except Exception as exc:
+            if _is_retryable(exc):
+                for call in batch:
+                    call.finish(error=exc)
+                return
+            # A bad request fails the whole merged batch: send each
+            # caller's requests on their own so only that caller fails.
+            for call in batch:
+                try:
+                    call.finish(self._call_with_retries(
+                        lambda call=call: self._merged([call])(), call.deadline
+                    ))
+                except Exception as exc:
+                    call.finish(error=exc)
+            return
+        replies = response.get("replies", [])
+        start = 0
+        for call in batch:
+            end = start + len(call.requests)
+            call.finish(dict(response, replies=replies[start:end]))
+            start = end
+
+    @staticmethod
+    def _merged(batch: List[_Call]) -> Callable[[], dict]:
+        leader = batch[0]
+        requests = [request for call in batch for request in call.requests]
+
+        def run():
+            return leader.service.presentations().batchUpdate(
+                presentationId=leader.presentation_id, body={"requests": requests}
+            ).execute()
+
+        return run
+
+    def _acquire(self, deadline: Optional[float] = None, cost: int = 1) -> None:
+        if self.limiter is None:
+            return
+        for _ in range(cost):
+            timeout = None if deadline is None else max(0.0, deadline - self._clock())
+            self.limiter.acquire(timeout=timeout)
+
+    def _call_with_retries(self, run: Callable[[], Any], deadline: Optional[float] = None,
+                           cost: int = 1, acquired: bool = False) -> Any:
+        for attempt in range(MAX_RETRIES + 1):
+            if not acquired:
+                self._acquire(deadline, cost)
+            acquired = False
+            try:
+                return run()
+            except Exception as exc:
+                if attempt == MAX_RETRIES or not _is_retryable(exc):
+                    raise
+                delay = _retry_delay(attempt, _retry_after(exc))
+                if deadline is not None and self._clock() + delay >= deadline:
+                    # No time left to wait out the error.
+                    raise
+                if self.limiter is not None and _is_rate_limited(exc):
+                    # Pause every worker, not just this one.
+                    self.limiter.block_for(delay)
+                else:
+                    self._sleep(delay)
+
+
+def scheduler_from_env(api: str, wait_seconds: float = DEFAULT_WAIT_SECONDS) -> QuotaScheduler:
+    """
+    Build the scheduler of *api* ("slides", "slides_read" or "drive") from
+    environment variables.
+    """
+    variable, default = _ENV[api]
+    rpm = int(os.environ.get(variable, default) or 0)
+    limiter = None
+    if rpm > 0:
+        path = os.environ.get("GOOGLE_RATE_LIMIT_DB") or os.path.join(
+            tempfile.gettempdir(), DEFAULT_DB_NAME
+        )
+        limiter = TokenBucketLimiter(path, rpm, name=f"google_{api}")
+    return QuotaScheduler(limiter, wait_seconds)
+
+
+_schedulers: Dict[str, QuotaScheduler] = {}
+_schedulers_config: Optional[tuple] = None
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(api: str) -> QuotaScheduler:
+    """Return the process-wide scheduler of *api* ("slides", "slides_read" or "drive")."""
+    global _schedulers_config
+    config = tuple(
+        os.environ.get(name)
+        for name in [variable for variable, _ in _ENV.values()] + ["GOOGLE_RATE_LIMIT_DB"]
+    )
+    with _schedulers_lock:
+        if config != _schedulers_config:
+            _schedulers.clear()
+            _schedulers_config = config
+        if api not in _schedulers:
+            _schedulers[api] = scheduler_from_env(api)
+        return _schedulers[api]
@@ -0,0 +1,307 @@
+"""
+Local telemetry for AI calls.
+
+Every chat completion -- interactive, prefetched or batched -- is recorded
+in the ``ai_calls`` table of the shared SQLite database with its model,
+section label, operation, prompt / cached / completion token counts,
+latency and outcome.  ``python -m opord.telemetry`` aggregates the calls
+by section, model, day or operation into token totals, the share of
+prompt tokens served from the provider's prompt cache, estimated cost and
+latency percentiles, to show which sections are worth caching, routing to
+a cheaper model or dropping.
+
+Recording never fails an AI call: database and file system errors (e.g. an
+unwritable ``OPORD_DB_PATH``) are logged and ignored.
+Set ``OPORD_TELEMETRY=0`` to turn it off.
+
+Usage
+-----
+    python -m opord.telemetry [--by section|model|day|operation|source] [--days N] [--json]
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .db import connect, default_db_path
+
+log = logging.getLogger(__name__)
+
+# USD per million tokens: (input, cached input, output).  Dated model names
+# ("gpt-4o-2024-08-06") are priced by their longest matching prefix.
+# Override or extend with OPORD_MODEL_PRICES='{"model": [in, cached, out]}'.
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+# Batch API calls are billed at half the interactive price.
+BATCH_DISCOUNT = 0.5
+
+GROUPINGS = ("section", "model", "day", "operation", "source")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_calls (
+    id                INTEGER PRIMARY KEY,
+    created           REAL    NOT NULL,
+    source            TEXT    NOT NULL,
+    model             TEXT    NOT NULL,
+    section           TEXT    NOT NULL,
+    operation         TEXT,
+    prompt_tokens     INTEGER NOT NULL,
+    cached_tokens     INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    latency_ms        REAL,
+    outcome           TEXT    NOT NULL,
+    error             TEXT
+)
+"""
+
+
+@dataclass
+class AICall:
+    """One recorded chat completion."""
+    model: str
+    section: str
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: Optional[float] = None  # None for batch calls
+    outcome: str = "ok"                 # "ok" or "error"
+    error: Optional[str] = None
+    operation: Optional[str] = None
+    source: str = "interactive"         # "interactive", "prefetch", "regenerate" or "batch"
+    created: float = 0.0
+
+
+def _get(obj, name: str):
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def _count(value) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def usage_counts(usage) -> Tuple[int, int, int]:
+    """
+    Return ``(prompt, cached, completion)`` tokens from a completion's
+    ``usage`` (an SDK object or, for batch output, a plain dict).
+    """
+    if usage is None:
+        return 0, 0, 0
+    details = _get(usage, "prompt_tokens_details")
+    cached = _get(details, "cached_tokens") if details is not None else None
+    return (
+        _count(_get(usage, "prompt_tokens")),
+        _count(cached),
+        _count(_get(usage, "completion_tokens")),
+    )
+
+
+def model_prices() -> Dict[str, Tuple[float, float, float]]:
+    """Return ``MODEL_PRICES`` updated with any ``OPORD_MODEL_PRICES`` overrides."""
+    prices = dict(MODEL_PRICES)
+    override = os.environ.get("OPORD_MODEL_PRICES")
+    if override:
+        prices.update({model: tuple(values) for model, values in json.loads(override).items()})
+    return prices
+
+
+def call_cost(call: AICall, prices: Dict[str, Tuple[float, float, float]]) -> Optional[float]:
+    """Return the estimated USD cost of *call*, or None for an unpriced model."""
+    matches = [name for name in prices if call.model.startswith(name)]
+    if not matches:
+        return None
+    per_input, per_cached, per_output = prices[max(matches, key=len)]
+    cost = (
+        (call.prompt_tokens - call.cached_tokens) * per_input
+        + call.cached_tokens * per_cached
+        + call.completion_tokens * per_output
+    ) / 1_000_000
+    return cost * BATCH_DISCOUNT if call.source == "batch" else cost
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of *values* (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class ReportRow:
+    """Aggregated calls for one group."""
+    key: str
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    cost: Optional[float] = 0.0     # None if any call's model is unpriced
+    cached_pct: float = 0.0         # share of prompt tokens served from the prompt cache
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+
+
+class TelemetryStore:
+    """AI call records in the shared SQLite database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = connect(path)
+        try:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS ai_calls_created ON ai_calls (created)")
+        finally:
+            conn.close()
+
+    def record(self, call: AICall) -> None:
+        conn = connect(self.path)
+        try:
+            conn.execute(
+                "INSERT INTO ai_calls (created, source, model, section, operation, "
+                "prompt_tokens, cached_tokens, completion_tokens, latency_ms, outcome, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (call.created or time.time(), call.source, call.model, call.section,
+                 call.operation, call.prompt_tokens, call.cached_tokens,
+                 call.completion_tokens, call.latency_ms, call.outcome, call.error),
+            )
+        finally:
+            conn.close()
+
+    def calls(self, since: Optional[float] = None) -> List[AICall]:
+        """Return the recorded calls, oldest first, optionally from *since* (epoch seconds)."""
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT model, section, prompt_tokens, cached_tokens, completion_tokens, "
+                "latency_ms, outcome, error, operation, source, created "
+                "FROM ai_calls WHERE created >= ? ORDER BY created",
+                (since or 0,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [AICall(*row) for row in rows]
+
+    def report(self, by: str = "section", since: Optional[float] = None) -> List[ReportRow]:
+        """
+        Aggregate calls by *by* (one of ``GROUPINGS``), most expensive first.
+
+        Latency percentiles cover successful interactive and prefetch calls
+        (batch calls have no latency).
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"cannot group by {by!r}; choose from {', '.join(GROUPINGS)}")
+        prices = model_prices()
+        rows: Dict[str, ReportRow] = {}
+        latencies: Dict[str, List[float]] = {}
+        for call in self.calls(since):
+            if by == "day":
+                key = time.strftime("%Y-%m-%d", time.gmtime(call.created))
+            else:
+                key = getattr(call, by) or "(none)"
+            row = rows.setdefault(key, ReportRow(key))
+            row.calls += 1
+            row.prompt_tokens += call.prompt_tokens
+            row.cached_tokens += call.cached_tokens
+            row.completion_tokens += call.completion_tokens
+            cost = call_cost(call, prices)
+            row.cost = None if cost is None or row.cost is None else row.cost + cost
+            if call.outcome != "ok":
+                row.errors += 1
+            elif call.latency_ms is not None:
+                latencies.setdefault(key, []).append(call.latency_ms)
+        for row in rows.values():
+            if row.prompt_tokens:
+                row.cached_pct = 100.0 * row.cached_tokens / row.prompt_tokens
+        for key, values in latencies.items():
+            rows[key].p50_ms = percentile(values, 50)
+            rows[key].p95_ms = percentile(values, 95)
+        if by == "day":
+            return sorted(rows.values(), key=lambda r: r.key)
+        return sorted(rows.values(), key=lambda r: (-(r.cost or 0), -r.calls, r.key))
+
+
+_store: Optional[TelemetryStore] = None
+
+
+def get_telemetry() -> Optional[TelemetryStore]:
+    """Return the store for the configured database (None if telemetry is off)."""
+    global _store
+    if os.environ.get("OPORD_TELEMETRY", "1") == "0":
+        return None
+    path = default_db_path()
+    if _store is None or _store.path != path:
+        _store = TelemetryStore(path)
+    return _store
+
+
+def record_call(call: AICall) -> None:
+    """Record *call* if telemetry is on, logging (not raising) storage errors."""
+    try:
+        store = get_telemetry()
+        if store is not None:
+            store.record(call)
+    except (sqlite3.Error, OSError) as exc:
+        log.warning("AI call telemetry not recorded: %s", exc)
+
+
+def _format_table(rows: List[ReportRow], by: str) -> str:
+    header = (by, "calls", "errors", "prompt", "cached", "cached %", "completion",
+              "cost $", "p50 ms", "p95 ms")
+    lines = [header]
+    for row in rows:
+        lines.append((
+            row.key, str(row.calls), str(row.errors), str(row.prompt_tokens),
+            str(row.cached_tokens), f"{row.cached_pct:.0f}", str(row.completion_tokens),
+            "?" if row.cost is None else f"{row.cost:.4f}",
+            "-" if row.p50_ms is None else f"{row.p50_ms:.0f}",
+            "-" if row.p95_ms is None else f"{row.p95_ms:.0f}",
+        ))
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    prompt = sum(row.prompt_tokens for row in rows)
+    cached = sum(row.cached_tokens for row in rows)
+    footer = f"\nPrompt cache: {cached} of {prompt} prompt tokens ({100.0 * cached / (prompt or 1):.0f}%)"
+    return "\n".join(
+        "  ".join(cell.ljust(w) if i == 0 else cell.rjust(w)
+                  for i, (cell, w) in enumerate(zip(line, widths)))
+        for line in lines
+    ) + footer
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m opord.telemetry",
+        description="Report AI token usage, estimated cost and latency.",
+    )
+    parser.add_argument("--by", choices=GROUPINGS, default="section", help="grouping")
+    parser.add_argument("--days", type=float, help="only calls from the last N days")
+    parser.add_argument("--db", help="database path (default: OPORD_DB_PATH or instance/opord.db)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    store = TelemetryStore(args.db or default_db_path())
+    since = time.time() - args.days * 86400 if args.days else None
+    rows = store.report(by=args.by, since=since)
+    if args.json:
+        print(json.dumps([asdict(row) for row in rows], indent=2))
+    elif not rows:
+        print("No AI calls recorded.")
+    else:
+        print(_format_table(rows, args.by))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+"""Shared pytest fixtures."""
+import os
+import tempfile
+
+import pytest
+
+# Keep the app's local stores out of the working tree.  This runs before
+# the test modules import app.
+os.environ.setdefault("OPORD_DB_PATH", os.path.join(tempfile.mkdtemp(), "opord-test.db"))
+
+
+@pytest.fixture(autouse=True)
+def _no_shared_rate_limiter(monkeypatch):
+    """Keep tests from drawing on the host-wide OpenAI rate-limit budget."""
+    monkeypatch.setenv("OPENAI_RPM", "0")
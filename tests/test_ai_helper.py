@@ -1,8 +1,25 @@
 """Tests for AI helper module (mocked — no real API calls)."""
+import json
+
 import pytest
 from unittest.mock import MagicMock, patch
 
-from opord.ai_helper import generate_section, generate_full_opord, get_client
+from opord.ai_helper import (
+    AUTO_FILL_FIELDS,
+    MAX_SUMMARY_FIELD_CHARS,
+    RATE_LIMIT_WAIT_SECONDS,
+    build_op_summary,
+    build_section_request,
+    build_tasks_request,
+    generate_section,
+    generate_full_opord,
+    get_client,
+    parse_tasks,
+    regenerate_field,
+    shared_prompt_prefix,
+)
+from opord.generator import SUBORDINATE_UNITS
+from opord.schema import FIELD_LIMITS, TASK_FIELDS, task_key, validate_form
 
 
 class TestGetClient:
@@ -14,6 +31,50 @@ class TestGetClient:
         monkeypatch.setenv("OPENAI_API_KEY", "your_openai_api_key_here")
         assert get_client() is None
 
+    def test_reuses_client_per_process(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        assert get_client() is get_client()
+
+    def test_new_client_when_key_changes(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        first = get_client()
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-other-key")
+        assert get_client() is not first
+
+
+class TestBuildOpSummary:
+    def test_includes_summary_fields(self):
+        summary = build_op_summary({"operation_name": "IRON HAWK", "dz_lz": "DZ FALCON"})
+        assert "Operation: IRON HAWK." in summary
+        assert "DZ/LZ: DZ FALCON." in summary
+        assert "Enemy: unknown." in summary
+
+    def test_clips_huge_values(self):
+        summary = build_op_summary({"mission": "M" * 5_000_000})
+        assert len(summary) < MAX_SUMMARY_FIELD_CHARS + 200
+        assert "[...]" in summary
+
+
+class TestPromptLayout:
+    def test_sections_share_everything_up_to_the_notes(self):
+        summary = build_op_summary({"operation_name": "IRON HAWK", "mission": "Seize OBJ EAGLE."})
+        requests = [build_section_request(label, summary) for _, label in AUTO_FILL_FIELDS]
+        prefix = shared_prompt_prefix(requests)
+        assert summary in prefix
+        system = requests[0]["messages"][0]["content"]
+        assert prefix.startswith(system)
+        for (_, label), request in zip(AUTO_FILL_FIELDS, requests):
+            user = request["messages"][-1]["content"]
+            assert label not in user[:user.index(summary) + len(summary)]
+            assert user.endswith(f"Generate the '{label}' section.")
+
+    def test_example_follows_the_shared_prefix(self):
+        summary = build_op_summary({"operation_name": "IRON HAWK"})
+        plain = build_section_request("Signal", summary)
+        with_example = build_section_request("Signal", summary, example="Past text.")
+        assert len(shared_prompt_prefix([plain, with_example])) > len(summary)
+        assert "Past text." in with_example["messages"][-1]["content"]
+
 
 class TestGenerateSection:
     def test_returns_empty_string_when_no_client(self, monkeypatch):
@@ -72,3 +133,303 @@ class TestGenerateFullOpord:
             }
             result = generate_full_opord(form)
         assert result["commanders_intent"] == "User-provided intent."
+
+    def test_prefilled_sections_skip_api_call(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = "AI-generated content."
+        mock_client.chat.completions.create.return_value = mock_response
+
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            form = {"operation_name": "IRON HAWK", "commanders_intent": ""}
+            result = generate_full_opord(form, prefilled={"commanders_intent": "Prefetched."})
+        assert result["commanders_intent"] == "Prefetched."
+        # The other sections, plus one call for all the subordinate tasks.
+        assert mock_client.chat.completions.create.call_count == len(AUTO_FILL_FIELDS)
+
+    def test_local_mode_ignores_prefilled_ai_text(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            result = generate_full_opord(
+                {"operation_name": "IRON HAWK"}, mode="local",
+                prefilled={"commanders_intent": "Prefetched."},
+            )
+        assert result["commanders_intent"] and result["commanders_intent"] != "Prefetched."
+        mock_client.chat.completions.create.assert_not_called()
+
+
+    def test_examples_are_added_to_prompts(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value.choices[0].message.content = "AI."
+
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            generate_full_opord(
+                {"operation_name": "IRON HAWK"},
+                prefilled={key: "Prefetched." for key, _ in AUTO_FILL_FIELDS[1:]},
+                examples={AUTO_FILL_FIELDS[0][0]: "Past order text."},
+            )
+        first_call = mock_client.chat.completions.create.call_args_list[0]
+        assert "Past order text." in first_call.kwargs["messages"][-1]["content"]
+
+
+class TestEnrichmentModes:
+    def test_local_mode_needs_no_client(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.setenv("OPORD_AI_MODE", "local")
+        result = generate_full_opord({"operation_name": "IRON HAWK", "mission": "Seize OBJ EAGLE."})
+        assert all(result[key] for key, _ in AUTO_FILL_FIELDS)
+        assert "OBJ EAGLE" in result["commanders_intent"]
+
+    def test_local_mode_makes_no_calls(self, monkeypatch):
+        mock_client = MagicMock()
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            generate_full_opord({"operation_name": "IRON HAWK"}, mode="local")
+        mock_client.chat.completions.create.assert_not_called()
+
+    def test_hybrid_mode_sends_drafts_to_refine(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value.choices[0].message.content = "Refined."
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            result = generate_full_opord(
+                {"operation_name": "HYBRID HAWK", "mission": "Clear OBJ ROBIN."}, mode="hybrid"
+            )
+        assert result["signal"] == "Refined."
+        first_call = mock_client.chat.completions.create.call_args_list[0]
+        prompt = first_call.kwargs["messages"][-1]["content"]
+        assert "A first draft of the" in prompt and "OBJ ROBIN" in prompt
+
+    def test_hybrid_mode_falls_back_to_drafts(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = ValueError("model unavailable")
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            result = generate_full_opord(
+                {"operation_name": "FALLBACK HAWK", "mission": "Clear OBJ WREN."}, mode="hybrid"
+            )
+        assert all(result[key] for key, _ in AUTO_FILL_FIELDS)
+        assert "OBJ WREN" in result["commanders_intent"]
+        # The first failure stops further calls for this order.
+        assert mock_client.chat.completions.create.call_count == 1
+
+    def test_ai_mode_still_raises(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = ValueError("model unavailable")
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            with pytest.raises(ValueError):
+                generate_full_opord({"operation_name": "STRICT HAWK"}, mode="ai")
+
+
+class TestSubordinateTasks:
+    def _client(self, sections="AI section.", tasks=None):
+        answer = json.dumps(tasks if tasks is not None else {
+            unit: f"Task for {unit}." for unit in SUBORDINATE_UNITS
+        })
+        client = MagicMock()
+
+        def create(**request):
+            response = MagicMock()
+            response.choices[0].message.content = (
+                answer if "response_format" in request else sections
+            )
+            return response
+
+        client.chat.completions.create.side_effect = create
+        return client
+
+    def test_request_is_structured_and_shares_prefix(self):
+        notes = build_op_summary({"operation_name": "IRON HAWK"})
+        request = build_tasks_request(notes, SUBORDINATE_UNITS, scheme_of_maneuver="1st assaults.")
+        schema = request["response_format"]["json_schema"]["schema"]
+        assert schema["required"] == SUBORDINATE_UNITS
+        assert schema["additionalProperties"] is False
+        prompt = request["messages"][-1]["content"]
+        assert "1st assaults." in prompt
+        assert prompt.endswith("Generate the 'Tasks to Subordinate Units' section.")
+        section = build_section_request("Signal", notes)
+        assert len(shared_prompt_prefix([request, section])) > len(notes)
+
+    def test_parse_tasks(self):
+        units = SUBORDINATE_UNITS[:2]
+        text = json.dumps({"1st platoon (rifle)": " Assault. ", units[1]: "", "Tanks": "Roll."})
+        assert parse_tasks(text, units) == {units[0]: "Assault."}
+        assert parse_tasks("not json", units) == {}
+        assert parse_tasks("[1, 2]", units) == {}
+
+    def test_long_tasks_are_clipped_to_the_field_limit(self):
+        unit = SUBORDINATE_UNITS[0]
+        limit = FIELD_LIMITS[task_key(unit)]
+        task = "Assault and clear OBJ EAGLE from the north " * 10
+        clipped = parse_tasks(json.dumps({unit: task}), [unit])[unit]
+        assert len(clipped) <= limit and clipped.endswith("...")
+        assert validate_form({task_key(unit): clipped}, partial=True)[1] == []
+        schema = build_tasks_request("notes", [unit])["response_format"]["json_schema"]["schema"]
+        assert schema["properties"][unit]["maxLength"] == limit
+
+    def test_all_blank_tasks_in_one_call(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        client = self._client()
+        with patch("opord.ai_helper.get_client", return_value=client):
+            result = generate_full_opord({"operation_name": "TASKED HAWK", "mission": "Seize OBJ X."})
+        assert client.chat.completions.create.call_count == len(AUTO_FILL_FIELDS) + 1
+        for unit, key in TASK_FIELDS:
+            assert result[key] == f"Task for {unit}."
+        # The tasks call comes last and sees the generated scheme of maneuver.
+        last = client.chat.completions.create.call_args.kwargs
+        assert "response_format" in last
+        assert "AI section." in last["messages"][-1]["content"]
+
+    def test_user_tasks_are_kept(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        first_key = TASK_FIELDS[0][1]
+        client = self._client()
+        form = {"operation_name": "KEPT HAWK", first_key: "Lead the assault."}
+        with patch("opord.ai_helper.get_client", return_value=client):
+            result = generate_full_opord(form)
+        assert result[first_key] == "Lead the assault."
+        request = client.chat.completions.create.call_args.kwargs
+        assert request["response_format"]["json_schema"]["schema"]["required"] == \
+            SUBORDINATE_UNITS[1:]
+        assert "Lead the assault." in request["messages"][-1]["content"]
+
+    def test_prefilled_tasks_skip_the_tasks_call(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        client = self._client()
+        prefilled = {key: "Prefetched section." for key, _ in AUTO_FILL_FIELDS}
+        prefilled.update((key, "Prefetched task.") for _, key in TASK_FIELDS)
+        reported = {}
+        with patch("opord.ai_helper.get_client", return_value=client):
+            result = generate_full_opord(
+                {"operation_name": "PREFETCHED HAWK"}, prefilled=prefilled,
+                on_generated=reported.update,
+            )
+        client.chat.completions.create.assert_not_called()
+        assert all(result[key] == "Prefetched task." for _, key in TASK_FIELDS)
+        assert reported == {}
+
+    def test_generated_text_is_reported(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        reported = {}
+        with patch("opord.ai_helper.get_client", return_value=self._client()):
+            generate_full_opord({"operation_name": "REPORTED HAWK"}, on_generated=reported.update)
+        assert set(reported) == {key for key, _ in AUTO_FILL_FIELDS} | {key for _, key in TASK_FIELDS}
+
+    def test_unusable_answer_leaves_tasks_blank(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        with patch("opord.ai_helper.get_client", return_value=self._client(tasks=[])):
+            result = generate_full_opord({"operation_name": "BLANK HAWK"})
+        assert not any(result.get(key) for _, key in TASK_FIELDS)
+
+    def test_local_mode_drafts_tasks(self, monkeypatch):
+        monkeypatch.setenv("OPORD_AI_MODE", "local")
+        result = generate_full_opord({"operation_name": "LOCAL HAWK", "mission": "Seize OBJ EAGLE."})
+        assert all("OBJ EAGLE" in result[key] for _, key in TASK_FIELDS[:4])
+
+    def test_hybrid_mode_keeps_task_drafts_on_failure(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        client = self._client()
+        client.chat.completions.create.side_effect = ValueError("model unavailable")
+        with patch("opord.ai_helper.get_client", return_value=client):
+            result = generate_full_opord({"operation_name": "FALLBACK HAWK"}, mode="hybrid")
+        assert all(result[key] for _, key in TASK_FIELDS)
+
+
+class TestRegenerateField:
+    def _client(self, text):
+        client = MagicMock()
+        client.chat.completions.create.return_value.choices[0].message.content = text
+        return client
+
+    def test_section_is_one_call(self):
+        client = self._client("New signal plan.")
+        form = {"operation_name": "REGEN ONE", "signal": "Old signal plan."}
+        assert regenerate_field(form, "signal", mode="ai", client=client) == "New signal plan."
+        assert client.chat.completions.create.call_count == 1
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][-1]["content"]
+        assert prompt.endswith("Generate the 'Command and Signal paragraph' section.")
+
+    def test_task_sees_other_tasks(self):
+        unit = SUBORDINATE_UNITS[1]
+        client = self._client(json.dumps({unit: "Block the road."}))
+        form = {"operation_name": "REGEN TWO", "task_1st": "Assault OBJ EAGLE."}
+        assert regenerate_field(form, "task_2nd", mode="ai", client=client) == "Block the road."
+        request = client.chat.completions.create.call_args.kwargs
+        assert request["response_format"]["json_schema"]["schema"]["required"] == [unit]
+        assert "Assault OBJ EAGLE." in request["messages"][-1]["content"]
+
+    def test_modes(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        form = {"operation_name": "REGEN THREE", "mission": "Seize OBJ EAGLE."}
+        assert regenerate_field(form, "signal", mode="ai") == ""
+        assert "OBJ EAGLE" in regenerate_field(form, "signal", mode="local")
+        client = self._client("")
+        client.chat.completions.create.side_effect = ValueError("model unavailable")
+        assert "OBJ EAGLE" in regenerate_field(form, "signal", mode="hybrid", client=client)
+        with pytest.raises(ValueError):
+            regenerate_field(form, "signal", mode="ai", client=client)
+
+    def test_unknown_field(self):
+        with pytest.raises(KeyError):
+            regenerate_field({}, "mission", mode="local")
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = MagicMock(headers=headers)
+
+
+class TestRetries:
+    def test_retries_429_honoring_retry_after(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = "After retry."
+        mock_client.chat.completions.create.side_effect = [
+            _RateLimited({"retry-after": "2"}),
+            mock_response,
+        ]
+        sleeps = []
+        monkeypatch.setattr("opord.ai_helper.time.sleep", sleeps.append)
+
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            result = generate_section("Mission Statement", "Attack objective EAGLE")
+        assert result == "After retry."
+        assert len(sleeps) == 1 and 2 <= sleeps[0] <= 2.5
+
+    def test_waits_for_capacity_with_a_timeout_and_refunds_failures(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        limiter = MagicMock()
+        monkeypatch.setattr("opord.ai_helper.get_rate_limiter", lambda: limiter)
+        monkeypatch.setattr("opord.ai_helper.time.sleep", lambda seconds: None)
+        mock_client = MagicMock()
+        mock_response = MagicMock(usage=None)
+        mock_response.choices[0].message.content = "After retry."
+        mock_client.chat.completions.create.side_effect = [
+            _RateLimited({"retry-after": "1"}),
+            mock_response,
+        ]
+
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            assert generate_section("Mission Statement", "Attack objective EAGLE") == "After retry."
+        estimated = limiter.acquire.call_args_list[0].args[0]
+        assert limiter.acquire.call_count == 2
+        assert all(call.kwargs["timeout"] == RATE_LIMIT_WAIT_SECONDS
+                   for call in limiter.acquire.call_args_list)
+        limiter.refund.assert_called_once_with(estimated)
+
+    def test_non_retryable_errors_raise(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = ValueError("bad request")
+
+        with patch("opord.ai_helper.get_client", return_value=mock_client):
+            with pytest.raises(ValueError):
+                generate_section("Mission Statement", "Attack objective EAGLE")
+        assert mock_client.chat.completions.create.call_count == 1
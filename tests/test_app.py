@@ -2,12 +2,14 @@
 import pytest
 
 # app.py imports dotenv and opord modules — ensure they're importable
+import subprocess
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app import app as flask_app, _form_to_opord_data
 from opord.generator import UNIT_NAME
+from opord.rate_limit import RateLimitTimeout
 
 
 @pytest.fixture()
@@ -66,6 +68,22 @@ def minimal_form():
     }
 
 
+def test_app_import_does_not_load_heavy_sdks():
+    code = (
+        "import sys, app; "
+        "print(sorted(m for m in ('openai', 'googleapiclient', 'google_auth_oauthlib', 'numpy') "
+        "if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(__file__)) or ".",
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == "[]"
+
+
 class TestIndexRoute:
     def test_get_returns_200(self, client):
         resp = client.get("/")
@@ -86,6 +104,30 @@ class TestIndexRoute:
             assert heading in html, f"Missing heading: {heading}"
 
 
+    def test_sets_etag_and_revalidates(self, client):
+        resp = client.get("/")
+        assert resp.headers.get("ETag")
+        again = client.get("/", headers={"If-None-Match": resp.headers["ETag"]})
+        assert again.status_code == 304
+
+    def test_gzips_when_accepted(self, client):
+        resp = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers.get("Content-Encoding") == "gzip"
+
+    def test_static_urls_are_fingerprinted(self, client):
+        html = client.get("/").data.decode()
+        assert "style.css?v=" in html
+
+    def test_fingerprinted_static_is_cached_long_term(self, client):
+        html = client.get("/").data.decode()
+        start = html.index("/static/style.css?v=")
+        url = html[start:html.index('"', start)]
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert resp.cache_control.max_age == 365 * 24 * 60 * 60
+        assert resp.cache_control.immutable
+
+
 class TestGenerateRoute:
     def test_post_returns_200(self, client, minimal_form):
         resp = client.post("/generate", data=minimal_form)
@@ -110,6 +152,391 @@ class TestGenerateRoute:
         assert resp.status_code == 200
 
 
+class TestGenerateValidation:
+    def test_oversized_field_is_rejected(self, client, minimal_form):
+        minimal_form["dz_lz"] = "X" * 10_000
+        resp = client.post("/generate", data=minimal_form)
+        assert resp.status_code == 400
+        assert b"DZ / LZ is too long" in resp.data
+
+    def test_missing_required_field_is_rejected(self, client, minimal_form):
+        minimal_form["mission"] = "   "
+        resp = client.post("/generate", data=minimal_form)
+        assert resp.status_code == 400
+        assert b"Mission Statement is required" in resp.data
+
+    def test_oversized_request_is_rejected(self, client, minimal_form, monkeypatch):
+        monkeypatch.setitem(flask_app.config, "MAX_CONTENT_LENGTH", 10_000)
+        minimal_form["attachments_detachments"] = "A" * 20_000
+        resp = client.post("/generate", data=minimal_form)
+        assert resp.status_code == 413
+        assert b"Request too large" in resp.data
+
+    def test_oversized_api_request_gets_json_error(self, client, monkeypatch):
+        monkeypatch.setitem(flask_app.config, "MAX_CONTENT_LENGTH", 10_000)
+        monkeypatch.setattr("app.get_client", lambda: object())
+        resp = client.post("/api/suggest", json={"mission": "A" * 20_000})
+        assert resp.status_code == 413
+        assert resp.get_json()["status"] == "too_large"
+
+    def test_suggest_reports_structured_errors(self, client, monkeypatch):
+        monkeypatch.setattr("app.get_client", lambda: object())
+        resp = client.post("/api/suggest", json={"mission": 42})
+        assert resp.status_code == 400
+        assert resp.get_json()["errors"] == [
+            {"field": "mission", "message": "Mission Statement must be text."}
+        ]
+
+
+class TestRevisionRoutes:
+    def test_generate_stores_revisions(self, client, minimal_form):
+        minimal_form["operation_name"] = "REVISION TEST"
+        client.post("/generate", data=minimal_form)
+        minimal_form["enemy_strength"] = "~45"
+        client.post("/generate", data=minimal_form)
+
+        history = client.get("/opords/REVISION TEST/revisions").get_json()
+        assert [r["version"] for r in history["revisions"]] == [1, 2]
+
+        first = client.get("/opords/REVISION TEST/revisions/1").get_json()
+        assert first["opord"]["situation"]["enemy"]["strength"] == "~30"
+
+        diff = client.get("/opords/REVISION TEST/diff").get_json()
+        assert diff["changes"] == [
+            {"path": "situation.enemy.strength", "old": "~30", "new": "~45"}
+        ]
+
+    def test_diff_of_a_first_revision(self, client, minimal_form):
+        minimal_form["operation_name"] = "FIRST DIFF"
+        client.post("/generate", data=minimal_form)
+        resp = client.get("/opords/FIRST DIFF/diff")
+        assert resp.status_code == 200
+        diff = resp.get_json()
+        assert (diff["from_version"], diff["to_version"]) == (0, 1)
+        assert {"path": "operation_name", "old": None, "new": "FIRST DIFF"} in diff["changes"]
+
+    def test_version_zero_is_404(self, client, minimal_form):
+        minimal_form["operation_name"] = "VERSION ZERO"
+        client.post("/generate", data=minimal_form)
+        assert client.get("/opords/VERSION ZERO/revisions/0").status_code == 404
+        assert client.get("/opords/VERSION ZERO/revisions/0/download/txt").status_code == 404
+
+    def test_session_references_revision(self, client, minimal_form):
+        client.post("/generate", data=minimal_form)
+        with client.session_transaction() as sess:
+            assert sess["opord_ref"]["operation"] == "IRON HAWK"
+            assert "opord_dict" not in sess
+
+    def test_unknown_operation_is_404(self, client):
+        assert client.get("/opords/NO SUCH OP/revisions").status_code == 404
+
+
+class TestSearchRoutes:
+    def test_generated_order_is_searchable(self, client, minimal_form):
+        minimal_form["operation_name"] = "SEARCH TEST"
+        minimal_form["insert_method"] = "HALO"
+        client.post("/generate", data=minimal_form)
+
+        payload = client.get("/api/search?q=search test halo").get_json()
+        assert payload["results"][0]["operation"] == "SEARCH TEST"
+
+        resp = client.get("/search?q=search test halo")
+        assert resp.status_code == 200
+        assert b"OPERATION SEARCH TEST" in resp.data
+
+    def test_empty_query(self, client):
+        resp = client.get("/search")
+        assert resp.status_code == 200
+        assert client.get("/api/search?q=").get_json()["results"] == []
+
+
+class TestDownloadRoutes:
+    def test_text_download_matches_preview(self, client, minimal_form):
+        minimal_form["operation_name"] = "DOWNLOAD TEST"
+        client.post("/generate", data=minimal_form)
+        resp = client.get("/download/txt")
+        assert resp.status_code == 200
+        assert resp.mimetype == "text/plain"
+        assert 'filename="OPORD-DOWNLOAD_TEST-v1.txt"' in resp.headers["Content-Disposition"]
+        assert b"OPERATION ORDER DOWNLOAD TEST-XX" in resp.data
+
+    def test_repeat_download_is_served_from_cache(self, client, minimal_form, monkeypatch):
+        minimal_form["operation_name"] = "CACHED DOWNLOAD"
+        client.post("/generate", data=minimal_form)
+        first = client.get("/download/md")
+
+        def fail(*args):
+            raise AssertionError("rendered again")
+
+        monkeypatch.setattr("app.stream_download", fail)
+        second = client.get("/download/md")
+        assert second.data == first.data
+        assert client.get("/download/md", headers={"If-None-Match": second.headers["ETag"]}).status_code == 304
+
+    def test_revision_download(self, client, minimal_form):
+        minimal_form["operation_name"] = "REVISION DOWNLOAD"
+        client.post("/generate", data=minimal_form)
+        resp = client.get("/opords/REVISION DOWNLOAD/revisions/1/download/json")
+        assert resp.get_json()["operation_name"] == "REVISION DOWNLOAD"
+        assert client.get("/opords/REVISION DOWNLOAD/revisions/9/download/json").status_code == 404
+
+    def test_pdf_download(self, client, minimal_form):
+        client.post("/generate", data=minimal_form)
+        resp = client.get("/download/pdf")
+        assert resp.mimetype == "application/pdf"
+        assert resp.data.startswith(b"%PDF-")
+        assert "Content-Encoding" not in resp.headers
+
+    def test_unknown_format_is_404(self, client, minimal_form):
+        client.post("/generate", data=minimal_form)
+        assert client.get("/download/docx").status_code == 404
+
+    def test_without_order_redirects(self, client):
+        assert client.get("/download/txt").status_code == 302
+
+
+class TestHealthz:
+    def test_returns_ok(self, client, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        resp = client.get("/healthz")
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["status"] == "ok"
+        assert body["ai_enabled"] is False
+
+    def test_reports_warm_up_failure(self, client, monkeypatch):
+        def broken():
+            raise RuntimeError("template error")
+
+        monkeypatch.setattr("app.warm_up", broken)
+        resp = client.get("/healthz")
+        assert resp.status_code == 503
+        assert resp.get_json()["status"] == "error"
+
+
+class TestLocalMode:
+    def test_generate_fills_blank_sections_locally(self, client, monkeypatch, minimal_form):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.setenv("OPORD_AI_MODE", "local")
+        assert b'name="use_ai"' in client.get("/").data
+        minimal_form["operation_name"] = "LOCAL DRAFT"
+        resp = client.post("/generate", data={**minimal_form, "use_ai": "on"})
+        assert resp.status_code == 200
+        order = client.get("/opords/LOCAL DRAFT/revisions/1").get_json()["opord"]
+        assert order["situation"]["enemy"]["capabilities"].startswith("The enemy (OPFOR platoon)")
+
+
+class TestRegenerateSection:
+    def _generate(self, client, form, name):
+        form["operation_name"] = name
+        assert client.post("/generate", data=form).status_code == 200
+
+    def test_rewrites_one_section(self, client, monkeypatch, minimal_form):
+        calls = []
+
+        def regenerate(form, key):
+            calls.append(key)
+            return "Fresh <intent>."
+
+        monkeypatch.setattr("app.enrichment_available", lambda: True)
+        monkeypatch.setattr("app.regenerate_field", regenerate)
+        self._generate(client, minimal_form, "REGEN HAWK")
+        resp = client.post("/opords/REGEN HAWK/sections/commanders_intent/regenerate")
+        assert resp.status_code == 200
+        assert calls == ["commanders_intent"]
+        assert resp.headers["X-OPORD-Version"] == "2"
+        body = resp.get_data(as_text=True)
+        assert body.startswith('<p class="section-text" id="section-commanders_intent">')
+        assert "Fresh &lt;intent&gt;." in body and "btn-regenerate" in body
+        assert len(body) < 1000
+        order = client.get("/opords/REGEN HAWK/revisions/2").get_json()["opord"]
+        assert order["execution"]["commanders_intent"] == "Fresh <intent>."
+        assert order["execution"]["scheme_of_maneuver"] == "1PLT left, 2PLT right."
+        assert "Fresh <intent>." in client.get("/download/txt").get_data(as_text=True)
+
+    def test_local_mode_task(self, client, monkeypatch, minimal_form):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.setenv("OPORD_AI_MODE", "local")
+        self._generate(client, minimal_form, "REGEN TASK")
+        resp = client.post("/opords/REGEN TASK/sections/task_2nd/regenerate")
+        assert resp.status_code == 200
+        order = client.get("/opords/REGEN TASK/revisions/2").get_json()["opord"]
+        assert order["execution"]["tasks_to_subordinates"]["2nd Platoon (Rifle)"].startswith(
+            "Isolate OBJ EAGLE"
+        )
+
+    def test_busy_ai_service(self, client, monkeypatch, minimal_form):
+        def busy(*args, **kwargs):
+            raise RateLimitTimeout("no capacity")
+
+        monkeypatch.setattr("app.enrichment_available", lambda: True)
+        monkeypatch.setattr("app.regenerate_field", busy)
+        monkeypatch.setattr("app.generate_full_opord", busy)
+        minimal_form["operation_name"] = "REGEN BUSY"
+        resp = client.post("/generate", data={**minimal_form, "use_ai": "on"})
+        assert resp.status_code == 200
+        assert b"The AI service is busy" in resp.data
+        resp = client.post("/opords/REGEN BUSY/sections/signal/regenerate")
+        assert resp.status_code == 503
+        assert resp.get_json()["status"] == "busy"
+
+    def test_result_page_offers_regenerate(self, client, monkeypatch, minimal_form):
+        monkeypatch.setattr("app.enrichment_available", lambda: True)
+        minimal_form["operation_name"] = "REGEN PAGE"
+        body = client.post("/generate", data=minimal_form).get_data(as_text=True)
+        assert "/opords/REGEN%20PAGE/sections/signal/regenerate" in body
+        assert "/opords/REGEN%20PAGE/sections/task_1st/regenerate" in body
+
+    def test_errors(self, client, monkeypatch, minimal_form):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.setenv("OPORD_AI_MODE", "ai")
+        assert client.post("/opords/NOPE/sections/signal/regenerate").status_code == 503
+        assert b"btn-regenerate" not in client.post(
+            "/generate", data={**minimal_form, "operation_name": "REGEN ERRORS"}).data
+
+        monkeypatch.setenv("OPORD_AI_MODE", "local")
+        assert client.post("/opords/NOPE/sections/signal/regenerate").status_code == 404
+        resp = client.post("/opords/REGEN ERRORS/sections/mission/regenerate")
+        assert resp.status_code == 404
+
+        def fail(form, key):
+            raise RuntimeError("model unavailable")
+
+        monkeypatch.setattr("app.regenerate_field", fail)
+        resp = client.post("/opords/REGEN ERRORS/sections/signal/regenerate")
+        assert resp.status_code == 502
+        assert "model unavailable" in resp.get_json()["error"]
+
+
+class TestDraftRoutes:
+    def test_autosave_round_trip(self, client):
+        resp = client.post("/api/drafts", json={"fields": {"operation_name": "DRAFT HAWK"}})
+        assert resp.status_code == 201
+        draft = resp.get_json()
+        url = f"/api/drafts/{draft['draft_id']}"
+        resp = client.patch(url, json={"revision": draft["revision"],
+                                       "fields": {"mission": " Seize OBJ EAGLE. "}})
+        assert resp.get_json()["revision"] == 2 and resp.get_json()["fields"] == {}
+        assert client.get(url).get_json()["fields"] == {
+            "operation_name": "DRAFT HAWK", "mission": "Seize OBJ EAGLE.",
+        }
+
+    def test_draft_feeds_generate(self, client):
+        draft = client.post("/api/drafts", json={"fields": {
+            "operation_name": "DRAFT GENERATED", "mission": "Seize OBJ EAGLE.", "dz_lz": "DZ OLD",
+        }}).get_json()
+        resp = client.post("/generate", data={"draft_id": draft["draft_id"], "dz_lz": "DZ NEW"})
+        assert resp.status_code == 200
+        order = client.get("/opords/DRAFT GENERATED/revisions/1").get_json()["opord"]
+        assert order["mission"] == "Seize OBJ EAGLE." and order["dz_lz"] == "DZ NEW"
+        resp = client.post("/generate", data={"draft_id": "expired"})
+        assert resp.status_code == 404
+
+    def test_invalid_requests(self, client):
+        draft_id = client.post("/api/drafts", json={}).get_json()["draft_id"]
+        url = f"/api/drafts/{draft_id}"
+        resp = client.patch(url, json={"revision": 0, "fields": {"colour": "red"}})
+        assert resp.status_code == 400
+        assert resp.get_json()["errors"][0]["field"] == "colour"
+        assert client.patch(url, json={"revision": "one", "fields": {}}).status_code == 400
+        assert client.patch("/api/drafts/missing", json={"revision": 0}).status_code == 404
+        assert client.get("/api/drafts/missing").status_code == 404
+
+    def test_paragraph_locks(self, client):
+        draft_id = client.post("/api/drafts", json={}).get_json()["draft_id"]
+        url = f"/api/drafts/{draft_id}"
+        resp = client.post(f"{url}/locks/3", json={"editor": "FSO"})
+        assert resp.get_json() == {"locks": {"3": "FSO"}}
+        resp = client.patch(url, json={"revision": 0, "editor": "CO",
+                                       "fields": {"commanders_intent": "Seize."}})
+        assert resp.status_code == 409
+        assert resp.get_json()["locks"] == {"3": "FSO"}
+        resp = client.patch(url, json={"revision": 0, "editor": "FSO",
+                                       "fields": {"scheme_of_fires": "Mortars."}})
+        assert resp.status_code == 200
+        # An empty patch polls the draft, locks included.
+        polled = client.patch(url, json={"revision": 0, "fields": {}}).get_json()
+        assert polled["fields"] == {"scheme_of_fires": "Mortars."}
+        assert polled["locks"] == {"3": "FSO"}
+        assert client.post(f"{url}/locks/3", json={"editor": "CO"}).status_code == 409
+        assert client.delete(f"{url}/locks/3?editor=FSO").get_json() == {"locks": {}}
+        assert client.post(f"{url}/locks/3", json={}).status_code == 400
+        assert client.post(f"{url}/locks/9", json={"editor": "CO"}).status_code == 404
+        assert client.post("/api/drafts/missing/locks/3", json={"editor": "CO"}).status_code == 404
+
+    def test_event_stream(self, client):
+        draft = client.post("/api/drafts", json={"fields": {"mission": "Seize OBJ EAGLE."}}).get_json()
+        resp = client.get(f"/api/drafts/{draft['draft_id']}/events", buffered=False)
+        assert resp.mimetype == "text/event-stream"
+        chunks = iter(resp.response)
+        assert next(chunks).startswith(b"retry:")
+        assert next(chunks) == (b'id: 1\nevent: delta\n'
+                                b'data: {"revision":1,"fields":{"mission":"Seize OBJ EAGLE."}}\n\n')
+        resp.close()
+        resp = client.get(f"/api/drafts/{draft['draft_id']}/events", buffered=False,
+                          headers={"Last-Event-ID": "1"})
+        chunks = iter(resp.response)
+        next(chunks)
+        assert b"event: locks" in next(chunks)
+        resp.close()
+        assert client.get("/api/drafts/missing/events").status_code == 404
+
+    def test_event_stream_refused_when_slots_are_taken(self, client, monkeypatch):
+        from opord.collab import StreamSlots
+
+        monkeypatch.setattr("app.live_streams", StreamSlots(0))
+        draft_id = client.post("/api/drafts", json={}).get_json()["draft_id"]
+        resp = client.get(f"/api/drafts/{draft_id}/events")
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "60"
+
+    def test_pages_carry_autosave(self, client, minimal_form):
+        page = client.get("/").data
+        assert b'name="draft_id"' in page and b'data-paragraph="5"' in page
+        minimal_form["operation_name"] = "DRAFT PAGE"
+        assert b'removeItem("opord-draft-id")' in client.post("/generate", data=minimal_form).data
+
+
+class TestSuggestRoute:
+    def test_disabled_without_ai(self, client, monkeypatch, minimal_form):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        resp = client.post("/api/suggest", data=minimal_form)
+        assert resp.status_code == 503
+        assert resp.get_json()["status"] == "disabled"
+
+    def test_disabled_in_local_mode(self, client, monkeypatch, minimal_form):
+        monkeypatch.setenv("OPORD_AI_MODE", "local")
+        monkeypatch.setattr("app.get_client", lambda: object())
+        monkeypatch.setattr("app.prefetcher.submit", pytest.fail)
+        resp = client.post("/api/suggest", json=minimal_form)
+        assert resp.status_code == 503
+        assert resp.get_json()["status"] == "disabled"
+
+    def test_starts_prefetch(self, client, monkeypatch, minimal_form):
+        monkeypatch.setattr("app.get_client", lambda: object())
+        monkeypatch.setattr("app.prefetcher.submit", lambda payload, **kw: ("abc", "started"))
+        resp = client.post("/api/suggest", json=minimal_form)
+        assert resp.status_code == 202
+        assert resp.get_json() == {"key": "abc", "status": "started"}
+
+
+class TestSimilarOrderAutofill:
+    def test_close_past_order_fills_blank_sections(self, client, minimal_form, monkeypatch):
+        monkeypatch.setattr("app.generate_full_opord", lambda flat, **kw: flat)
+        minimal_form["operation_name"] = "AUTOFILL SOURCE"
+        minimal_form["mission"] = "C Co raids the radar site at OBJ KESTREL."
+        minimal_form["dz_lz"] = "LZ KESTREL"
+        minimal_form["commanders_intent"] = "Seize the DZ before enemy reinforcement."
+        client.post("/generate", data=minimal_form)
+
+        minimal_form["operation_name"] = "AUTOFILL TARGET"
+        minimal_form["commanders_intent"] = ""
+        resp = client.post("/generate", data={**minimal_form, "use_ai": "on"})
+        assert b"filled from the similar order" in resp.data
+        target = client.get("/opords/AUTOFILL TARGET/revisions/1").get_json()["opord"]
+        assert target["execution"]["commanders_intent"] == "Seize the DZ before enemy reinforcement."
+
+
 class TestFormToOpordData:
     def test_maps_operation_name(self, minimal_form):
         data = _form_to_opord_data(minimal_form)
@@ -0,0 +1,233 @@
+"""Tests for offline batch AI enrichment."""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from opord.ai_helper import AUTO_FILL_FIELDS
+from opord.batch import (
+    BatchJob,
+    LocalBatchBackend,
+    OpenAIBatchBackend,
+    build_batch_requests,
+    load_order,
+    main,
+    parse_batch_output,
+)
+from opord.schema import TASK_FIELDS, validate_form
+
+
+@pytest.fixture()
+def orders():
+    return {
+        "iron-hawk": {"operation_name": "IRON HAWK", "mission": "Seize OBJ EAGLE.",
+                      "commanders_intent": "Secure the DZ."},
+        "steel-talon": {"operation_name": "STEEL TALON", "mission": "Clear OBJ FALCON."},
+    }
+
+
+class _CountingBackend(LocalBatchBackend):
+    def __init__(self, directory, **kwargs):
+        super().__init__(directory, **kwargs)
+        self.submissions = 0
+
+    def submit(self, requests_path, metadata=None):
+        self.submissions += 1
+        return super().submit(requests_path, metadata)
+
+
+class TestBuildBatchRequests:
+    def test_one_request_per_blank_section(self, orders):
+        lines = build_batch_requests(orders)
+        assert len(lines) == 2 * len(AUTO_FILL_FIELDS) - 1 + 2  # plus one tasks request each
+        assert "iron-hawk:commanders_intent" not in {line["custom_id"] for line in lines}
+        first = lines[0]
+        assert first["method"] == "POST" and first["url"] == "/v1/chat/completions"
+        assert "Operation: IRON HAWK." in first["body"]["messages"][-1]["content"]
+
+    def test_one_structured_tasks_request_per_order(self, orders):
+        orders["iron-hawk"]["task_1st"] = "Seize OBJ EAGLE."
+        orders["iron-hawk"]["scheme_of_maneuver"] = "1PLT left, 2PLT right."
+        tasks = {line["custom_id"]: line["body"] for line in build_batch_requests(orders)
+                 if line["custom_id"].endswith(":tasks")}
+        assert set(tasks) == {"iron-hawk:tasks", "steel-talon:tasks"}
+        body = tasks["iron-hawk:tasks"]
+        schema = body["response_format"]["json_schema"]["schema"]
+        assert list(schema["properties"]) == [unit for unit, _ in TASK_FIELDS[1:]]
+        prompt = body["messages"][-1]["content"]
+        assert "1PLT left, 2PLT right." in prompt and "Seize OBJ EAGLE." in prompt
+
+
+class TestParseBatchOutput:
+    def test_texts_and_errors(self):
+        lines = [
+            json.dumps({"custom_id": "a:mission", "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": " Text. "}}]},
+            }, "error": None}),
+            json.dumps({"custom_id": "b:mission", "response": {
+                "status_code": 429, "body": {"error": {"message": "Too many tokens"}},
+            }, "error": None}),
+            "",
+        ]
+        texts, errors = parse_batch_output(lines)
+        assert texts == {"a:mission": "Text."}
+        assert errors == {"b:mission": "Too many tokens"}
+
+
+class TestBatchJob:
+    def test_run_merges_into_each_order(self, tmp_path, orders):
+        job = BatchJob(str(tmp_path / "job"))
+        enriched = job.run(orders, LocalBatchBackend(str(tmp_path / "local")))
+        assert enriched["iron-hawk"]["commanders_intent"] == "Secure the DZ."
+        assert enriched["steel-talon"]["commanders_intent"] == (
+            "[Commander's Intent: batch stand-in text]"
+        )
+        on_disk = json.loads((tmp_path / "job" / "enriched" / "steel-talon.json").read_text())
+        assert on_disk == enriched["steel-talon"]
+
+    def test_tasks_answer_fills_blank_task_fields(self, tmp_path, orders):
+        orders["iron-hawk"]["task_1st"] = "Seize OBJ EAGLE."
+        job = BatchJob(str(tmp_path / "job"))
+        enriched = job.run(orders, LocalBatchBackend(str(tmp_path / "local")))
+        (first_unit, first_key), (second_unit, second_key) = TASK_FIELDS[:2]
+        assert enriched["iron-hawk"][first_key] == "Seize OBJ EAGLE."
+        assert enriched["iron-hawk"][second_key] == f"[{second_unit}: batch stand-in task]"
+        assert enriched["steel-talon"][first_key] == f"[{first_unit}: batch stand-in task]"
+
+    def test_long_generated_tasks_still_validate(self, tmp_path, orders):
+        def verbose(body):
+            if "response_format" not in body:
+                return "Text."
+            units = body["response_format"]["json_schema"]["schema"]["properties"]
+            return json.dumps({unit: "Clear the trenchline north of OBJ EAGLE " * 8
+                               for unit in units})
+
+        job = BatchJob(str(tmp_path / "job"))
+        job.run(orders, LocalBatchBackend(str(tmp_path / "local"), complete=verbose))
+        _, form = load_order(str(tmp_path / "job" / "enriched" / "steel-talon.json"))
+        assert form["task_1st"].endswith("...")
+        assert validate_form(form)[1] == []
+
+    def test_rerun_resumes_without_resubmitting(self, tmp_path, orders):
+        backend = _CountingBackend(str(tmp_path / "local"))
+        BatchJob(str(tmp_path / "job")).run(orders, backend)
+        BatchJob(str(tmp_path / "job")).run(orders, backend)
+        assert backend.submissions == 1
+
+    def test_failed_requests_leave_fields_blank(self, tmp_path, orders):
+        def flaky(body):
+            if "Scheme of Fires" in body["messages"][-1]["content"]:
+                raise RuntimeError("content filter")
+            return "Text."
+
+        job = BatchJob(str(tmp_path / "job"))
+        enriched = job.run(orders, LocalBatchBackend(str(tmp_path / "local"), complete=flaky))
+        assert enriched["iron-hawk"]["scheme_of_fires"] == ""
+        assert job.state["failed"] == {
+            "iron-hawk:scheme_of_fires": "content filter",
+            "steel-talon:scheme_of_fires": "content filter",
+        }
+
+    def test_timeout_returns_none_and_keeps_batch_id(self, tmp_path, orders):
+        backend = MagicMock(name="backend")
+        backend.name = "openai"
+        backend.submit.return_value = "batch_123"
+        backend.status.return_value = "in_progress"
+        job = BatchJob(str(tmp_path / "job"))
+        assert job.run(orders, backend, timeout=0) is None
+        assert BatchJob(str(tmp_path / "job")).state["batch_id"] == "batch_123"
+
+    def test_failed_batch_is_resubmitted_next_run(self, tmp_path, orders):
+        backend = MagicMock(name="backend")
+        backend.name = "openai"
+        backend.submit.return_value = "batch_123"
+        backend.status.return_value = "failed"
+        job = BatchJob(str(tmp_path / "job"))
+        with pytest.raises(RuntimeError):
+            job.run(orders, backend)
+        assert job.state["batch_id"] is None
+
+    def test_orders_without_blank_sections_need_no_batch(self, tmp_path):
+        full = {key: "Given." for key, _ in AUTO_FILL_FIELDS}
+        full.update((key, "Given.") for _, key in TASK_FIELDS)
+        backend = _CountingBackend(str(tmp_path / "local"))
+        enriched = BatchJob(str(tmp_path / "job")).run({"full": full}, backend)
+        assert backend.submissions == 0
+        assert enriched["full"]["commanders_intent"] == "Given."
+
+    def test_invalid_order_is_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="bad"):
+            BatchJob(str(tmp_path / "job")).prepare({"bad": {"mission": 42}})
+
+
+class TestOpenAIBatchBackend:
+    def test_submit_poll_fetch(self, tmp_path):
+        client = MagicMock()
+        client.files.create.return_value = SimpleNamespace(id="file_in")
+        client.batches.create.return_value = SimpleNamespace(id="batch_1")
+        client.batches.retrieve.return_value = SimpleNamespace(
+            status="completed", output_file_id="file_out", error_file_id=None
+        )
+        client.files.content.return_value = SimpleNamespace(text='{"custom_id": "x"}')
+        requests_path = tmp_path / "requests.jsonl"
+        requests_path.write_text("{}\n")
+
+        backend = OpenAIBatchBackend(client)
+        assert backend.submit(str(requests_path)) == "batch_1"
+        assert client.batches.create.call_args.kwargs["input_file_id"] == "file_in"
+        assert backend.status("batch_1") == "completed"
+        assert backend.fetch("batch_1") == '{"custom_id": "x"}'
+
+    def test_requires_api_key(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        with pytest.raises(RuntimeError):
+            OpenAIBatchBackend()
+
+
+class TestCli:
+    def test_local_run(self, tmp_path, capsys):
+        order = tmp_path / "iron-hawk.json"
+        order.write_text(json.dumps({"operation_name": "IRON HAWK", "mission": "Seize OBJ EAGLE."}))
+        job_dir = tmp_path / "job"
+        assert main([str(order), "--job", str(job_dir), "--local"]) == 0
+        assert "Merged" in capsys.readouterr().out
+        assert (job_dir / "enriched" / "iron-hawk.json").exists()
+
+    def test_pdf_dir(self, tmp_path):
+        order = tmp_path / "iron-hawk.json"
+        order.write_text(json.dumps({"operation_name": "IRON HAWK"}))
+        pdf_dir = tmp_path / "pdf"
+        assert main([str(order), "--job", str(tmp_path / "job"), "--local",
+                     "--pdf-dir", str(pdf_dir)]) == 0
+        assert (pdf_dir / "iron-hawk.pdf").read_bytes().startswith(b"%PDF-")
+
+    def test_unreadable_orders_are_reported(self, tmp_path, capsys):
+        bad = tmp_path / "bad.json"
+        bad.write_text("{not json")
+        for path in (tmp_path / "missing.json", bad):
+            assert main([str(path), "--job", str(tmp_path / "job"), "--local"]) == 1
+            assert capsys.readouterr().err.startswith("error: ")
+
+    def test_duplicate_order_ids_are_rejected(self, tmp_path, capsys):
+        paths = []
+        for folder in ("a", "b"):
+            (tmp_path / folder).mkdir()
+            path = tmp_path / folder / "x.json"
+            path.write_text(json.dumps({"operation_name": folder.upper()}))
+            paths.append(str(path))
+        assert main(paths + ["--job", str(tmp_path / "job"), "--local"]) == 1
+        assert "already used by" in capsys.readouterr().err
+
+    def test_load_yaml_order(self, tmp_path):
+        path = tmp_path / "op.yaml"
+        path.write_text("operation_name: X\nexecution:\n  commanders_intent: Y\n")
+        assert load_order(str(path))[1]["commanders_intent"] == "Y"
+
+    def test_load_nested_order(self, tmp_path):
+        path = tmp_path / "op.json"
+        path.write_text(json.dumps({"operation_name": "X", "execution": {"commanders_intent": "Y"}}))
+        order_id, form = load_order(str(path))
+        assert order_id == "op"
+        assert form["commanders_intent"] == "Y"
@@ -0,0 +1,174 @@
+"""Tests for the bulk Google Slides exporter (fake Google services — no network)."""
+import json
+import threading
+
+from opord.bulk_export import bulk_export_to_slides, main
+from opord.slides_scheduler import QuotaScheduler
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Response", (dict,), {"status": status})()
+
+
+class FakeRequest:
+    def __init__(self, google, kind, body):
+        self.google, self.kind, self.body = google, kind, body
+
+    def execute(self):
+        return self.google.answer(self)
+
+
+class FakeBatch:
+    def __init__(self, google, callback):
+        self.google, self.callback = google, callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.google.batches.append([request.kind for _, request in self.requests])
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except FakeHttpError as exc:
+                self.callback(request_id, None, exc)
+
+
+class FakeGoogle:
+    """Drive and Slides services sharing one record of the calls made."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.batches = []
+        self.updates = {}
+        self.update_threads = set()
+        self.built = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name):
+        self.built.append(name)
+        return self
+
+    # Drive
+    def files(self):
+        return self
+
+    def create(self, body, fields=None):
+        kind = "folder" if body["mimeType"].endswith("folder") else "create"
+        return FakeRequest(self, kind, body)
+
+    def copy(self, fileId, body, fields=None):
+        return FakeRequest(self, "copy", dict(body, template=fileId))
+
+    # Slides
+    def presentations(self):
+        return self
+
+    def get(self, presentationId, fields=None):
+        return FakeRequest(self, "get", {"id": presentationId})
+
+    def batchUpdate(self, presentationId, body):
+        return FakeRequest(self, "update", {"id": presentationId, **body})
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def answer(self, request):
+        body = request.body
+        if request.kind == "folder":
+            return {"id": "folder-1"}
+        if request.kind in ("copy", "create"):
+            if body["name"] in self.failing:
+                raise FakeHttpError(404)
+            assert body["parents"] == ["folder-1"]
+            return {"id": f"deck-{body['name']}"}
+        if request.kind == "get":
+            return {"slides": [{"objectId": "p", "pageElements": [
+                {"objectId": "t", "shape": {"placeholder": {"type": "CENTERED_TITLE"}}}]}]}
+        with self.lock:
+            self.updates[body["id"]] = body["requests"]
+            self.update_threads.add(threading.get_ident())
+        return {"presentationId": body["id"], "replies": [{} for _ in body["requests"]]}
+
+
+def _orders(*names):
+    return [{"operation_name": name, "unit_short": "C/1-7 CAV", "mission": f"{name} mission"}
+            for name in names]
+
+
+def _export(google, orders, **kwargs):
+    schedulers = {api: QuotaScheduler(None) for api in ("drive", "slides", "slides_read")}
+    return bulk_export_to_slides(orders, "EX HAWK", schedulers=schedulers,
+                                 services=google, **kwargs)
+
+
+class TestBulkExport:
+    def test_blank_decks_in_one_folder(self, monkeypatch):
+        monkeypatch.delenv("GOOGLE_SLIDES_TEMPLATE_ID", raising=False)
+        google = FakeGoogle()
+        result = _export(google, _orders("ALPHA", "BRAVO", "CHARLIE"))
+        assert result.folder_url.endswith("/folder-1")
+        assert google.batches == [["create"] * 3, ["get"] * 3]
+        assert result.errors == {}
+        assert result.urls[1] == (
+            "https://docs.google.com/presentation/d/deck-OPORD BRAVO - C/1-7 CAV/edit"
+        )
+        requests = google.updates["deck-OPORD ALPHA - C/1-7 CAV"]
+        assert requests[0]["insertText"]["objectId"] == "t"
+        assert any("createSlide" in request for request in requests)
+
+    def test_template_copies_skip_reads(self, monkeypatch):
+        monkeypatch.setenv("GOOGLE_SLIDES_TEMPLATE_ID", "tmpl")
+        google = FakeGoogle()
+        result = _export(google, _orders("ALPHA", "BRAVO"))
+        assert google.batches == [["copy", "copy"]]
+        assert all(url for url in result.urls)
+        requests = google.updates["deck-OPORD BRAVO - C/1-7 CAV"]
+        assert {"text": "{{MISSION}}", "matchCase": True} in [
+            r["replaceAllText"]["containsText"] for r in requests
+        ]
+
+    def test_updates_run_concurrently_with_a_service_each(self, monkeypatch):
+        monkeypatch.setenv("GOOGLE_SLIDES_TEMPLATE_ID", "tmpl")
+        google = FakeGoogle()
+        barrier = threading.Barrier(2, timeout=5)
+        answer = google.answer
+
+        def answer_together(request):
+            if request.kind == "update":
+                barrier.wait()  # both updates must be in flight at once
+            return answer(request)
+
+        google.answer = answer_together
+        result = _export(google, _orders("ALPHA", "BRAVO"), max_workers=2)
+        assert result.errors == {}
+        assert len(google.update_threads) == 2
+        assert google.built.count("slides") == 3  # one for reads, one per worker
+
+    def test_failed_order_does_not_stop_the_rest(self, monkeypatch):
+        monkeypatch.delenv("GOOGLE_SLIDES_TEMPLATE_ID", raising=False)
+        google = FakeGoogle(failing={"OPORD BRAVO - C/1-7 CAV"})
+        result = _export(google, _orders("ALPHA", "BRAVO", "CHARLIE"))
+        assert list(result.errors) == [1]
+        assert result.urls[1] is None
+        assert result.urls[0] and result.urls[2]
+        assert len(google.updates) == 2
+
+
+def test_unconfigured_export(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("GOOGLE_CREDENTIALS_FILE", str(tmp_path / "missing.json"))
+    order = tmp_path / "alpha.json"
+    order.write_text(json.dumps({"operation_name": "ALPHA"}))
+    assert bulk_export_to_slides(_orders("ALPHA"), "EX") is None
+    assert main([str(order), "--folder", "EX"]) == 1
+    assert "not configured" in capsys.readouterr().err
+
+
+def test_cli_rejects_bad_order_file(tmp_path, capsys):
+    order = tmp_path / "bad.json"
+    order.write_text("[1, 2]")
+    assert main([str(order), "--folder", "EX"]) == 1
+    assert "expected a mapping" in capsys.readouterr().err
@@ -0,0 +1,159 @@
+"""Tests for the order-file CLI and watch mode."""
+import json
+import os
+
+import pytest
+
+from opord.cli import OrderRenderer, Watcher, load_order_file, main
+from opord.generator import OPORDGenerator
+
+ORDER_YAML = """\
+operation_name: IRON HAWK
+mission: Seize OBJ EAGLE.
+insert_method: HALO
+friendly_forces:
+  higher: 1st Battalion
+commanders_intent: Secure the DZ.
+time_zone: Z
+"""
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    # Make sure the watcher sees a new signature even on coarse clocks.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestLoadOrderFile:
+    def test_yaml(self, tmp_path):
+        path = tmp_path / "iron-hawk.yaml"
+        _write(path, ORDER_YAML)
+        data = load_order_file(str(path))
+        assert data.operation_name == "IRON HAWK"
+        assert data.mission == "Seize OBJ EAGLE."
+
+    def test_json_matches_yaml(self, tmp_path):
+        yaml_path = tmp_path / "a.yaml"
+        _write(yaml_path, ORDER_YAML)
+        json_path = tmp_path / "a.json"
+        _write(json_path, json.dumps({
+            "operation_name": "IRON HAWK", "mission": "Seize OBJ EAGLE.",
+            "insert_method": "HALO", "friendly_forces_higher": "1st Battalion",
+            "commanders_intent": "Secure the DZ.", "time_zone": "Z",
+        }))
+        assert (OPORDGenerator(load_order_file(str(yaml_path))).generate_text()
+                == OPORDGenerator(load_order_file(str(json_path))).generate_text())
+
+    def test_yaml_scalars_become_text(self, tmp_path):
+        path = tmp_path / "a.yaml"
+        _write(path, "operation_name: IRON HAWK\nreference_maps: 1234\n")
+        assert load_order_file(str(path)).reference_maps == "1234"
+
+    @pytest.mark.parametrize("text", ["- just\n- a list\n", "mission: [unclosed\n"])
+    def test_bad_files_raise_value_error(self, tmp_path, text):
+        path = tmp_path / "bad.yaml"
+        _write(path, text)
+        with pytest.raises(ValueError, match="bad.yaml"):
+            load_order_file(str(path))
+
+
+class TestOrderRenderer:
+    def test_writes_text_and_json(self, tmp_path):
+        source = tmp_path / "iron-hawk.yaml"
+        _write(source, ORDER_YAML)
+        out = tmp_path / "out"
+        written = OrderRenderer(str(out)).render(str(source))
+        assert sorted(written) == [str(out / "iron-hawk.json"), str(out / "iron-hawk.txt")]
+        expected = OPORDGenerator(load_order_file(str(source)))
+        assert (out / "iron-hawk.txt").read_text() == expected.generate_text() + "\n"
+        assert json.loads((out / "iron-hawk.json").read_text()) == expected.generate_dict()
+
+    def test_unchanged_file_writes_nothing(self, tmp_path):
+        source = tmp_path / "a.yaml"
+        _write(source, ORDER_YAML)
+        renderer = OrderRenderer(str(tmp_path / "out"))
+        renderer.render(str(source))
+        assert renderer.render(str(source)) == []
+
+    def test_only_changed_sections_are_rendered(self, tmp_path):
+        source = tmp_path / "a.yaml"
+        _write(source, ORDER_YAML)
+        renderer = OrderRenderer(str(tmp_path / "out"))
+        renderer.render(str(source))
+        first = renderer.sections_rendered
+        _write(source, ORDER_YAML.replace("Secure the DZ.", "Secure the LZ."))
+        written = renderer.render(str(source))
+        # Commander's intent lives in paragraph 3 only.
+        assert renderer.sections_rendered - first == 1
+        assert len(written) == 2
+        assert "Secure the LZ." in (tmp_path / "out" / "a.txt").read_text()
+
+    def test_markdown_reuses_unchanged_sections(self, tmp_path):
+        source = tmp_path / "a.yaml"
+        _write(source, ORDER_YAML)
+        renderer = OrderRenderer(str(tmp_path / "out"), formats=("md",))
+        renderer.render(str(source))
+        _write(source, ORDER_YAML.replace("Secure the DZ.", "Secure the LZ."))
+        assert renderer.render(str(source)) == [str(tmp_path / "out" / "a.md")]
+        expected = "".join(OPORDGenerator(load_order_file(str(source))).iter_markdown())
+        assert (tmp_path / "out" / "a.md").read_text() == expected
+        assert "Secure the LZ." in expected
+
+    def test_extra_formats(self, tmp_path):
+        source = tmp_path / "a.yaml"
+        _write(source, ORDER_YAML)
+        OrderRenderer(str(tmp_path / "out"), formats=("md", "pdf")).render(str(source))
+        assert (tmp_path / "out" / "a.md").read_text().startswith("**")
+        assert (tmp_path / "out" / "a.pdf").read_bytes().startswith(b"%PDF-")
+
+
+class TestWatcher:
+    def test_scan_picks_up_changes_and_deletions(self, tmp_path):
+        orders = tmp_path / "orders"
+        out = orders / "rendered"
+        _write(orders / "a.yaml", ORDER_YAML)
+        _write(orders / "sub" / "b.yaml", ORDER_YAML)
+        log = []
+        watcher = Watcher(str(orders), OrderRenderer(str(out), root=str(orders)), log=log.append)
+
+        watcher.scan()
+        assert (out / "a.txt").exists()
+        assert (out / "sub" / "b.txt").exists()
+        assert len(log) == 2
+
+        log.clear()
+        watcher.scan()  # nothing changed, and the outputs themselves are ignored
+        assert log == []
+
+        _write(orders / "a.yaml", ORDER_YAML.replace("HALO", "HAHO"))
+        (orders / "sub" / "b.yaml").unlink()
+        watcher.scan()
+        assert "HAHO" in (out / "a.txt").read_text()
+        assert not (out / "sub" / "b.txt").exists()
+        assert any(line.startswith("removed") for line in log)
+
+    def test_errors_are_logged_not_raised(self, tmp_path):
+        _write(tmp_path / "bad.yaml", "- not an order\n")
+        log = []
+        Watcher(str(tmp_path), OrderRenderer(str(tmp_path / "out")), log=log.append).scan()
+        assert log and log[0].startswith("error:")
+
+
+class TestMain:
+    def test_render_directory(self, tmp_path, capsys):
+        _write(tmp_path / "orders" / "a.yaml", ORDER_YAML)
+        out = tmp_path / "out"
+        assert main(["render", str(tmp_path / "orders"), "--out", str(out),
+                     "--format", "txt"]) == 0
+        assert [p.name for p in out.iterdir()] == ["a.txt"]
+
+    def test_render_reports_errors(self, tmp_path, capsys):
+        _write(tmp_path / "bad.yaml", "- not an order\n")
+        assert main(["render", str(tmp_path / "bad.yaml"), "--out", str(tmp_path / "out")]) == 1
+        assert "error:" in capsys.readouterr().err
+
+    def test_unknown_format_is_rejected(self, tmp_path):
+        with pytest.raises(SystemExit):
+            main(["render", "a.yaml", "--format", "docx"])
@@ -0,0 +1,100 @@
+"""Tests for live shared-draft event streams."""
+import json
+import threading
+
+import pytest
+
+from opord.collab import DraftHub, StreamSlots, event_stream, sse_event
+from opord.drafts import DraftStore
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return DraftStore(str(tmp_path / "opord.db"))
+
+
+def _events(chunks):
+    """Parse SSE chunks into (event, data) pairs, skipping comments and retry."""
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines()
+                      if not line.startswith((":", "retry")))
+        if fields:
+            parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def test_sse_event_format():
+    assert sse_event("delta", {"a": 1}, 7) == 'id: 7\nevent: delta\ndata: {"a":1}\n\n'
+
+
+def test_stream_sends_only_new_fields(store):
+    draft_id = store.create({"mission": "Seize OBJ EAGLE.", "dz_lz": "DZ A"}).draft_id
+    store.patch(draft_id, 1, {"dz_lz": "DZ B"})
+    stream = event_stream(store, DraftHub(), draft_id, revision=1, max_seconds=0)
+    assert _events(stream) == [
+        ("delta", {"revision": 2, "fields": {"dz_lz": "DZ B"}}),
+        ("locks", {"locks": {}}),
+    ]
+
+
+def test_stream_wakes_on_change(store):
+    hub = DraftHub()
+    draft_id = store.create().draft_id
+    stream = event_stream(store, hub, draft_id, poll_seconds=30, max_seconds=30)
+    assert next(stream).startswith("retry:")
+    assert _events([next(stream)]) == [("locks", {"locks": {}})]
+
+    def edit():
+        store.patch(draft_id, 0, {"scheme_of_fires": "Mortars."}, editor="FSO")
+        hub.notify(draft_id)
+
+    timer = threading.Timer(0.05, edit)
+    timer.start()
+    # Returns well before the 30 s poll: the hub wakes the stream.
+    assert _events([next(stream), next(stream)]) == [
+        ("delta", {"revision": 1, "fields": {"scheme_of_fires": "Mortars."}}),
+        ("locks", {"locks": {"3": "FSO"}}),
+    ]
+    timer.join()
+    stream.close()
+
+
+def test_stream_picks_up_other_processes_by_polling(store):
+    draft_id = store.create().draft_id
+    stream = event_stream(store, DraftHub(), draft_id, poll_seconds=0.01, max_seconds=5)
+    next(stream), next(stream)
+    store.patch(draft_id, 0, {"mission": "Seize."})  # no notify: another worker
+    assert _events([next(stream)])[0][1]["fields"] == {"mission": "Seize."}
+    stream.close()
+
+
+def test_stream_ends_when_draft_is_gone(store):
+    draft_id = store.create().draft_id
+    store.delete(draft_id)
+    assert _events(event_stream(store, DraftHub(), draft_id))[-1][0] == "gone"
+
+
+def test_revision_from_another_draft_restarts(store):
+    draft_id = store.create({"mission": "A"}).draft_id
+    events = _events(event_stream(store, DraftHub(), draft_id, revision=50, max_seconds=0))
+    assert events[0] == ("delta", {"revision": 1, "fields": {"mission": "A"}})
+
+
+def test_stream_slots_are_returned_on_close():
+    started = []
+
+    def stream():
+        started.append(True)
+        yield "data"
+
+    slots = StreamSlots(1)
+    first = slots.open(stream())
+    refused = stream()
+    assert slots.open(refused) is None
+    assert list(first) == ["data"]
+    first.close()
+    first.close()  # closing twice frees one slot only
+    second = slots.open(stream())
+    assert second is not None and slots.open(stream()) is None
+    assert started == [True]
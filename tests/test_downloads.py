@@ -0,0 +1,53 @@
+"""Tests for streamed OPORD downloads."""
+import json
+
+from opord.downloads import (
+    CHUNK_BYTES,
+    cached_download,
+    content_key,
+    download_filename,
+    stream_download,
+)
+from opord.generator import OPORDData, OPORDGenerator
+from opord.schema import opord_data_from_dict
+
+
+def _document(**fields):
+    return OPORDGenerator(OPORDData(operation_name="IRON HAWK", **fields)).generate_dict()
+
+
+class TestOpordDataFromDict:
+    def test_round_trip(self):
+        document = _document(mission="Seize OBJ EAGLE.", dz_lz="DZ FALCON")
+        document["execution"]["tasks_to_subordinates"] = {"Weapons Platoon": "Support by fire."}
+        assert OPORDGenerator(opord_data_from_dict(document)).generate_dict() == document
+
+
+class TestStreamDownload:
+    def test_text_matches_generate_text_and_is_cached(self):
+        document = _document(mission="Seize OBJ EAGLE.")
+        key = content_key(document, "txt")
+        body = b"".join(stream_download(document, "txt", key))
+        assert body.decode("utf-8") == OPORDGenerator(opord_data_from_dict(document)).generate_text()
+        assert cached_download(key) == body
+
+    def test_json(self):
+        document = _document(mission="Seize OBJ ÉAGLE.")
+        body = b"".join(stream_download(document, "json", content_key(document, "json")))
+        assert json.loads(body) == document
+
+    def test_large_orders_stream_in_several_chunks(self):
+        document = _document(mission="M" * (3 * CHUNK_BYTES))
+        chunks = list(stream_download(document, "md", content_key(document, "md")))
+        assert len(chunks) >= 2
+
+    def test_key_depends_on_content_and_format(self):
+        a, b = _document(mission="A."), _document(mission="B.")
+        assert content_key(a, "txt") == content_key(_document(mission="A."), "txt")
+        assert content_key(a, "txt") != content_key(b, "txt")
+        assert content_key(a, "txt") != content_key(a, "md")
+
+
+def test_download_filename_is_safe():
+    assert download_filename('IRON "HAWK"/../x', "md", 3) == "OPORD-IRON_HAWK_x-v3.md"
+    assert download_filename("", "txt") == "OPORD-TBD.txt"
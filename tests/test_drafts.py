@@ -0,0 +1,98 @@
+"""Tests for the field-delta autosave draft store."""
+import pytest
+
+from opord import drafts as drafts_module
+from opord.drafts import DraftStore, ParagraphLocked
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return DraftStore(str(tmp_path / "opord.db"))
+
+
+def test_create_and_get(store):
+    draft = store.create({"operation_name": "IRON HAWK"})
+    assert draft.revision == 1 and len(draft.draft_id) >= 16
+    assert store.get(draft.draft_id).to_dict() == {
+        "draft_id": draft.draft_id, "revision": 1, "fields": {"operation_name": "IRON HAWK"},
+    }
+    assert store.create().revision == 0
+    assert store.get("missing") is None
+
+
+def test_patch_merges_changed_fields(store):
+    draft = store.create({"operation_name": "IRON HAWK", "mission": "Seize OBJ EAGLE."})
+    result = store.patch(draft.draft_id, 1, {"mission": "Seize OBJ FALCON.", "dz_lz": "DZ X"})
+    assert (result.revision, result.fields) == (2, {})
+    assert store.get(draft.draft_id).fields == {
+        "operation_name": "IRON HAWK", "mission": "Seize OBJ FALCON.", "dz_lz": "DZ X",
+    }
+
+
+def test_patch_returns_unseen_changes(store):
+    draft_id = store.create({"mission": "A"}).draft_id
+    store.patch(draft_id, 1, {"dz_lz": "DZ OTHER TAB", "mission": "B"})
+    # A second tab still at revision 1 edits the mission too: its value wins,
+    # and it learns about the DZ change it had not seen.
+    result = store.patch(draft_id, 1, {"mission": "C"})
+    assert (result.revision, result.fields) == (3, {"dz_lz": "DZ OTHER TAB"})
+    assert store.get(draft_id).fields["mission"] == "C"
+    # Nothing new since revision 3; an empty patch is only a poll.
+    assert store.patch(draft_id, 3, {}).to_dict()["revision"] == 3
+    assert store.patch(draft_id, 3, {}).fields == {}
+
+
+def test_patch_unknown_draft(store):
+    assert store.patch("missing", 0, {"mission": "A"}) is None
+
+
+def test_revision_ahead_of_store_gets_everything(store):
+    draft_id = store.create({"mission": "A"}).draft_id
+    assert store.patch(draft_id, 99, {}).fields == {"mission": "A"}
+
+
+def test_delete_and_prune(store, monkeypatch):
+    old = store.create({"mission": "A"}).draft_id
+    assert store.delete(old) and not store.delete(old)
+    stale = store.create({"mission": "B"}).draft_id
+    monkeypatch.setattr(drafts_module, "DRAFT_MAX_AGE_SECONDS", -1)
+    store.create()
+    assert store.get(stale) is None
+
+
+class TestParagraphLocks:
+    def test_edit_takes_lock_and_blocks_others(self, store):
+        draft_id = store.create().draft_id
+        store.patch(draft_id, 0, {"scheme_of_fires": "Mortars."}, editor="FSO")
+        assert store.locks(draft_id) == {3: "FSO"}
+        with pytest.raises(ParagraphLocked) as excinfo:
+            store.patch(draft_id, 1, {"commanders_intent": "Seize."}, editor="CO")
+        assert excinfo.value.holders == {3: "FSO"}
+        # Anonymous autosave is held to the same locks; other paragraphs are free.
+        with pytest.raises(ParagraphLocked):
+            store.patch(draft_id, 1, {"commanders_intent": "Seize."})
+        store.patch(draft_id, 1, {"sustainment_medical": "CCP."}, editor="1SG")
+        assert store.locks(draft_id) == {3: "FSO", 4: "1SG"}
+        assert store.get(draft_id).fields == {"scheme_of_fires": "Mortars.",
+                                              "sustainment_medical": "CCP."}
+
+    def test_lock_unlock_and_expiry(self, store, monkeypatch):
+        draft_id = store.create().draft_id
+        assert store.lock(draft_id, 1, "XO") == {1: "XO"}
+        assert store.lock(draft_id, 1, "XO") == {1: "XO"}  # renewal
+        with pytest.raises(ParagraphLocked):
+            store.lock(draft_id, 1, "CO")
+        assert not store.unlock(draft_id, 1, "CO")
+        assert store.unlock(draft_id, 1, "XO")
+        assert store.lock(draft_id, 1, "CO") == {1: "CO"}
+        assert store.lock("missing", 1, "CO") is None
+        monkeypatch.setattr(drafts_module, "LOCK_TTL_SECONDS", -1)
+        store.lock(draft_id, 2, "XO")
+        assert store.locks(draft_id) == {1: "CO"}
+
+    def test_changes_since(self, store):
+        draft_id = store.create({"mission": "A"}).draft_id
+        store.patch(draft_id, 1, {"dz_lz": "DZ B"})
+        changes = store.changes_since(draft_id, 1)
+        assert (changes.revision, changes.fields) == (2, {"dz_lz": "DZ B"})
+        assert store.changes_since("missing", 0) is None
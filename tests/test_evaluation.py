@@ -0,0 +1,126 @@
+"""Tests for the AI prompt evaluation harness (stand-in endpoint — no real API calls)."""
+import json
+
+import pytest
+
+from opord.ai_helper import AUTO_FILL_FIELDS
+from opord.evaluation import (
+    CORPUS,
+    StandInClient,
+    check_section,
+    compare,
+    main,
+    run_corpus,
+    summarize,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setenv("OPORD_TELEMETRY", "0")
+
+
+class TestChecks:
+    def test_clean_text_passes(self):
+        checks = check_section("Signal", "Company command net on FM primary; report at 0600Z.")
+        assert all(checks.values())
+
+    @pytest.mark.parametrize("text, failed", [
+        ("", "non_empty"),
+        ("word " * 151, "word_limit"),
+        ("## Signal\nCompany net.", "no_headings"),
+        ("Signal: company net.", "no_headings"),
+        ("5. COMMAND AND SIGNAL\nCompany net.", "no_headings"),
+        ("**Signal plan**\nCompany net.", "no_headings"),
+        ("SECRET//NOFORN company net.", "no_classified_markings"),
+        ("(S) Company net.", "no_classified_markings"),
+        ("Report at 6 PM.", "military_time"),
+        ("Move at 5:30am.", "military_time"),
+    ])
+    def test_violations(self, text, failed):
+        checks = check_section("Signal", text)
+        assert [name for name, ok in checks.items() if not ok] == [failed]
+
+
+class TestStandIn:
+    def test_reports_cached_prefix_once_long_enough(self):
+        client = StandInClient()
+        prompt = "x" * 8000
+        first = client.chat.completions.create(model="m", messages=[
+            {"role": "user", "content": prompt + "one"}])
+        second = client.chat.completions.create(model="m", messages=[
+            {"role": "user", "content": prompt + "two"}])
+        assert first.usage.prompt_tokens_details.cached_tokens == 0
+        assert second.usage.prompt_tokens_details.cached_tokens == 1920
+        short = StandInClient()
+        for _ in range(2):
+            response = short.chat.completions.create(model="m", messages=[
+                {"role": "user", "content": "short prompt"}])
+        assert response.usage.prompt_tokens_details.cached_tokens == 0
+
+
+class TestRun:
+    def test_measures_every_section(self):
+        results = run_corpus(StandInClient(), CORPUS[:2])
+        assert len(results) == 2 * len(AUTO_FILL_FIELDS)
+        assert all(r.latency_ms is not None and r.prompt_tokens > 0 for r in results)
+        summary = summarize(results)
+        assert summary["all"]["calls"] == len(results)
+        assert summary["all"]["pass_rate"]["no_headings"] == 1.0
+
+    def test_failing_section_is_scored(self):
+        def respond(request):
+            if "'Command and Signal paragraph'" in request["messages"][-1]["content"]:
+                return "COMMAND AND SIGNAL\nCompany net at 6 PM."
+            return "Company completes its tasks by 0600Z."
+
+        summary = summarize(run_corpus(StandInClient(respond), CORPUS[:1]))
+        assert summary["signal"]["pass_rate"]["no_headings"] == 0.0
+        assert summary["signal"]["pass_rate"]["military_time"] == 0.0
+        assert summary["scheme_of_fires"]["pass_rate"]["no_headings"] == 1.0
+
+    def test_hybrid_mode_refines_drafts(self):
+        prompts = []
+
+        def respond(request):
+            prompts.append(request["messages"][-1]["content"])
+            return "Refined text."
+
+        run_corpus(StandInClient(respond), CORPUS[:1], mode="hybrid")
+        assert all("first draft" in prompt.lower() for prompt in prompts)
+
+
+class TestCompare:
+    def _summary(self, rate=1.0, p95=100.0, prompt=500.0):
+        return {"signal": {"pass_rate": {"no_headings": rate}, "p95_ms": p95,
+                           "mean_prompt_tokens": prompt, "mean_completion_tokens": 50.0}}
+
+    def test_no_regression(self):
+        assert compare(self._summary(p95=115.0), self._summary()) == []
+
+    def test_regressions(self):
+        regressions = compare(self._summary(rate=0.5, p95=200.0, prompt=700.0), self._summary())
+        assert len(regressions) == 3
+        assert regressions[0] == "signal: no_headings pass rate 100% -> 50%"
+
+
+def test_cli_saves_and_compares(tmp_path, capsys):
+    corpus = tmp_path / "corpus.json"
+    corpus.write_text(json.dumps(CORPUS[:1]))
+    out = tmp_path / "runs" / "base.json"
+    assert main(["--stand-in", "--corpus", str(corpus), "--out", str(out)]) == 0
+    run = json.loads(out.read_text())
+    assert run["endpoint"] == "stand-in"
+    assert set(run["config"]) == {"model", "temperature", "max_tokens", "system_prompt_sha256"}
+    assert len(run["results"]) == len(AUTO_FILL_FIELDS)
+
+    run["summary"]["signal"]["pass_rate"]["word_limit"] = 1.5  # impossible baseline
+    out.write_text(json.dumps(run))
+    assert main(["--stand-in", "--corpus", str(corpus), "--baseline", str(out)]) == 1
+    assert "REGRESSION signal: word_limit" in capsys.readouterr().out
+
+
+def test_cli_without_client(monkeypatch, capsys):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert main([]) == 1
+    assert "--stand-in" in capsys.readouterr().err
@@ -14,6 +14,8 @@ from opord.generator import (
     UNIT_SHORT,
     HIGHER_HQ,
     SUBORDINATE_UNITS,
+    SECTION_INPUTS,
+    join_sections,
 )
 
 
@@ -261,3 +263,43 @@ class TestGenerateDict:
         d = gen.generate_dict()
         assert isinstance(d["subordinate_units"], list)
         assert len(d["subordinate_units"]) >= 4
+
+
+# ---------------------------------------------------------------------------
+# Streaming renderers
+# ---------------------------------------------------------------------------
+
+class TestIterText:
+    def test_chunks_join_to_generate_text(self, full_data):
+        gen = OPORDGenerator(full_data)
+        chunks = list(gen.iter_text())
+        assert len(chunks) > 5
+        assert "".join(chunks) == gen.generate_text()
+
+
+class TestIterMarkdown:
+    def test_headings_and_fields(self, full_data):
+        md = "".join(OPORDGenerator(full_data).iter_markdown())
+        assert md.startswith("**UNCLASSIFIED // TRAINING USE ONLY**\n")
+        assert "# OPERATION ORDER STEEL TALON-XX" in md
+        assert "\n## 3. EXECUTION\n" in md
+        assert "\n### a. Enemy Forces.\n" in md
+        assert "- Composition: Reinforced OPFOR platoon\n" in md
+        assert "- (1st Platoon (Rifle)): Assault OBJ EAGLE.\n" in md
+        assert md.rstrip().endswith("**UNCLASSIFIED // TRAINING USE ONLY**")
+
+
+class TestSections:
+    def test_sections_join_to_generate_text(self, full_data):
+        gen = OPORDGenerator(full_data)
+        sections = [(name, gen.render_section(name)) for name in SECTION_INPUTS]
+        assert join_sections(sections) == gen.generate_text()
+
+    def test_section_inputs_are_data_fields(self):
+        fields = set(OPORDData.__dataclass_fields__)
+        for attrs in SECTION_INPUTS.values():
+            assert set(attrs) <= fields
+
+    def test_unknown_section(self, full_data):
+        with pytest.raises(KeyError):
+            OPORDGenerator(full_data).render_section("paragraph_6")
@@ -0,0 +1,82 @@
+"""Tests for HTTP caching and compression helpers."""
+import gzip
+
+import pytest
+from flask import Response
+from werkzeug.http import parse_accept_header
+
+from opord.http_cache import (
+    BoundedCache,
+    compress_response,
+    content_etag,
+    static_version,
+)
+
+
+def _accept(header):
+    return parse_accept_header(header)
+
+
+@pytest.fixture()
+def html_body():
+    return "<html>" + "<p>OPORD</p>" * 200 + "</html>"
+
+
+class TestBoundedCache:
+    def test_evicts_least_recently_used(self):
+        cache = BoundedCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert len(cache) == 2
+
+
+class TestStaticVersion:
+    def test_changes_with_content(self, tmp_path):
+        asset = tmp_path / "style.css"
+        asset.write_text("body {}")
+        first = static_version(str(tmp_path), "style.css")
+        asset.write_text("body { color: red; }")
+        assert static_version(str(tmp_path), "style.css") != first
+
+    def test_missing_file_returns_none(self, tmp_path):
+        assert static_version(str(tmp_path), "missing.css") is None
+
+
+class TestCompressResponse:
+    def test_gzips_html_when_accepted(self, html_body):
+        resp = Response(html_body, mimetype="text/html")
+        compress_response(resp, _accept("gzip, deflate"))
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(resp.get_data()).decode() == html_body
+        assert "Accept-Encoding" in resp.vary
+
+    def test_identity_when_not_accepted(self, html_body):
+        resp = Response(html_body, mimetype="text/html")
+        compress_response(resp, _accept(""))
+        assert "Content-Encoding" not in resp.headers
+        assert resp.get_data(as_text=True) == html_body
+
+    def test_small_bodies_are_not_compressed(self):
+        resp = Response("<p>hi</p>", mimetype="text/html")
+        compress_response(resp, _accept("gzip"))
+        assert "Content-Encoding" not in resp.headers
+
+    def test_binary_types_are_not_compressed(self, html_body):
+        resp = Response(html_body.encode(), mimetype="application/pdf")
+        compress_response(resp, _accept("gzip"))
+        assert "Content-Encoding" not in resp.headers
+
+    def test_streamed_responses_are_not_compressed(self, html_body):
+        resp = Response(iter([html_body]), mimetype="text/plain")
+        compress_response(resp, _accept("gzip"))
+        assert "Content-Encoding" not in resp.headers
+
+    def test_strong_etag_becomes_weak(self, html_body):
+        resp = Response(html_body, mimetype="text/html")
+        resp.set_etag(content_etag(html_body))
+        compress_response(resp, _accept("gzip"))
+        assert resp.get_etag() == (content_etag(html_body), True)
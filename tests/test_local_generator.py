@@ -0,0 +1,90 @@
+"""Tests for the rule-based local section drafts."""
+import pytest
+
+from opord.ai_helper import AUTO_FILL_FIELDS
+from opord.generator import SUBORDINATE_UNITS
+from opord.local_generator import DRAFT_FIELDS, draft_section, draft_sections, draft_tasks
+from opord.schema import FIELD_LIMITS, task_key, validate_form
+
+
+@pytest.fixture()
+def form():
+    return {
+        "operation_name": "IRON HAWK",
+        "mission": "C/1-7 CAV seizes OBJ EAGLE NLT 0600Z to secure the airfield.",
+        "insert_method": "Airborne (HALO/HAHO)",
+        "dz_lz": "DZ FALCON",
+        "enemy_composition": "Mechanized infantry platoon with a ZU-23 section",
+    }
+
+
+def test_covers_every_auto_fill_field():
+    assert DRAFT_FIELDS == [key for key, _ in AUTO_FILL_FIELDS]
+
+
+def test_drafts_are_short_and_headless(form):
+    for key, text in draft_sections(form).items():
+        assert 10 < len(text.split()) <= 150, key
+        assert not text.isupper() and ":" not in text.split(".")[0][:3]
+
+
+def test_uses_mission_zone_and_objective(form):
+    intent = draft_section("commanders_intent", form)
+    assert "seize OBJ EAGLE NLT 0600Z" in intent
+    assert "OBJ EAGLE is seized and controlled" in intent
+    assert "DZ FALCON" in draft_section("scheme_of_maneuver", form)
+
+
+@pytest.mark.parametrize("insert, expected", [
+    ("Airborne (HALO/HAHO)", "military free-fall"),
+    ("Airborne (Static Line)", "static-line parachute assault"),
+    ("Air Assault (Helicopter)", "an air assault onto the LZ"),
+    ("Ground (Motor March)", "tactical motor march"),
+    ("", "dismounted movement"),
+])
+def test_insert_method_selects_profile(form, insert, expected):
+    form["insert_method"] = insert
+    form["dz_lz"] = ""
+    assert expected in draft_section("concept_of_operations", form)
+
+
+def test_enemy_composition_selects_threats(form):
+    capabilities = draft_section("enemy_capabilities", form)
+    assert "anti-armor" in capabilities and "air defense" in capabilities
+    form["enemy_composition"] = "Insurgent cell"
+    assert "IEDs" in draft_section("enemy_capabilities", form)
+    form["enemy_composition"] = ""
+    assert draft_section("enemy_capabilities", form).startswith("The enemy is assessed")
+
+
+def test_only_blank_fields_by_default(form):
+    form["signal"] = "Company net only."
+    drafts = draft_sections(form)
+    assert "signal" not in drafts
+    assert len(drafts) == len(DRAFT_FIELDS) - 1
+
+
+def test_empty_form():
+    drafts = draft_sections({})
+    assert set(drafts) == set(DRAFT_FIELDS)
+    assert "the objective is seized" in drafts["commanders_intent"]
+
+
+def test_unknown_field(form):
+    with pytest.raises(KeyError):
+        draft_section("mission", form)
+
+
+def test_tasks_match_scheme_of_maneuver(form):
+    tasks = draft_tasks(form)
+    assert list(tasks) == SUBORDINATE_UNITS
+    assert tasks["1st Platoon (Rifle)"].startswith("Main effort. Assault and clear OBJ EAGLE")
+    assert "DZ FALCON" in tasks["Headquarters & Support Element"]
+
+
+def test_tasks_fit_their_fields_with_a_long_zone(form):
+    form["dz_lz"] = "DZ FALCON " + "x" * (FIELD_LIMITS["dz_lz"] - len("DZ FALCON "))
+    tasks = draft_tasks(form)
+    cleaned = {task_key(unit): task for unit, task in tasks.items()}
+    assert validate_form(dict(form, **cleaned))[1] == []
+    assert tasks["Headquarters & Support Element"].endswith("...")
@@ -0,0 +1,72 @@
+"""Tests for the local PDF renderer."""
+import re
+import time
+import zlib
+
+from opord.generator import OPORDData, OPORDGenerator
+from opord.pdf_export import COLUMNS, LINES_PER_PAGE, _page_template, layout, render_pdf, render_pdf_data
+from opord.schema import FIELDS, build_opord_data, validate_form
+
+
+def _page_texts(pdf: bytes):
+    streams = re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)
+    return [zlib.decompress(stream).decode("cp1252") for stream in streams]
+
+
+def _full_order() -> OPORDData:
+    value = "Grid 12ABC34567 OBJ EAGLE (phase line BLUE); "
+    form = {spec.key: (value * 100)[:spec.max_length] for spec in FIELDS}
+    cleaned, _ = validate_form(form)
+    return build_opord_data(cleaned)
+
+
+class TestRenderPdf:
+    def test_structure_and_xref_offsets(self):
+        pdf = render_pdf_data(OPORDData(operation_name="IRON HAWK", mission="Seize OBJ EAGLE."))
+        assert pdf.startswith(b"%PDF-1.4")
+        assert pdf.rstrip().endswith(b"%%EOF")
+        xref_at = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+        assert pdf[xref_at:].startswith(b"xref")
+        offsets = re.findall(rb"(\d{10}) 00000 n", pdf[xref_at:])
+        for number, offset in enumerate(offsets, start=1):
+            assert pdf[int(offset):].startswith(f"{number} 0 obj".encode())
+
+    def test_text_content_and_banners(self):
+        pdf = render_pdf_data(OPORDData(operation_name="IRON HAWK", mission="Seize (OBJ) EAGLE."))
+        text = "".join(_page_texts(pdf))
+        assert "(OPERATION ORDER IRON HAWK-XX) '" in text
+        assert r"Seize \(OBJ\) EAGLE." in text
+        assert "(UNCLASSIFIED // TRAINING USE ONLY) Tj" in text
+        assert "(Page 1 of " in text
+
+    def test_full_order_is_fast_and_paginated(self):
+        data = _full_order()
+        start = time.perf_counter()
+        pdf = render_pdf_data(data)
+        assert time.perf_counter() - start < 1.0
+        pages = _page_texts(pdf)
+        assert len(pages) > 1
+        assert all(text.count(") '") <= LINES_PER_PAGE for text in pages)
+        assert f"(Page {len(pages)} of {len(pages)})" in pages[-1]
+
+    def test_from_dict(self):
+        document = OPORDGenerator(OPORDData(operation_name="IRON HAWK")).generate_dict()
+        assert render_pdf(document) == render_pdf_data(OPORDData(operation_name="IRON HAWK"))
+
+    def test_page_template_is_reused(self):
+        _page_template.cache_clear()
+        render_pdf_data(_full_order())
+        info = _page_template.cache_info()
+        assert info.misses == 1 and info.hits > 0
+
+
+class TestLayout:
+    def test_long_lines_wrap_with_hanging_indent(self):
+        line = "     Composition:        " + "word " * 60
+        (page,) = layout([line])
+        assert all(len(text) <= COLUMNS for text, _ in page)
+        assert page[1][0].startswith(" " * len("     Composition:        "))
+
+    def test_headings_are_bold(self):
+        (page,) = layout(["1. SITUATION", "", "  a. Enemy Forces.", "     Strength: ~30"])
+        assert [bold for _, bold in page] == [True, False, True, False]
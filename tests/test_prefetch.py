@@ -0,0 +1,177 @@
+"""Tests for the speculative AI suggestion prefetcher (mocked — no real API calls)."""
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from opord.ai_helper import AUTO_FILL_FIELDS, build_op_summary, summary_key
+from opord.generator import SUBORDINATE_UNITS
+from opord.prefetch import Prefetcher, SuggestionCache
+from opord.schema import TASK_FIELDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    return str(tmp_path / "prefetch.db")
+
+
+@pytest.fixture()
+def cache(db_path):
+    return SuggestionCache(db_path)
+
+
+@pytest.fixture()
+def form():
+    return {
+        "operation_name": "IRON HAWK",
+        "mission": "Attack OBJ EAGLE.",
+        "insert_method": "Airborne (Static Line)",
+        "dz_lz": "DZ FALCON",
+        "enemy_composition": "OPFOR platoon",
+        "commanders_intent": "User-provided intent.",
+    }
+
+
+@pytest.fixture()
+def model():
+    """Stand in for the model calls made by ``generate_full_opord``."""
+    tasks = {unit: f"Task for {unit}." for unit in SUBORDINATE_UNITS}
+    with patch("opord.ai_helper.get_client", return_value=object()), \
+            patch("opord.ai_helper.generate_section", return_value="AI text.") as section, \
+            patch("opord.ai_helper.generate_subordinate_tasks", return_value=tasks) as task_call:
+        yield section, task_call
+
+
+class TestSuggestionCache:
+    def test_update_merges_sections(self, cache):
+        cache.update("k", {"signal": "PACE"})
+        cache.update("k", {"scheme_of_fires": "Mortars."})
+        assert cache.get("k") == {"signal": "PACE", "scheme_of_fires": "Mortars."}
+
+    def test_expired_entries_are_dropped(self, db_path):
+        cache = SuggestionCache(db_path, ttl=0)
+        cache.update("k", {"signal": "PACE"})
+        assert cache.get("k") == {}
+
+    def test_evicts_oldest_entry(self, db_path):
+        cache = SuggestionCache(db_path, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.update(key, {"signal": key})
+        assert cache.get("a") == {}
+        assert cache.get("c") == {"signal": "c"}
+
+    def test_entry_written_by_another_process_is_found(self, cache, db_path):
+        code = (
+            "import sys; from opord.prefetch import SuggestionCache; "
+            "SuggestionCache(sys.argv[1]).update('k', {'signal': 'From worker 2.'})"
+        )
+        subprocess.run([sys.executable, "-c", code, db_path], cwd=ROOT, check=True)
+        assert cache.get("k") == {"signal": "From worker 2."}
+
+    def test_only_one_claim_at_a_time(self, cache):
+        assert cache.claim("k") is True
+        assert cache.claim("k") is False
+        assert cache.running("k")
+        cache.release("k")
+        assert not cache.running("k")
+        assert cache.claim("k") is True
+
+
+class TestPrefetcher:
+    def test_prefetch_fills_cache_for_blank_fields(self, form, cache, model):
+        prefetcher = Prefetcher(cache)
+        gen, _ = model
+        key, status = prefetcher.submit(form)
+        sections = prefetcher.lookup(form, timeout=5)
+        assert status == "started"
+        assert key == summary_key(build_op_summary(form))
+        assert "commanders_intent" not in sections
+        assert sections["signal"] == "AI text."
+        assert gen.call_count == len(AUTO_FILL_FIELDS) - 1
+
+    def test_second_submit_is_ready(self, form, cache, model):
+        prefetcher = Prefetcher(cache)
+        prefetcher.submit(form)
+        prefetcher.lookup(form, timeout=5)
+        _, status = prefetcher.submit(form)
+        assert status == "ready"
+
+    def test_changed_summary_uses_new_key(self, form, cache, model):
+        prefetcher = Prefetcher(cache)
+        prefetcher.submit(form)
+        prefetcher.lookup(form, timeout=5)
+        assert prefetcher.lookup(dict(form, dz_lz="LZ ROBIN")) == {}
+
+    def test_workers_share_prefetches(self, form, db_path, model):
+        worker_1 = Prefetcher(SuggestionCache(db_path))
+        worker_2 = Prefetcher(SuggestionCache(db_path))
+        release = threading.Event()
+
+        def slow_section(*args, **kwargs):
+            release.wait(5)
+            return "AI text."
+
+        gen, _ = model
+        gen.side_effect = slow_section
+        assert worker_1.submit(form)[1] == "started"
+        assert worker_2.submit(form)[1] == "pending"
+        threading.Timer(0.1, release.set).start()
+        # The lookup waits for the job running in the other worker.
+        sections = worker_2.lookup(form, timeout=5)
+        assert sections["signal"] == "AI text."
+        assert gen.call_count == len(AUTO_FILL_FIELDS) - 1
+
+    def test_prefetch_caches_tasks(self, form, cache, model):
+        _, task_call = model
+        prefetcher = Prefetcher(cache)
+        prefetcher.submit(form)
+        sections = prefetcher.lookup(form, timeout=5)
+        assert task_call.call_count == 1
+        assert task_call.call_args.kwargs["scheme_of_maneuver"] == "AI text."
+        assert sections["task_1st"] == "Task for 1st Platoon (Rifle)."
+        assert prefetcher.submit(form)[1] == "ready"
+
+    def test_tasks_for_another_scheme_are_dropped(self, form, cache, model):
+        prefetcher = Prefetcher(cache)
+        prefetcher.submit(form)
+        prefetcher.lookup(form, timeout=5)
+        changed = dict(form, scheme_of_maneuver="Infiltrate by squads.")
+        sections = prefetcher.lookup(changed)
+        assert sections["signal"] == "AI text."
+        assert not any(key in sections for _, key in TASK_FIELDS)
+        changed = dict(form, task_1st="Clear the trench line.")
+        assert "task_2nd" not in prefetcher.lookup(changed)
+
+    def test_hybrid_mode_prefetches_refined_drafts(self, form, cache, model, monkeypatch):
+        monkeypatch.setenv("OPORD_AI_MODE", "hybrid")
+        gen, task_call = model
+        prefetcher = Prefetcher(cache)
+        prefetcher.submit(form)
+        prefetcher.lookup(form, timeout=5)
+        assert all(call.kwargs["draft"] for call in gen.call_args_list)
+        assert task_call.call_args.kwargs["drafts"]
+
+    def test_lookup_returns_what_is_ready_after_the_timeout(self, form, cache, model):
+        gen, _ = model
+        release = threading.Event()
+        calls = []
+
+        def slow_after_first(*args, **kwargs):
+            calls.append(args)
+            if len(calls) > 1:
+                release.wait(5)
+            return "AI text."
+
+        gen.side_effect = slow_after_first
+        prefetcher = Prefetcher(cache)
+        prefetcher.submit(form)
+        try:
+            sections = prefetcher.lookup(form, timeout=0.2)
+        finally:
+            release.set()
+        assert len(sections) == 1
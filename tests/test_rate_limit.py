@@ -0,0 +1,95 @@
+"""Tests for the SQLite-backed token-bucket rate limiter."""
+import pytest
+
+from opord.rate_limit import RateLimitTimeout, TokenBucketLimiter, limiter_from_env
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    return str(tmp_path / "ratelimit.sqlite3")
+
+
+def _limiter(db_path, clock, rpm=60, tpm=0):
+    return TokenBucketLimiter(db_path, rpm, tpm, clock=clock.time, sleep=clock.sleep)
+
+
+class TestTokenBucketLimiter:
+    def test_acquire_within_capacity_does_not_wait(self, db_path, clock):
+        limiter = _limiter(db_path, clock, rpm=3)
+        for _ in range(3):
+            assert limiter.acquire() == 0
+        assert clock.sleeps == []
+
+    def test_waits_for_request_refill(self, db_path, clock):
+        limiter = _limiter(db_path, clock, rpm=60)
+        for _ in range(60):
+            limiter.acquire()
+        waited = limiter.acquire()
+        assert waited == pytest.approx(1.0)
+
+    def test_waits_for_token_refill(self, db_path, clock):
+        limiter = _limiter(db_path, clock, rpm=100, tpm=600)
+        limiter.acquire(600)
+        waited = limiter.acquire(100)
+        assert waited == pytest.approx(10.0)
+
+    def test_refund_returns_tokens(self, db_path, clock):
+        limiter = _limiter(db_path, clock, rpm=100, tpm=600)
+        limiter.acquire(600)
+        limiter.refund(500)
+        assert limiter.acquire(400) == 0
+
+    def test_budget_is_shared_between_instances(self, db_path, clock):
+        first = _limiter(db_path, clock, rpm=2)
+        second = _limiter(db_path, clock, rpm=2)
+        first.acquire()
+        first.acquire()
+        assert second.acquire() == pytest.approx(30.0)
+
+    def test_block_for_pauses_other_instances(self, db_path, clock):
+        first = _limiter(db_path, clock, rpm=100)
+        second = _limiter(db_path, clock, rpm=100)
+        first.block_for(5)
+        assert second.acquire() == pytest.approx(5.0)
+
+    def test_timeout_raises(self, db_path, clock):
+        limiter = _limiter(db_path, clock, rpm=1)
+        limiter.acquire()
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(timeout=1)
+
+    def test_creates_the_database_directory(self, tmp_path, clock):
+        limiter = _limiter(str(tmp_path / "missing" / "ratelimit.sqlite3"), clock)
+        assert limiter.acquire() == 0
+
+
+class TestLimiterFromEnv:
+    def test_disabled_with_zero_rpm(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_RPM", "0")
+        assert limiter_from_env() is None
+
+    def test_uses_configured_path(self, monkeypatch, db_path):
+        monkeypatch.setenv("OPENAI_RPM", "10")
+        monkeypatch.setenv("OPENAI_TPM", "1000")
+        monkeypatch.setenv("OPENAI_RATE_LIMIT_DB", db_path)
+        limiter = limiter_from_env()
+        assert limiter.path == db_path
+        assert (limiter.rpm, limiter.tpm) == (10, 1000)
@@ -0,0 +1,105 @@
+"""Tests for the delta-compressed OPORD revision store."""
+import copy
+
+import pytest
+
+from opord.generator import OPORDData, OPORDGenerator
+from opord.revisions import SNAPSHOT_INTERVAL, RevisionStore, flatten, unflatten
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return RevisionStore(str(tmp_path / "opord.db"))
+
+
+@pytest.fixture()
+def document():
+    return OPORDGenerator(OPORDData(operation_name="IRON HAWK", mission="Seize OBJ EAGLE.")).generate_dict()
+
+
+def _revise(document, **changes):
+    revised = copy.deepcopy(document)
+    for path, value in changes.items():
+        target = revised
+        *parents, leaf = path.split("__")
+        for key in parents:
+            target = target[key]
+        target[leaf] = value
+    return revised
+
+
+class TestFlatten:
+    def test_round_trip(self, document):
+        assert unflatten(flatten(document)) == document
+
+    def test_leaf_paths(self, document):
+        flat = flatten(document)
+        assert flat[("situation", "enemy", "strength")] == ""
+        assert flat[("execution", "tasks_to_subordinates")] == {}
+
+
+class TestRevisionStore:
+    def test_first_save_is_version_one(self, store, document):
+        assert store.save("IRON HAWK", document) == 1
+        assert store.checkout("IRON HAWK") == document
+
+    def test_checkout_any_version(self, store, document):
+        revised = _revise(document, mission="Destroy OPFOR on OBJ EAGLE.")
+        store.save("IRON HAWK", document)
+        store.save("IRON HAWK", revised)
+        assert store.checkout("IRON HAWK", 1) == document
+        assert store.checkout("IRON HAWK", 2) == revised
+        assert store.checkout("IRON HAWK") == revised
+
+    def test_unchanged_document_is_not_stored_again(self, store, document):
+        store.save("IRON HAWK", document)
+        assert store.save("IRON HAWK", copy.deepcopy(document)) == 1
+        assert len(store.history("IRON HAWK")) == 1
+
+    def test_nested_changes_and_removed_keys(self, store, document):
+        with_tasks = _revise(document, execution__tasks_to_subordinates={"Weapons Platoon": "Support."})
+        store.save("IRON HAWK", with_tasks)
+        store.save("IRON HAWK", document)
+        assert store.checkout("IRON HAWK", 1) == with_tasks
+        assert store.checkout("IRON HAWK", 2) == document
+
+    def test_missing_operation_or_version(self, store, document):
+        store.save("IRON HAWK", document)
+        assert store.checkout("STEEL TALON") is None
+        assert store.checkout("IRON HAWK", 5) is None
+        assert store.checkout("IRON HAWK", 0) is None
+
+    def test_diff_reports_changed_fields(self, store, document):
+        store.save("IRON HAWK", document)
+        store.save("IRON HAWK", _revise(document, situation__enemy__strength="~40"))
+        changes = store.diff("IRON HAWK", 1, 2)
+        assert [c.to_dict() for c in changes] == [
+            {"path": "situation.enemy.strength", "old": "", "new": "~40"}
+        ]
+
+    def test_first_revision_diffs_from_the_empty_document(self, store, document):
+        store.save("IRON HAWK", document)
+        changes = store.diff("IRON HAWK", 0, 1)
+        assert changes and all(c.old is None for c in changes)
+        assert {"path": "operation_name", "old": None, "new": "IRON HAWK"} in [
+            c.to_dict() for c in changes
+        ]
+        assert store.diff("STEEL TALON", 0, 1) is None
+
+    def test_snapshots_bound_replay_and_storage(self, store, document):
+        for i in range(SNAPSHOT_INTERVAL * 3 + 5):
+            store.save("IRON HAWK", _revise(document, situation__enemy__strength=f"~{i}"))
+        history = store.history("IRON HAWK")
+        snapshots = [r.version for r in history if r.is_snapshot]
+        assert snapshots == [1, SNAPSHOT_INTERVAL + 1, 2 * SNAPSHOT_INTERVAL + 1, 3 * SNAPSHOT_INTERVAL + 1]
+        delta_sizes = [r.stored_bytes for r in history if not r.is_snapshot]
+        snapshot_size = history[0].stored_bytes
+        assert max(delta_sizes) < snapshot_size / 4
+        assert store.checkout("IRON HAWK", len(history))["situation"]["enemy"]["strength"] == (
+            f"~{len(history) - 1}"
+        )
+
+    def test_operations_are_listed(self, store, document):
+        store.save("IRON HAWK", document)
+        store.save("STEEL TALON", document)
+        assert store.operations() == ["IRON HAWK", "STEEL TALON"]
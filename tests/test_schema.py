@@ -0,0 +1,100 @@
+"""Tests for the schema-driven form parser."""
+import pytest
+
+from opord.generator import SUBORDINATE_UNITS
+from opord.schema import (
+    FIELDS,
+    FIELD_LIMITS,
+    TASK_FIELDS,
+    build_opord_data,
+    parse_form,
+    task_key,
+    validate_fields,
+    validate_form,
+)
+
+
+@pytest.fixture()
+def form():
+    return {
+        "operation_name": "  IRON HAWK  ",
+        "mission": "Attack OBJ EAGLE.",
+        "enemy_composition": "OPFOR platoon",
+        "command_cp": "Grid 12ABC12345",
+        "task_1st": "Assault OBJ EAGLE.",
+        "task_weapons": "",
+    }
+
+
+class TestSchema:
+    def test_form_keys_are_unique(self):
+        keys = [spec.key for spec in FIELDS]
+        assert len(keys) == len(set(keys))
+
+    def test_task_fields_cover_every_subordinate_unit(self):
+        assert [unit for unit, _ in TASK_FIELDS] == SUBORDINATE_UNITS
+        assert task_key("Headquarters & Support Element") == "task_headquarters"
+
+    def test_every_field_has_a_limit(self):
+        assert all(FIELD_LIMITS[spec.key] > 0 for spec in FIELDS)
+
+
+class TestValidateForm:
+    def test_strips_values(self, form):
+        cleaned, errors = validate_form(form)
+        assert errors == []
+        assert cleaned["operation_name"] == "IRON HAWK"
+
+    def test_missing_keys_use_defaults(self, form):
+        cleaned, _ = validate_form(form)
+        assert cleaned["classification"] == "UNCLASSIFIED // TRAINING USE ONLY"
+        assert cleaned["time_zone"] == "ZULU"
+        assert cleaned["dz_lz"] == ""
+
+    def test_oversized_value_reports_error(self, form):
+        form["dz_lz"] = "X" * (FIELD_LIMITS["dz_lz"] + 1)
+        _, errors = validate_form(form)
+        assert [e.field for e in errors] == ["dz_lz"]
+        assert "too long" in errors[0].message
+
+    def test_required_fields(self):
+        _, errors = validate_form({})
+        assert {e.field for e in errors} == {"operation_name", "mission"}
+
+    def test_partial_skips_required_fields(self):
+        _, errors = validate_form({}, partial=True)
+        assert errors == []
+
+    def test_non_text_values_are_rejected(self, form):
+        form["mission"] = ["not", "text"]
+        _, errors = validate_form(form)
+        assert errors[0].to_dict() == {"field": "mission", "message": "Mission Statement must be text."}
+
+
+class TestValidateFields:
+    def test_only_given_fields(self):
+        cleaned, errors = validate_fields({"mission": "  Seize OBJ EAGLE. ", "dz_lz": ""})
+        assert errors == []
+        assert cleaned == {"mission": "Seize OBJ EAGLE.", "dz_lz": ""}
+
+    def test_errors(self):
+        _, errors = validate_fields({
+            "colour": "red", "dz_lz": "X" * (FIELD_LIMITS["dz_lz"] + 1), "mission": 5,
+        })
+        assert [e.field for e in errors] == ["colour", "dz_lz", "mission"]
+
+
+class TestBuildOpordData:
+    def test_maps_nested_fields(self, form):
+        data, _ = parse_form(form)
+        assert data.situation.enemy.composition == "OPFOR platoon"
+        assert data.command_and_signal.command == "Grid 12ABC12345"
+
+    def test_only_units_with_tasks_are_listed(self, form):
+        data, _ = parse_form(form)
+        assert data.execution.tasks_to_subordinates == {"1st Platoon (Rifle)": "Assault OBJ EAGLE."}
+
+    def test_build_from_cleaned_mapping(self):
+        data = build_opord_data({"mission": "Defend."})
+        assert data.mission == "Defend."
+        assert data.classification == "UNCLASSIFIED // TRAINING USE ONLY"
@@ -0,0 +1,88 @@
+"""Tests for the full-text OPORD search index."""
+import pytest
+
+from opord.generator import OPORDData, OPORDGenerator
+from opord.revisions import RevisionStore
+from opord.search import SearchIndex, build_match_query, fts5_available
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="SQLite built without FTS5")
+
+
+def _order(name, mission="", insert_method="", dz_lz="", enemy="", fires=""):
+    data = OPORDData(operation_name=name, mission=mission, insert_method=insert_method, dz_lz=dz_lz)
+    data.situation.enemy.composition = enemy
+    data.execution.scheme_of_fires = fires
+    return OPORDGenerator(data).generate_dict()
+
+
+@pytest.fixture()
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "opord.db"))
+    index.add("IRON HAWK", 1, _order(
+        "IRON HAWK", "Seize OBJ EAGLE.", "HALO", "DZ EAGLE", "Mechanized infantry platoon",
+    ))
+    index.add("STEEL TALON", 1, _order(
+        "STEEL TALON", "Clear OBJ FALCON.", "Air Assault", "LZ FALCON", "Dismounted squad",
+    ))
+    return index
+
+
+class TestBuildMatchQuery:
+    def test_terms_are_quoted_and_last_is_prefix(self):
+        assert build_match_query("halo dz eag") == '"halo" "dz" "eag"*'
+
+    def test_operators_and_punctuation_are_plain_text(self):
+        assert build_match_query('NEAR(a "b") OR -c') == '"NEAR" "a" "b" "OR" "c"*'
+
+    def test_no_words(self):
+        assert build_match_query("  ;-) ") is None
+
+
+class TestSearchIndex:
+    def test_matches_across_indexed_fields(self, index):
+        results = index.search("HALO DZ EAGLE mechanized")
+        assert [r.operation for r in results] == ["IRON HAWK"]
+        assert results[0].insert_method == "HALO"
+        assert results[0].dz_lz == "DZ EAGLE"
+
+    def test_prefix_of_last_word(self, index):
+        assert [r.operation for r in index.search("falc")] == ["STEEL TALON"]
+
+    def test_snippet_is_escaped_and_highlighted(self, tmp_path):
+        index = SearchIndex(str(tmp_path / "opord.db"))
+        index.add("X", 1, _order("X", "Seize <script>OBJ</script> EAGLE."))
+        snippet = str(index.search("eagle")[0].snippet)
+        assert "<script>" not in snippet
+        assert "<mark>EAGLE</mark>" in snippet
+
+    def test_mission_outranks_body_text(self, tmp_path):
+        index = SearchIndex(str(tmp_path / "opord.db"))
+        index.add("BODY", 1, _order("BODY", "Defend.", fires="Mortars on EAGLE."))
+        index.add("MISSION", 1, _order("MISSION", "Seize EAGLE."))
+        for i in range(3):
+            # BM25 needs documents without the term to weigh it.
+            index.add(f"OTHER {i}", 1, _order(f"OTHER {i}", "Screen."))
+        assert [r.operation for r in index.search("eagle")] == ["MISSION", "BODY"]
+
+    def test_new_revision_replaces_old(self, index):
+        index.add("IRON HAWK", 2, _order("IRON HAWK", "Raid OBJ CONDOR.", "Static line"))
+        assert index.search("EAGLE mechanized") == []
+        assert [(r.operation, r.version) for r in index.search("condor")] == [("IRON HAWK", 2)]
+        assert len(index) == 2
+
+    def test_older_revision_is_ignored(self, index):
+        index.add("IRON HAWK", 3, _order("IRON HAWK", "Raid OBJ CONDOR."))
+        index.add("IRON HAWK", 2, _order("IRON HAWK", "Seize OBJ EAGLE."))
+        assert index.search("eagle") == []
+
+    def test_limit(self, index):
+        assert len(index.search("obj", limit=1)) == 1
+
+    def test_reindex_from_revisions(self, tmp_path):
+        path = str(tmp_path / "opord.db")
+        revisions = RevisionStore(path)
+        revisions.save("IRON HAWK", _order("IRON HAWK", "Seize OBJ EAGLE."))
+        revisions.save("IRON HAWK", _order("IRON HAWK", "Raid OBJ CONDOR."))
+        index = SearchIndex(path)
+        assert index.reindex(revisions) == 1
+        assert [(r.operation, r.version) for r in index.search("condor")] == [("IRON HAWK", 2)]
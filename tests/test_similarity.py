@@ -0,0 +1,109 @@
+"""Tests for similar-order retrieval."""
+import numpy as np
+import pytest
+
+from opord.generator import OPORDGenerator
+from opord.revisions import RevisionStore
+from opord.schema import build_opord_data, form_from_dict, validate_form
+from opord.similarity import SimilarityIndex, vectorize
+
+
+def _order(name, mission, insert_method, dz_lz, enemy, intent="", concept=""):
+    cleaned, _ = validate_form({
+        "operation_name": name,
+        "mission": mission,
+        "insert_method": insert_method,
+        "dz_lz": dz_lz,
+        "enemy_composition": enemy,
+        "commanders_intent": intent,
+        "concept_of_operations": concept,
+    })
+    return OPORDGenerator(build_opord_data(cleaned)).generate_dict()
+
+
+HALO_EAGLE = _order(
+    "IRON HAWK", "C Co seizes OBJ EAGLE NLT 0400 to secure the DZ.", "HALO", "DZ EAGLE",
+    "Mechanized infantry platoon", intent="Secure DZ EAGLE for follow-on forces.",
+    concept="Phase I HALO insert; Phase II seize OBJ EAGLE.",
+)
+AIR_ASSAULT_FALCON = _order(
+    "STEEL TALON", "C Co clears village FALCON to deny enemy resupply.", "Air Assault",
+    "LZ FALCON", "Insurgent cell", intent="Deny resupply through FALCON.",
+)
+
+
+@pytest.fixture()
+def index():
+    index = SimilarityIndex(autofill_similarity=0.9, example_similarity=0.4)
+    index.add("IRON HAWK", 1, HALO_EAGLE)
+    index.add("STEEL TALON", 1, AIR_ASSAULT_FALCON)
+    return index
+
+
+class TestVectorize:
+    def test_ignores_operation_name(self):
+        form = form_from_dict(HALO_EAGLE)
+        renamed = dict(form, operation_name="SOMETHING ELSE")
+        assert np.array_equal(vectorize(form), vectorize(renamed))
+
+    def test_empty_form(self):
+        assert not vectorize({}).any()
+
+
+class TestSimilarityIndex:
+    def test_identical_inputs_autofill(self, index):
+        form = dict(form_from_dict(HALO_EAGLE), operation_name="NEW OP",
+                    commanders_intent="", concept_of_operations="")
+        similar = index.suggestions(form)
+        assert similar.match.operation == "IRON HAWK"
+        assert similar.match.score == pytest.approx(1.0, abs=1e-5)
+        assert similar.autofill == {
+            "commanders_intent": "Secure DZ EAGLE for follow-on forces.",
+            "concept_of_operations": "Phase I HALO insert; Phase II seize OBJ EAGLE.",
+        }
+        assert similar.examples == {}
+
+    def test_user_text_is_not_overwritten(self, index):
+        form = dict(form_from_dict(HALO_EAGLE), commanders_intent="Mine.")
+        assert "commanders_intent" not in index.suggestions(form).autofill
+
+    def test_related_inputs_become_examples(self, index):
+        form = {
+            "mission": "C Co seizes OBJ EAGLE NLT 0600 to secure the airfield.",
+            "insert_method": "HALO",
+            "dz_lz": "DZ EAGLE",
+            "enemy_composition": "Motorized infantry platoon",
+        }
+        similar = index.suggestions(form)
+        assert similar.match.operation == "IRON HAWK"
+        assert 0.4 <= similar.match.score < 0.9
+        assert similar.autofill == {}
+        assert "commanders_intent" in similar.examples
+
+    def test_unrelated_inputs_offer_nothing(self, index):
+        similar = index.suggestions({"mission": "Zzz qqq", "dz_lz": "xylophone"})
+        assert similar.autofill == {} and similar.examples == {}
+
+    def test_empty_index(self):
+        assert SimilarityIndex().best_match(form_from_dict(HALO_EAGLE)) is None
+
+    def test_new_revision_replaces_old(self, index):
+        index.add("IRON HAWK", 2, AIR_ASSAULT_FALCON)
+        assert len(index) == 2
+        assert index.best_match(form_from_dict(HALO_EAGLE)) is None or (
+            index.best_match(form_from_dict(HALO_EAGLE)).score < 0.5
+        )
+
+    def test_oldest_orders_are_evicted(self):
+        index = SimilarityIndex(max_orders=1)
+        index.add("IRON HAWK", 1, HALO_EAGLE)
+        index.add("STEEL TALON", 1, AIR_ASSAULT_FALCON)
+        assert len(index) == 1
+        assert index.best_match(form_from_dict(HALO_EAGLE)).operation == "STEEL TALON"
+
+    def test_sync_from_revisions(self, tmp_path):
+        revisions = RevisionStore(str(tmp_path / "opord.db"))
+        revisions.save("IRON HAWK", HALO_EAGLE)
+        index = SimilarityIndex()
+        index.sync(revisions)
+        assert index.best_match(form_from_dict(HALO_EAGLE)).operation == "IRON HAWK"
@@ -0,0 +1,68 @@
+"""Tests for single-flight deduplication of in-flight calls."""
+import threading
+import time
+
+import pytest
+
+from opord.singleflight import SingleFlight, request_fingerprint
+
+
+class TestSingleFlight:
+    def test_returns_function_result(self):
+        assert SingleFlight().do("k", lambda: 42) == 42
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def upstream():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return "shared"
+
+        def worker():
+            results.append(flight.do("same", upstream))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        assert started.wait(timeout=5)
+        followers = [threading.Thread(target=worker) for _ in range(4)]
+        for t in followers:
+            t.start()
+        # Let the followers queue behind the leader before it completes.
+        time.sleep(0.2)
+        release.set()
+        for t in [leader] + followers:
+            t.join(timeout=5)
+
+        assert results == ["shared"] * 5
+        assert len(calls) == 1
+        assert flight.in_flight() == 0
+
+    def test_errors_propagate_to_caller(self):
+        flight = SingleFlight()
+
+        def boom():
+            raise RuntimeError("upstream failed")
+
+        with pytest.raises(RuntimeError, match="upstream failed"):
+            flight.do("k", boom)
+        assert flight.in_flight() == 0
+
+    def test_completed_calls_are_not_cached(self):
+        flight = SingleFlight()
+        counter = iter(range(10))
+        assert flight.do("k", lambda: next(counter)) == 0
+        assert flight.do("k", lambda: next(counter)) == 1
+
+
+class TestRequestFingerprint:
+    def test_key_order_does_not_matter(self):
+        assert request_fingerprint({"a": 1, "b": 2}) == request_fingerprint({"b": 2, "a": 1})
+
+    def test_different_requests_differ(self):
+        assert request_fingerprint({"model": "a"}) != request_fingerprint({"model": "b"})
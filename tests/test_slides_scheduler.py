@@ -0,0 +1,307 @@
+"""Tests for the quota-aware Google Slides/Drive call scheduler."""
+import threading
+import time
+
+import pytest
+
+from opord.rate_limit import RateLimitTimeout, TokenBucketLimiter
+from opord.slides_scheduler import QuotaScheduler, get_scheduler, scheduler_from_env
+
+
+class FakeResponse(dict):
+    """Shaped like ``httplib2.Response``: headers plus a status."""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+
+class FakeHttpError(Exception):
+    """Shaped like ``googleapiclient.errors.HttpError``."""
+
+    def __init__(self, status, content=b"", headers=None):
+        super().__init__(f"HTTP {status}")
+        self.resp = FakeResponse(status, headers)
+        self.content = content
+
+
+class FakeLimiter:
+    """Counts acquisitions; the first one blocks until ``release`` is set."""
+
+    def __init__(self, hold_first=False):
+        self.acquired = 0
+        self.timeouts = []
+        self.blocked = []
+        self.holding = threading.Event()
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def acquire(self, tokens=0, timeout=None):
+        self.acquired += 1
+        self.timeouts.append(timeout)
+        if self.acquired == 1:
+            self.holding.set()
+            self.release.wait(5)
+        return 0.0
+
+    def block_for(self, seconds):
+        self.blocked.append(seconds)
+
+
+class Request:
+    def __init__(self, log, name, results=None):
+        self.log, self.name = log, name
+        self.results = list(results or [])
+
+    def execute(self):
+        self.log.append(self.name)
+        result = self.results.pop(0) if self.results else self.name
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeSlides:
+    """A Slides service recording every ``batchUpdate`` it sends."""
+
+    def __init__(self, fail_with=None):
+        self.sent = []
+        self.fail_with = fail_with
+
+    def presentations(self):
+        return self
+
+    def batchUpdate(self, presentationId, body):
+        service = self
+
+        class _Call:
+            def execute(self):
+                requests = body["requests"]
+                service.sent.append((presentationId, requests))
+                if service.fail_with and service.fail_with in requests:
+                    raise FakeHttpError(400)
+                return {"presentationId": presentationId,
+                        "replies": [{"n": request} for request in requests]}
+
+        return _Call()
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def _wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _hold_gate(scheduler, limiter, log):
+    """Start a call that keeps the scheduler's quota gate busy."""
+    thread = _start(scheduler.execute, Request(log, "first"), "a")
+    assert limiter.holding.wait(5)
+    return thread
+
+
+class TestFairness:
+    def test_users_are_served_round_robin(self):
+        limiter = FakeLimiter(hold_first=True)
+        scheduler = QuotaScheduler(limiter)
+        log = []
+        threads = [_hold_gate(scheduler, limiter, log)]
+        for name, user in [("a1", "a"), ("a2", "a"), ("b1", "b")]:
+            threads.append(_start(scheduler.execute, Request(log, name), user))
+            _wait_until(lambda: scheduler.pending() == len(threads) - 1)
+        limiter.release.set()
+        for thread in threads:
+            thread.join(5)
+        assert log == ["first", "a1", "b1", "a2"]
+        assert limiter.acquired == 4
+
+    def test_times_out_waiting_for_turn(self):
+        limiter = FakeLimiter(hold_first=True)
+        scheduler = QuotaScheduler(limiter, wait_seconds=0.05)
+        holder = _hold_gate(scheduler, limiter, [])
+        with pytest.raises(RateLimitTimeout):
+            scheduler.execute(Request([], "late"), "b")
+        assert scheduler.pending() == 0
+        limiter.release.set()
+        holder.join(5)
+
+
+class TestDeadline:
+    def test_calls_share_one_deadline(self):
+        now = [0.0]
+        limiter = FakeLimiter()
+        scheduler = QuotaScheduler(limiter, wait_seconds=90, clock=lambda: now[0])
+        deadline = scheduler.deadline()
+
+        class SlowRequest:
+            def execute(self):
+                now[0] += 60
+                return "copied"
+
+        assert scheduler.execute(SlowRequest(), "a", deadline) == "copied"
+        assert scheduler.execute(Request([], "update"), "a", deadline) == "update"
+        assert limiter.timeouts == [90, 30]
+
+    def test_retries_stop_at_the_deadline(self):
+        limiter = FakeLimiter()
+        scheduler = QuotaScheduler(limiter, wait_seconds=10)
+        log = []
+        request = Request(log, "x", [FakeHttpError(429, headers={"retry-after": "30"}), "x"])
+        with pytest.raises(FakeHttpError):
+            scheduler.execute(request)
+        assert log == ["x"] and limiter.blocked == []
+
+
+class TestMerging:
+    def _queue_updates(self, service, updates):
+        limiter = FakeLimiter(hold_first=True)
+        scheduler = QuotaScheduler(limiter)
+        results = {}
+
+        def update(user, presentation, requests):
+            try:
+                results[user] = scheduler.batch_update(service, presentation, requests, user)
+            except Exception as exc:
+                results[user] = exc
+
+        threads = [_hold_gate(scheduler, limiter, [])]
+        for user, presentation, requests in updates:
+            threads.append(_start(update, user, presentation, requests))
+            _wait_until(lambda: scheduler.pending() == len(threads) - 1)
+        limiter.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results, limiter
+
+    def test_updates_of_one_presentation_share_a_call(self):
+        service = FakeSlides()
+        results, limiter = self._queue_updates(service, [
+            ("b", "deck-1", ["b1", "b2"]),
+            ("c", "deck-2", ["c1"]),
+            ("d", "deck-1", ["d1"]),
+        ])
+        assert service.sent == [("deck-1", ["b1", "b2", "d1"]), ("deck-2", ["c1"])]
+        assert results["b"]["replies"] == [{"n": "b1"}, {"n": "b2"}]
+        assert results["d"] == {"presentationId": "deck-1", "replies": [{"n": "d1"}]}
+        assert limiter.acquired == 3
+
+    def test_bad_request_only_fails_its_caller(self):
+        service = FakeSlides(fail_with="bad")
+        results, _ = self._queue_updates(service, [
+            ("b", "deck-1", ["b1"]),
+            ("c", "deck-1", ["bad"]),
+        ])
+        assert results["b"]["replies"] == [{"n": "b1"}]
+        assert isinstance(results["c"], FakeHttpError)
+        assert service.sent[0] == ("deck-1", ["b1", "bad"])
+
+    def test_fallback_calls_keep_the_deadline(self):
+        service = FakeSlides(fail_with="bad")
+        _, limiter = self._queue_updates(service, [
+            ("b", "deck-1", ["b1"]),
+            ("c", "deck-1", ["bad"]),
+        ])
+        assert len(service.sent) == 3
+        assert None not in limiter.timeouts
+
+
+class TestRetries:
+    def test_rate_limited_call_pauses_the_shared_bucket(self):
+        limiter = FakeLimiter()
+        scheduler = QuotaScheduler(limiter)
+        request = Request([], "ok", [FakeHttpError(429, headers={"retry-after": "3"}),
+                                     FakeHttpError(403, b'{"reason": "userRateLimitExceeded"}'),
+                                     "done"])
+        assert scheduler.execute(request) == "done"
+        assert len(limiter.blocked) == 2 and 3 <= limiter.blocked[0] <= 3.5
+        assert limiter.acquired == 3
+
+    def test_server_errors_back_off(self):
+        sleeps = []
+        scheduler = QuotaScheduler(None, sleep=sleeps.append)
+        request = Request([], "ok", [FakeHttpError(503), "done"])
+        assert scheduler.execute(request) == "done"
+        assert len(sleeps) == 1
+
+    @pytest.mark.parametrize("error", [FakeHttpError(400), FakeHttpError(403, b"forbidden")])
+    def test_client_errors_are_not_retried(self, error):
+        log = []
+        scheduler = QuotaScheduler(None, sleep=pytest.fail)
+        with pytest.raises(FakeHttpError):
+            scheduler.execute(Request(log, "x", [error]))
+        assert log == ["x"]
+
+
+class FakeBatch:
+    """Shaped like ``BatchHttpRequest``: runs each added request, then calls back."""
+
+    sent = []
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        FakeBatch.sent.append([request_id for request_id, _ in self.requests])
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except FakeHttpError as exc:
+                self.callback(request_id, None, exc)
+
+
+class TestExecuteBatch:
+    def test_retries_only_failed_calls(self, monkeypatch):
+        monkeypatch.setattr("opord.slides_scheduler.MAX_BATCH_CALLS", 2)
+        FakeBatch.sent = []
+        limiter = FakeLimiter()
+        scheduler = QuotaScheduler(limiter)
+        requests = {
+            "a": Request([], "a"),
+            "b": Request([], "b", [FakeHttpError(429), "b"]),
+            "c": Request([], "c", [FakeHttpError(404)]),
+        }
+        results = scheduler.execute_batch(FakeBatch, requests)
+        assert FakeBatch.sent == [["a", "b"], ["c"], ["b"]]
+        assert results["a"] == "a" and results["b"] == "b"
+        assert isinstance(results["c"], FakeHttpError)
+        assert limiter.acquired == 4  # one unit of quota per call sent
+        assert len(limiter.blocked) == 1
+
+    def test_honors_retry_after(self):
+        FakeBatch.sent = []
+        limiter = FakeLimiter()
+        scheduler = QuotaScheduler(limiter)
+        requests = {
+            "a": Request([], "a", [FakeHttpError(429, headers={"retry-after": "2"}), "a"]),
+            "b": Request([], "b", [FakeHttpError(429, headers={"retry-after": "7"}), "b"]),
+        }
+        assert scheduler.execute_batch(FakeBatch, requests) == {"a": "a", "b": "b"}
+        assert len(limiter.blocked) == 1 and 7 <= limiter.blocked[0] <= 7.5
+
+
+class TestFromEnv:
+    def test_defaults_and_disabling(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("GOOGLE_RATE_LIMIT_DB", str(tmp_path / "google.sqlite3"))
+        monkeypatch.delenv("GOOGLE_SLIDES_WRITE_RPM", raising=False)
+        slides = scheduler_from_env("slides")
+        assert isinstance(slides.limiter, TokenBucketLimiter)
+        assert (slides.limiter.rpm, slides.limiter.name) == (60, "google_slides")
+        monkeypatch.setenv("GOOGLE_DRIVE_RPM", "0")
+        assert scheduler_from_env("drive").limiter is None
+
+    def test_one_scheduler_per_api(self, monkeypatch):
+        monkeypatch.setenv("GOOGLE_SLIDES_WRITE_RPM", "0")
+        monkeypatch.setenv("GOOGLE_DRIVE_RPM", "0")
+        assert get_scheduler("slides") is get_scheduler("slides")
+        assert get_scheduler("slides") is not get_scheduler("drive")
@@ -0,0 +1,186 @@
+"""Tests for AI call telemetry (mocked — no real API calls)."""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from opord.ai_helper import generate_full_opord, generate_section
+from opord.batch import record_batch_usage
+from opord.telemetry import (
+    AICall,
+    TelemetryStore,
+    call_cost,
+    main,
+    percentile,
+    usage_counts,
+)
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    path = str(tmp_path / "telemetry.db")
+    monkeypatch.setenv("OPORD_DB_PATH", path)
+    return TelemetryStore(path)
+
+
+def _usage(prompt, completion, cached=0):
+    return SimpleNamespace(
+        prompt_tokens=prompt, completion_tokens=completion,
+        total_tokens=prompt + completion,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+    )
+
+
+def _client(text="AI text.", usage=None, model="gpt-4o-2024-08-06"):
+    client = MagicMock()
+    response = MagicMock(usage=usage or _usage(400, 100, cached=256), model=model)
+    response.choices[0].message.content = text
+    client.chat.completions.create.return_value = response
+    return client
+
+
+class TestUsageCounts:
+    def test_sdk_object(self):
+        assert usage_counts(_usage(400, 100, cached=256)) == (400, 256, 100)
+
+    def test_batch_dict(self):
+        usage = {"prompt_tokens": 10, "completion_tokens": 5,
+                 "prompt_tokens_details": {"cached_tokens": 4}}
+        assert usage_counts(usage) == (10, 4, 5)
+
+    def test_missing_usage(self):
+        assert usage_counts(None) == (0, 0, 0)
+        assert usage_counts(MagicMock()) == (0, 0, 0)
+
+
+class TestCost:
+    def test_dated_model_uses_prefix_price(self):
+        call = AICall("gpt-4o-mini-2024-07-18", "Signal", prompt_tokens=1_000_000,
+                      completion_tokens=1_000_000)
+        assert call_cost(call, {"gpt-4o": (2.5, 1.25, 10.0), "gpt-4o-mini": (0.15, 0.075, 0.6)}) \
+            == pytest.approx(0.75)
+
+    def test_cached_tokens_and_batch_discount(self):
+        prices = {"gpt-4o": (2.0, 1.0, 0.0)}
+        call = AICall("gpt-4o", "Signal", prompt_tokens=1_000_000, cached_tokens=500_000)
+        assert call_cost(call, prices) == pytest.approx(1.5)
+        call.source = "batch"
+        assert call_cost(call, prices) == pytest.approx(0.75)
+
+    def test_unknown_model(self):
+        assert call_cost(AICall("llama", "Signal", prompt_tokens=5), {"gpt-4o": (1, 1, 1)}) is None
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 95) == 95
+    assert percentile(values, 50) == 50
+    assert percentile([], 95) is None
+
+
+class TestRecording:
+    def test_generate_section_records_call(self, store, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        with patch("opord.ai_helper.get_client", return_value=_client()):
+            generate_section("Scheme of Fires", "telemetry notes one", operation="IRON HAWK")
+        [call] = store.calls()
+        assert (call.model, call.section, call.operation, call.source) == \
+            ("gpt-4o-2024-08-06", "Scheme of Fires", "IRON HAWK", "interactive")
+        assert (call.prompt_tokens, call.cached_tokens, call.completion_tokens) == (400, 256, 100)
+        assert call.outcome == "ok" and call.latency_ms >= 0
+
+    def test_failed_call_is_recorded(self, store, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        client = MagicMock()
+        client.chat.completions.create.side_effect = ValueError("bad request")
+        with patch("opord.ai_helper.get_client", return_value=client):
+            with pytest.raises(ValueError):
+                generate_section("Signal", "telemetry notes two")
+        [call] = store.calls()
+        assert (call.outcome, call.error) == ("error", "ValueError")
+
+    def test_full_opord_records_operation(self, store, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        with patch("opord.ai_helper.get_client", return_value=_client()):
+            generate_full_opord({"operation_name": "STEEL TELEMETRY", "mission": "Seize OBJ X."})
+        calls = store.calls()
+        assert len(calls) == 12  # 11 sections + the subordinate tasks
+        assert {call.operation for call in calls} == {"STEEL TELEMETRY"}
+
+    def test_disabled(self, store, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        monkeypatch.setenv("OPORD_TELEMETRY", "0")
+        with patch("opord.ai_helper.get_client", return_value=_client()):
+            generate_section("Signal", "telemetry notes three")
+        assert store.calls() == []
+
+    def test_unwritable_database_does_not_fail_the_call(self, tmp_path, monkeypatch, caplog):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test-key")
+        blocker = tmp_path / "not-a-directory"
+        blocker.write_text("")
+        monkeypatch.setenv("OPORD_DB_PATH", str(blocker / "opord.db"))
+        with patch("opord.ai_helper.get_client", return_value=_client()):
+            assert generate_section("Signal", "telemetry notes four") == "AI text."
+        assert "telemetry not recorded" in caplog.text
+
+    def test_batch_usage(self, store):
+        lines = [
+            json.dumps({"custom_id": "iron-hawk:signal", "error": None, "response": {
+                "status_code": 200, "body": {"model": "gpt-4o", "usage": {
+                    "prompt_tokens": 300, "completion_tokens": 80}}}}),
+            json.dumps({"custom_id": "iron-hawk:scheme_of_fires", "response": None,
+                        "error": {"message": "boom"}}),
+        ]
+        assert record_batch_usage(lines) == 2
+        ok, failed = store.calls()
+        assert (ok.section, ok.operation, ok.source, ok.prompt_tokens) == \
+            ("Command and Signal paragraph", "iron-hawk", "batch", 300)
+        assert ok.latency_ms is None
+        assert failed.outcome == "error"
+
+
+class TestReport:
+    def _fill(self, store):
+        for latency in range(1, 21):
+            store.record(AICall("gpt-4o", "Signal", prompt_tokens=1000, completion_tokens=100,
+                                latency_ms=float(latency * 100), created=86400 * 2))
+        store.record(AICall("gpt-4o-mini", "Scheme of Fires", prompt_tokens=1000,
+                            latency_ms=50.0, created=86400 * 3))
+        store.record(AICall("gpt-4o", "Signal", outcome="error", error="Timeout",
+                            latency_ms=30000.0, created=86400 * 3))
+
+    def test_by_section(self, store):
+        self._fill(store)
+        signal, fires = store.report(by="section")
+        assert (signal.key, signal.calls, signal.errors) == ("Signal", 21, 1)
+        assert signal.prompt_tokens == 20_000
+        assert signal.p95_ms == 1900.0  # the failed call is not counted
+        assert signal.cached_pct == 0.0
+        assert signal.cost == pytest.approx(20 * (1000 * 2.5 + 100 * 10.0) / 1e6)
+        assert fires.key == "Scheme of Fires"
+
+    def test_by_day_and_since(self, store):
+        self._fill(store)
+        assert [row.key for row in store.report(by="day")] == ["1970-01-03", "1970-01-04"]
+        assert [row.calls for row in store.report(by="model", since=86400 * 3)] == [1, 1]
+
+    def test_cached_share(self, store):
+        store.record(AICall("gpt-4o", "Signal", prompt_tokens=1000, cached_tokens=0))
+        store.record(AICall("gpt-4o", "Signal", prompt_tokens=1000, cached_tokens=768))
+        [row] = store.report()
+        assert row.cached_pct == pytest.approx(38.4)
+
+    def test_unknown_grouping(self, store):
+        with pytest.raises(ValueError):
+            store.report(by="colour")
+
+    def test_cli(self, store, capsys):
+        self._fill(store)
+        assert main(["--by", "model", "--db", store.path]) == 0
+        out = capsys.readouterr().out
+        assert out.splitlines()[0].split()[0] == "model"
+        assert "gpt-4o-mini" in out
+        assert "Prompt cache: 0 of 21000 prompt tokens (0%)" in out
+        assert main(["--json", "--db", store.path]) == 0
+        assert json.loads(capsys.readouterr().out)[0]["key"] == "Signal"
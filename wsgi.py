@@ -0,0 +1,14 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With ``preload_app`` the master imports this module once, so templates are
+compiled and the SDKs imported before the workers fork and share them.
+"""
+
+from app import app, warm_up
+
+warm_up()
+
+__all__ = ["app"]